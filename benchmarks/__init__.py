@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the CarbonTrack AI Agent (see run_benchmarks.py)
+"""
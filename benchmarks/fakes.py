@@ -0,0 +1,102 @@
+"""
+Offline stand-ins used by the benchmark runner
+
+``FakeLLM`` is a deterministic chat model (same prompt, same post) with
+configurable latency, and ``StaticSite`` serves ``benchmarks/site`` over
+HTTP on a random local port for ``CreateVideoTool`` to record.
+"""
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+SITE_DIR = Path(__file__).parent / "site"
+
+_VOCABULARY = (
+    "carbon tracking teams measure reduce emissions insights dashboards community "
+    "challenges recommendations energy travel food reports goals progress impact "
+    "sustainability data open source launch today try it now share feedback"
+).split()
+
+
+class FakeLLM:
+    """Deterministic chat model with a fixed first-token delay and per-token delay."""
+
+    def __init__(self, words: int = 60, first_token_delay: float = 0.0, token_delay: float = 0.0):
+        """
+        Args:
+            words: Words in every generated post
+            first_token_delay: Seconds before the first token (prompt processing)
+            token_delay: Seconds per generated token
+        """
+        self.words = words
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _tokens(self, prompt) -> List[str]:
+        with self._lock:
+            self.calls += 1
+        digest = hashlib.sha256(str(prompt).encode("utf-8")).digest()
+        words = [_VOCABULARY[digest[i % len(digest)] % len(_VOCABULARY)] for i in range(self.words)]
+        return [f"{word} " for word in words] + ["#CarbonTrack #Sustainability"]
+
+    def invoke(self, prompt, *args, **kwargs) -> AIMessage:
+        tokens = self._tokens(prompt)
+        time.sleep(self.first_token_delay + self.token_delay * len(tokens))
+        return AIMessage(content="".join(tokens))
+
+    async def ainvoke(self, prompt, *args, **kwargs) -> AIMessage:
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self.first_token_delay + self.token_delay * len(tokens))
+        return AIMessage(content="".join(tokens))
+
+    def stream(self, prompt, *args, **kwargs) -> Iterator[AIMessageChunk]:
+        tokens = self._tokens(prompt)
+        time.sleep(self.first_token_delay)
+        for token in tokens:
+            time.sleep(self.token_delay)
+            yield AIMessageChunk(content=token)
+
+    async def astream(self, prompt, *args, **kwargs) -> AsyncIterator[AIMessageChunk]:
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self.first_token_delay)
+        for token in tokens:
+            await asyncio.sleep(self.token_delay)
+            yield AIMessageChunk(content=token)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class StaticSite:
+    """Serves a directory over HTTP on a random local port."""
+
+    def __init__(self, directory: Path = SITE_DIR):
+        self.directory = Path(directory)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/index.html"
+
+    def __enter__(self) -> "StaticSite":
+        handler = functools.partial(_QuietHandler, directory=str(self.directory))
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,236 @@
+"""
+A local stand-in for the LinkedIn API endpoints used by PostToLinkedInTool
+
+Run it in-process with ``with LinkedInStub() as stub:`` and point
+``settings.linkedin_api_base_url`` at ``stub.base_url``. Failures can be
+injected per upload part or per path (status, Retry-After, slow responses),
+and every request is recorded for assertions.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+
+class LinkedInStub:
+    """In-memory LinkedIn API (ugcPosts, assets, videos, posts) on a random local port."""
+
+    def __init__(self, part_size: int = 1024, processing_polls: int = 1, keep_data: bool = True):
+        """
+        Args:
+            part_size: Bytes per upload part handed out by initializeUpload
+            processing_polls: Status polls answered with PROCESSING before AVAILABLE
+            keep_data: Keep uploaded bytes for assertions; benchmarks turn this
+                off so the stub does not hold whole videos in memory
+        """
+        self.part_size = part_size
+        self.processing_polls = processing_polls
+        self.keep_data = keep_data
+        self.fail_parts: Counter = Counter()
+        self.requests: List[tuple] = []
+        self.videos: Dict[str, dict] = {}
+        self.posts: List[dict] = []
+        self.images: Dict[str, bytes] = {}
+        self.last_headers: Dict[str, str] = {}
+        self.headers: Dict[tuple, Dict[str, str]] = {}
+        self._injected: List[list] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "LinkedInStub":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def calls(self, method: str, pattern: str) -> List[tuple]:
+        """Recorded (method, path) requests whose path matches ``pattern``."""
+        return [call for call in self.requests if call[0] == method and re.search(pattern, call[1])]
+
+    def inject(self, path_prefix: str, status: int = 500, count: int = 1,
+               headers: Optional[dict] = None, delay: float = 0.0) -> None:
+        """Answer the next ``count`` requests under ``path_prefix`` with ``status`` after ``delay`` seconds."""
+        with self._lock:
+            self._injected.append([path_prefix, status, headers or {}, delay, count])
+
+    def _take_injected(self, path: str) -> Optional[list]:
+        with self._lock:
+            for entry in self._injected:
+                if path.startswith(entry[0]) and entry[4] > 0:
+                    entry[4] -= 1
+                    return entry
+        return None
+
+    # -- endpoint behaviour -------------------------------------------
+
+    def _ugc_post(self, body: dict):
+        with self._lock:
+            post_id = f"urn:li:share:{len(self.posts) + 1}"
+            self.posts.append(body)
+        return 201, {"id": post_id}
+
+    def _register_image(self, body: dict):
+        with self._lock:
+            asset = f"urn:li:digitalmediaAsset:I{len(self.images) + 1}"
+            self.images[asset] = b""
+        upload_url = f"{self.base_url}/image/{asset.rsplit(':', 1)[1]}"
+        return 200, {"value": {
+            "asset": asset,
+            "uploadMechanism": {
+                "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest": {"uploadUrl": upload_url}
+            },
+        }}
+
+    def _initialize(self, body: dict):
+        request = body["initializeUploadRequest"]
+        size = request["fileSizeBytes"]
+        with self._lock:
+            video_id = f"V{len(self.videos) + 1}"
+            urn = f"urn:li:video:{video_id}"
+            instructions = [
+                {
+                    "uploadUrl": f"{self.base_url}/upload/{video_id}/{index}",
+                    "firstByte": first,
+                    "lastByte": min(first + self.part_size, size) - 1,
+                }
+                for index, first in enumerate(range(0, size, self.part_size))
+            ]
+            self.videos[urn] = {"parts": {}, "status": "WAITING_UPLOAD", "polls": 0, "size": size, "data": b""}
+        return 200, {"value": {"video": urn, "uploadToken": f"token-{video_id}", "uploadInstructions": instructions}}
+
+    def _upload(self, video_id: str, index: int, data: bytes):
+        with self._lock:
+            if self.fail_parts[index] > 0:
+                self.fail_parts[index] -= 1
+                return 500, {"message": "injected failure"}, {}
+            self.videos[f"urn:li:video:{video_id}"]["parts"][index] = data if self.keep_data else len(data)
+        return 200, {}, {"ETag": f'"etag-{video_id}-{index}"'}
+
+    def _finalize(self, body: dict):
+        request = body["finalizeUploadRequest"]
+        video = self.videos.get(request["video"])
+        if video is None:
+            return 404, {"message": "unknown video"}
+        expected = [f'"etag-{request["video"].rsplit(":", 1)[1]}-{index}"' for index in sorted(video["parts"])]
+        if request["uploadedPartIds"] != expected:
+            return 400, {"message": "part ids do not match uploaded parts"}
+        parts = [video["parts"][index] for index in sorted(video["parts"])]
+        if self.keep_data:
+            video["data"] = b"".join(parts)
+            received = len(video["data"])
+        else:
+            received = sum(parts)
+        if received != video["size"]:
+            return 400, {"message": "incomplete upload"}
+        video["status"] = "PROCESSING"
+        return 200, {}
+
+    def _status(self, urn: str):
+        video = self.videos.get(urn)
+        if video is None:
+            return 404, {"message": "unknown video"}
+        if video["status"] == "PROCESSING":
+            video["polls"] += 1
+            if video["polls"] > self.processing_polls:
+                video["status"] = "AVAILABLE"
+                return 200, {"id": urn, "status": "AVAILABLE"}
+        return 200, {"id": urn, "status": video["status"]}
+
+    def _create_post(self, body: dict):
+        with self._lock:
+            post_id = f"urn:li:share:{len(self.posts) + 1}"
+            self.posts.append(body)
+        return 201, {}, {"x-restli-id": post_id}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _body(self) -> bytes:
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length)
+
+            def _send(self, status: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _intercept(self, method: str) -> bool:
+                """Record the request and answer it from an injected failure, if any."""
+                stub.requests.append((method, self.path))
+                stub.last_headers = stub.headers[(method, self.path)] = dict(self.headers)
+                entry = stub._take_injected(self.path)
+                if entry is None:
+                    return False
+                _, status, headers, delay, _ = entry
+                self._body()
+                time.sleep(delay)
+                try:
+                    self._send(status, {"message": "injected"}, headers)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                return True
+
+            def do_POST(self):
+                if self._intercept("POST"):
+                    return
+                body = json.loads(self._body() or b"{}")
+                if self.path == "/v2/ugcPosts":
+                    self._send(*stub._ugc_post(body))
+                elif self.path == "/v2/assets?action=registerUpload":
+                    self._send(*stub._register_image(body))
+                elif self.path == "/rest/videos?action=initializeUpload":
+                    self._send(*stub._initialize(body))
+                elif self.path == "/rest/videos?action=finalizeUpload":
+                    self._send(*stub._finalize(body))
+                elif self.path == "/rest/posts":
+                    self._send(*stub._create_post(body))
+                else:
+                    self._send(404, {"message": "not found"})
+
+            def do_PUT(self):
+                if self._intercept("PUT"):
+                    return
+                data = self._body()
+                image = re.fullmatch(r"/image/(\w+)", self.path)
+                if image is not None:
+                    stub.images[f"urn:li:digitalmediaAsset:{image.group(1)}"] = data
+                    self._send(201, {})
+                    return
+                match = re.fullmatch(r"/upload/(\w+)/(\d+)", self.path)
+                if match is None:
+                    self._send(404, {"message": "not found"})
+                    return
+                self._send(*stub._upload(match.group(1), int(match.group(2)), data))
+
+            def do_GET(self):
+                if self._intercept("GET"):
+                    return
+                match = re.fullmatch(r"/rest/videos/(.+)", self.path)
+                if match is None:
+                    self._send(404, {"message": "not found"})
+                    return
+                self._send(*stub._status(unquote(match.group(1))))
+
+        return Handler
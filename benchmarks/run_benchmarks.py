@@ -0,0 +1,585 @@
+"""
+CarbonTrack AI Agent - Offline Benchmark Runner
+
+Measures latency, throughput and peak RSS of each tool and of the full
+pipeline without any external service: posts come from a deterministic
+fake LLM, recordings are made of a static site served from disk, and
+LinkedIn calls go to the local API stub in linkedin_stub.py (shared
+with the tests).
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --cases generate_post upload --iterations 10
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json --fail-on-regression
+
+Results are written as JSON (default: benchmarks/results/<timestamp>.json)
+so runs before and after a change can be compared with --compare.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR / "src"))
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.fakes import FakeLLM, StaticSite
+from benchmarks.linkedin_stub import LinkedInStub
+from config import settings
+from llm import register_llm, reset_llm_registry
+from pipeline import is_tool_error
+
+logger = logging.getLogger(__name__)
+console = Console()
+
+RESULTS_DIR = Path(__file__).parent / "results"
+CASES = ("generate_post", "generate_post_stream", "transcode", "create_video", "upload", "pipeline")
+
+PROJECT = {
+    "project_name": "CarbonTrack",
+    "description": "A sustainability tracking app that helps users reduce their carbon footprint",
+    "key_features": ["Carbon footprint tracking", "AI-powered recommendations", "Community challenges"],
+    "tone": "professional",
+}
+
+
+class SkipCase(Exception):
+    """Raised when a case cannot run here (no browser, no ffmpeg, ...)."""
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the lifetime peak (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSS:
+    """Samples the process RSS in the background and keeps the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, current_rss())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> "PeakRSS":
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak / 1e6, 1)
+
+
+@dataclass
+class CaseResult:
+    """Timings of one benchmark case."""
+    name: str
+    unit: str = "ops"
+    latencies: List[float] = field(default_factory=list)
+    work: float = 0.0
+    warmup_seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    extra: Dict[str, Any] = field(default_factory=dict)
+    skipped: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.skipped:
+            return {"skipped": self.skipped}
+        busy = sum(self.latencies)
+        return {
+            "iterations": len(self.latencies),
+            "latency_mean": round(busy / len(self.latencies), 4) if self.latencies else 0.0,
+            "latency_p50": round(percentile(self.latencies, 50), 4),
+            "latency_p95": round(percentile(self.latencies, 95), 4),
+            "latency_min": round(min(self.latencies), 4) if self.latencies else 0.0,
+            "latency_max": round(max(self.latencies), 4) if self.latencies else 0.0,
+            "throughput": round(self.work / busy, 3) if busy > 0 else 0.0,
+            "throughput_unit": f"{self.unit}/s",
+            "warmup_seconds": round(self.warmup_seconds, 4),
+            "peak_rss_mb": self.peak_rss_mb,
+            **self.extra,
+        }
+
+
+def measure(
+    name: str,
+    call: Callable[[int], Optional[float]],
+    iterations: int,
+    warmup: int = 1,
+    unit: str = "ops",
+) -> CaseResult:
+    """
+    Time repeated calls of a benchmark body.
+
+    Args:
+        name: Case name
+        call: Called with the iteration number; returns the units of work done
+            (bytes, media seconds, ...) or None for one operation
+        iterations: Timed calls
+        warmup: Untimed calls first (browser launch, connection set-up, ...)
+        unit: Unit of the work returned by ``call``
+
+    Returns:
+        The case result
+    """
+    result = CaseResult(name, unit=unit)
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        for index in range(warmup):
+            call(-1 - index)
+        result.warmup_seconds = time.perf_counter() - start
+        for index in range(iterations):
+            start = time.perf_counter()
+            work = call(index)
+            result.latencies.append(time.perf_counter() - start)
+            result.work += 1 if work is None else work
+    result.peak_rss_mb = rss.peak_mb
+    return result
+
+
+@contextmanager
+def override_settings(**values) -> Iterator[None]:
+    """Temporarily change settings."""
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+@contextmanager
+def video_output_dir(path: Path) -> Iterator[None]:
+    """Send recordings to the benchmark's scratch directory instead of output/."""
+    import tools.create_video as create_video
+
+    previous = create_video.OUTPUT_DIR, create_video.RECORDINGS_DIR
+    create_video.OUTPUT_DIR, create_video.RECORDINGS_DIR = path, path / ".recordings"
+    try:
+        yield
+    finally:
+        create_video.OUTPUT_DIR, create_video.RECORDINGS_DIR = previous
+
+
+class BenchmarkContext:
+    """Shared fixtures for the cases: fake LLM, static site, LinkedIn stub, scratch space."""
+
+    def __init__(self, args: argparse.Namespace, work_dir: Path):
+        self.args = args
+        self.work_dir = work_dir
+        self.llm = FakeLLM(
+            words=args.llm_words,
+            first_token_delay=args.llm_first_token_ms / 1000,
+            token_delay=args.llm_token_ms / 1000,
+        )
+        self._video: Optional[Path] = None
+
+    def post_args(self, index: int) -> Dict[str, str]:
+        # A distinct name per call so nothing can be served from a cache
+        return {
+            "project_name": f"{PROJECT['project_name']} {index}",
+            "description": PROJECT["description"],
+            "website_url": "https://example.com",
+            "key_features": ", ".join(PROJECT["key_features"]),
+            "tone": PROJECT["tone"],
+        }
+
+    @contextmanager
+    def linkedin(self) -> Iterator[LinkedInStub]:
+        import dedup
+        from tools.linkedin_client import reset_linkedin_clients
+
+        with LinkedInStub(part_size=4 * 1024 * 1024, processing_polls=0, keep_data=False) as stub:
+            # The same post is published on every iteration, into a scratch index
+            with override_settings(
+                auto_post=True,
+                linkedin_access_token="benchmark",
+                linkedin_user_id="benchmark",
+                linkedin_api_base_url=stub.base_url,
+                dedup_enabled=False,
+            ):
+                previous_index = dedup._post_index
+                dedup._post_index = dedup.PostIndex(self.work_dir / "published_posts.sqlite3")
+                reset_linkedin_clients()
+                try:
+                    yield stub
+                finally:
+                    reset_linkedin_clients()
+                    dedup._post_index = previous_index
+
+    def source_video(self) -> Path:
+        """A synthetic webm recording of --video-seconds (made once, not timed)."""
+        if self._video is None:
+            from tools.transcode import FFmpegTranscoder
+
+            if not FFmpegTranscoder.available():
+                raise SkipCase("ffmpeg not available")
+            self._video = self.work_dir / "source.webm"
+            subprocess.run(
+                [settings.ffmpeg_path, "-loglevel", "error", "-y", "-f", "lavfi",
+                 "-i", f"testsrc2=size={settings.video_resolution}:rate={settings.video_fps}",
+                 "-t", str(self.args.video_seconds), "-c:v", "libvpx", "-deadline", "realtime",
+                 str(self._video)],
+                check=True,
+            )
+        return self._video
+
+    def upload_file(self) -> Path:
+        """A file of --upload-mb random bytes standing in for a finished video."""
+        path = self.work_dir / "upload.mp4"
+        if not path.exists():
+            remaining = int(self.args.upload_mb * 1024 * 1024)
+            with open(path, "wb") as f:
+                while remaining:
+                    chunk = os.urandom(min(remaining, 1024 * 1024))
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        return path
+
+
+# -- cases -----------------------------------------------------------------
+
+def bench_generate_post(ctx: BenchmarkContext) -> CaseResult:
+    from tools.generate_post import GeneratePostTool
+
+    tool = GeneratePostTool(use_cache=False)
+
+    def call(index: int) -> None:
+        post = tool._run(**ctx.post_args(index))
+        if is_tool_error(post):
+            raise RuntimeError(post)
+
+    return measure("generate_post", call, ctx.args.iterations, ctx.args.warmup)
+
+
+def bench_generate_post_stream(ctx: BenchmarkContext) -> CaseResult:
+    from tools.generate_post import GeneratePostTool
+
+    ttfts = []
+    tool = GeneratePostTool(use_cache=False, on_token=lambda token: None)
+
+    def call(index: int) -> None:
+        post = tool._run(**ctx.post_args(index))
+        if is_tool_error(post):
+            raise RuntimeError(post)
+        if index >= 0:
+            ttfts.append(tool.last_generation_metrics["ttft_seconds"])
+
+    result = measure("generate_post_stream", call, ctx.args.iterations, ctx.args.warmup)
+    result.extra["ttft_p50"] = round(percentile(ttfts, 50), 4)
+    result.extra["ttft_p95"] = round(percentile(ttfts, 95), 4)
+    return result
+
+
+def bench_transcode(ctx: BenchmarkContext) -> CaseResult:
+    from tools.transcode import get_transcoder
+
+    source = ctx.source_video()
+    transcoder = get_transcoder()
+    if transcoder is None:
+        raise SkipCase("no transcoder backend available")
+
+    def call(index: int) -> float:
+        return transcoder.transcode(source, ctx.work_dir / f"transcoded-{index}.mp4").media_seconds
+
+    result = measure("transcode", call, ctx.args.iterations, ctx.args.warmup, unit="media_s")
+    result.extra["backend"] = type(transcoder).__name__
+    return result
+
+
+def bench_create_video(ctx: BenchmarkContext) -> CaseResult:
+    from tools.create_video import CreateVideoTool
+
+    tool = CreateVideoTool()
+    with StaticSite() as site, video_output_dir(ctx.work_dir):
+        def call(index: int) -> float:
+            video = tool._run(
+                website_url=site.url,
+                duration=ctx.args.video_seconds,
+                output_filename=f"recording-{index}",
+            )
+            if is_tool_error(video):
+                raise SkipCase(video.splitlines()[0])
+            return ctx.args.video_seconds
+
+        # Recording is slow, so it gets at most a few iterations
+        iterations = min(ctx.args.iterations, ctx.args.video_iterations)
+        result = measure("create_video", call, iterations, ctx.args.warmup, unit="media_s")
+    result.extra["capture_mode"] = settings.video_capture_mode
+    return result
+
+
+def bench_upload(ctx: BenchmarkContext) -> CaseResult:
+    from tools.post_to_linkedin import PostToLinkedInTool
+
+    video = ctx.upload_file()
+    size_mb = video.stat().st_size / 1e6
+    tool = PostToLinkedInTool()
+    with ctx.linkedin() as stub:
+        def call(index: int) -> float:
+            posted = tool._run(post_text=f"Benchmark upload {index}", video_path=str(video))
+            if is_tool_error(posted):
+                raise RuntimeError(posted)
+            return size_mb
+
+        result = measure("upload", call, ctx.args.iterations, ctx.args.warmup, unit="MB")
+        result.extra["requests"] = len(stub.requests)
+    result.extra["size_mb"] = round(size_mb, 2)
+    return result
+
+
+def bench_pipeline(ctx: BenchmarkContext) -> CaseResult:
+    from agent import CarbonTrackAgent
+    from tools import CreateVideoTool, GeneratePostTool, PostToLinkedInTool
+
+    agent = CarbonTrackAgent(
+        [GeneratePostTool(use_cache=False), CreateVideoTool(), PostToLinkedInTool()],
+        mode="pipeline",
+    )
+    videos = []
+    with StaticSite() as site, ctx.linkedin(), video_output_dir(ctx.work_dir):
+        def call(index: int) -> None:
+            result = agent.run({
+                **PROJECT,
+                "project_name": f"{PROJECT['project_name']} {index}",
+                "website_url": site.url,
+                "video_duration": ctx.args.video_seconds,
+            })
+            videos.append(bool(result["video_path"]))
+
+        iterations = min(ctx.args.iterations, ctx.args.video_iterations)
+        result = measure("pipeline", call, iterations, ctx.args.warmup)
+    # Without a browser the pipeline still runs, but publishes a text-only post
+    result.extra["with_video"] = all(videos)
+    return result
+
+
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext], CaseResult]] = {
+    "generate_post": bench_generate_post,
+    "generate_post_stream": bench_generate_post_stream,
+    "transcode": bench_transcode,
+    "create_video": bench_create_video,
+    "upload": bench_upload,
+    "pipeline": bench_pipeline,
+}
+
+
+# -- running and comparing ---------------------------------------------------
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run the selected cases.
+
+    Returns:
+        JSON-serializable results with run metadata
+    """
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="carbontrack-bench-") as tmp:
+        ctx = BenchmarkContext(args, Path(tmp))
+        register_llm(ctx.llm)
+        try:
+            with override_settings(post_cache_enabled=False):
+                for name in args.cases:
+                    console.print(f"[cyan]Running[/cyan] {name}...")
+                    try:
+                        result = BENCHMARKS[name](ctx)
+                    except SkipCase as e:
+                        result = CaseResult(name, skipped=str(e))
+                    results[name] = result.to_dict()
+        finally:
+            reset_llm_registry()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": {
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "video_seconds": args.video_seconds,
+                "upload_mb": args.upload_mb,
+                "llm_first_token_ms": args.llm_first_token_ms,
+                "llm_token_ms": args.llm_token_ms,
+                "video_capture_mode": settings.video_capture_mode,
+                "video_resolution": settings.video_resolution,
+            },
+        },
+        "results": results,
+    }
+
+
+# (metric, True if higher is better)
+COMPARED_METRICS = (("latency_p50", False), ("latency_p95", False), ("throughput", True), ("peak_rss_mb", False))
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare two result files case by case.
+
+    Args:
+        baseline: Earlier results
+        current: New results
+        threshold: Relative change (e.g. 0.1 for 10%) beyond which a worse value is a regression
+
+    Returns:
+        One row per case and metric present in both runs
+    """
+    rows = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "skipped" in before or "skipped" in now:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = before.get(metric), now.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append({
+                "case": name,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def display_results(report: Dict[str, Any]) -> None:
+    table = Table(title="Benchmark results")
+    for column in ("Case", "Iterations", "p50", "p95", "Throughput", "Peak RSS"):
+        table.add_column(column)
+    for name, result in report["results"].items():
+        if "skipped" in result:
+            table.add_row(name, "-", "-", "-", f"[yellow]skipped: {result['skipped'][:60]}[/yellow]", "-")
+            continue
+        table.add_row(
+            name,
+            str(result["iterations"]),
+            f"{result['latency_p50'] * 1000:.1f} ms",
+            f"{result['latency_p95'] * 1000:.1f} ms",
+            f"{result['throughput']:.2f} {result['throughput_unit']}",
+            f"{result['peak_rss_mb']:.0f} MB",
+        )
+    console.print(table)
+
+
+def display_comparison(rows: List[Dict[str, Any]], threshold: float) -> None:
+    table = Table(title=f"Comparison with baseline (regression threshold {threshold:.0%})")
+    for column in ("Case", "Metric", "Baseline", "Current", "Change"):
+        table.add_column(column)
+    for row in rows:
+        style = "red" if row["regression"] else "green"
+        table.add_row(
+            row["case"], row["metric"], f"{row['baseline']:g}", f"{row['current']:g}",
+            f"[{style}]{row['change']:+.1%}[/{style}]",
+        )
+    console.print(table)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CarbonTrack offline benchmarks")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES), help="Cases to run (default: all)")
+    parser.add_argument("--iterations", "-n", type=int, default=5, help="Timed iterations per case (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed iterations before timing (default: 1)")
+    parser.add_argument(
+        "--video-iterations", type=int, default=2,
+        help="Cap on iterations for cases that record video (default: 2)",
+    )
+    parser.add_argument("--video-seconds", type=int, default=3, help="Length of recorded/transcoded videos (default: 3)")
+    parser.add_argument("--upload-mb", type=float, default=20, help="Size of the uploaded video in MB (default: 20)")
+    parser.add_argument("--llm-words", type=int, default=60, help="Words in each fake LLM post (default: 60)")
+    parser.add_argument("--llm-first-token-ms", type=float, default=0, help="Fake LLM delay before the first token")
+    parser.add_argument("--llm-token-ms", type=float, default=0, help="Fake LLM delay per token")
+    parser.add_argument("--output", "-o", type=str, help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=str, help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression (default: 0.1)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if any metric regressed")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show tool logging")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    report = run_benchmarks(args)
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        output_path = RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    display_results(report)
+    console.print(f"[cyan]Results written to:[/cyan] {output_path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        rows = compare_results(baseline, report, args.threshold)
+        display_comparison(rows, args.threshold)
+        if args.fail_on_regression and any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -56,6 +56,7 @@ setup(
     entry_points={
         "console_scripts": [
             "carbontrack=main:main",
+            "carbontrack-worker=worker:main",
         ],
     },
     include_package_data=True,
@@ -8,9 +8,17 @@ __version__ = "0.1.0"
 __author__ = "Ahmed Ul Kabir"
 __license__ = "MIT"
 
-from .config import settings
-from .agent import create_carbontrack_agent, CarbonTrackAgent
-from .tools import GeneratePostTool, CreateVideoTool, PostToLinkedInTool
+import importlib
+
+# Exports are imported on first access to keep `import src` cheap
+_EXPORTS = {
+    "settings": ".config",
+    "create_carbontrack_agent": ".agent",
+    "CarbonTrackAgent": ".agent",
+    "GeneratePostTool": ".tools",
+    "CreateVideoTool": ".tools",
+    "PostToLinkedInTool": ".tools",
+}
 
 __all__ = [
     "settings",
@@ -20,3 +28,11 @@ __all__ = [
     "CreateVideoTool",
     "PostToLinkedInTool",
 ]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,15 +1,20 @@
 """
 CarbonTrack AI Agent - LangChain Agent Orchestration
 """
-from typing import Any, Dict, List
-from langchain.agents import AgentExecutor, create_structured_chat_agent
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.tools import BaseTool
-from langchain_community.chat_models import ChatOllama
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from config import settings
+from llm import get_llm
+from pipeline import PromotionPipeline, StageCallback
 import logging
 
+if TYPE_CHECKING:
+    from langchain.agents import AgentExecutor
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.tools import BaseTool
+    from memo import ToolMemo
+    from tracing import TracingCallbackHandler
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,48 +24,70 @@ class CarbonTrackAgent:
     and LinkedIn posting for project promotion.
     """
     
-    def __init__(self, tools: List[BaseTool]):
+    def __init__(self, tools: List["BaseTool"], mode: Optional[str] = None):
         """
         Initialize the CarbonTrack agent.
         
         Args:
             tools: List of LangChain tools (generate_post, create_video, post_to_linkedin)
+            mode: Execution mode ("auto", "pipeline" or "agent"), defaults to settings
         """
         self.tools = tools
-        self.llm = self._initialize_llm()
-        self.agent = self._create_agent()
-        self.agent_executor = AgentExecutor(
-            agent=self.agent,
-            tools=self.tools,
-            verbose=True,
-            handle_parsing_errors=True,
-            max_iterations=5
-        )
-        
+        self.mode = mode or settings.execution_mode
+        self.pipeline = PromotionPipeline(tools)
+        self._agent_executor: Optional["AgentExecutor"] = None
+        # Results of the agent's tool calls in the current run
+        self.tool_memo: Optional["ToolMemo"] = None
+        # Trace of the most recent run when tracing is enabled
+        self.last_trace: Optional["TracingCallbackHandler"] = None
+    
+    @property
+    def agent_executor(self) -> "AgentExecutor":
+        """The structured-chat agent executor, built on first use."""
+        if self._agent_executor is None:
+            # LangChain's agent machinery is slow to import; pipeline runs never need it
+            from langchain.agents import AgentExecutor
+            from memo import MemoizedTool, ToolMemo
+            
+            self.llm = self._initialize_llm()
+            self.agent = self._create_agent()
+            # A retried step (e.g. after a parsing error) reuses the first call's result
+            self.tool_memo = ToolMemo()
+            self._agent_executor = AgentExecutor(
+                agent=self.agent,
+                tools=[MemoizedTool.wrap(tool, self.tool_memo) for tool in self.tools],
+                verbose=True,
+                handle_parsing_errors=True,
+                max_iterations=5
+            )
+        return self._agent_executor
+    
+    def _use_pipeline(self, input_data: Dict[str, Any]) -> bool:
+        """Decide whether a request can run through the direct pipeline."""
+        if self.mode == "agent":
+            return False
+        structured = "request" not in input_data and bool(input_data.get("project_name"))
+        if self.mode == "pipeline":
+            if not structured:
+                raise ValueError("Pipeline mode requires structured project input (project_name, website_url, ...)")
+            if not self.pipeline.available:
+                raise ValueError("Pipeline mode requires the generate_post, create_video and post_to_linkedin tools")
+            return True
+        return structured and self.pipeline.available
+    
     def _initialize_llm(self):
-        """Initialize the LLM based on configuration."""
+        """Get the shared LLM client for the configured provider."""
         if settings.llm_provider == "ollama":
             logger.info(f"Using Ollama with model: {settings.ollama_model}")
-            return ChatOllama(
-                base_url=settings.ollama_base_url,
-                model=settings.ollama_model,
-                temperature=0.7,
-            )
         elif settings.llm_provider == "grok":
             logger.info("Using Grok/xAI")
-            # Grok uses OpenAI-compatible API
-            from langchain_openai import ChatOpenAI
-            return ChatOpenAI(
-                api_key=settings.grok_api_key,
-                base_url="https://api.x.ai/v1",
-                model=settings.grok_model,
-                temperature=0.7,
-            )
-        else:
-            raise ValueError(f"Unsupported LLM provider: {settings.llm_provider}")
+        return get_llm()
     
     def _create_agent(self):
         """Create the LangChain structured chat agent."""
+        from langchain.agents import create_structured_chat_agent
+        from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+        
         # Define the agent prompt
         system_message = """You are CarbonTrack Promoter, an AI agent specialized in promoting projects on LinkedIn.
 
@@ -76,13 +103,50 @@ When given a project to promote, you should:
 
 Be professional, engaging, and highlight the key value propositions of projects.
 Always confirm actions before posting to LinkedIn unless auto_post is enabled.
+
+You have access to the following tools:
+
+{tools}
+
+Use a json blob to specify a tool by providing an action key (tool name) and an action_input key (tool input).
+Valid "action" values: "Final Answer" or {tool_names}
+
+Provide only ONE action per $JSON_BLOB, as shown:
+
+```
+{{
+  "action": $TOOL_NAME,
+  "action_input": $INPUT
+}}
+```
+
+Follow this format:
+
+Question: input question to answer
+Thought: consider previous and subsequent steps
+Action:
+```
+$JSON_BLOB
+```
+Observation: action result
+... (repeat Thought/Action/Observation N times)
+Thought: I know what to respond
+Action:
+```
+{{
+  "action": "Final Answer",
+  "action_input": "Final response to human"
+}}
+```
+
+Always respond with a valid json blob of a single action. Do not call a tool again with the same input once it has succeeded.
 """
 
         prompt = ChatPromptTemplate.from_messages([
             ("system", system_message),
             MessagesPlaceholder(variable_name="chat_history", optional=True),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
+            # The structured chat agent renders its scratchpad as text
+            ("human", "{input}\n\n{agent_scratchpad}"),
         ])
         
         return create_structured_chat_agent(
@@ -91,7 +155,13 @@ Always confirm actions before posting to LinkedIn unless auto_post is enabled.
             prompt=prompt
         )
     
-    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def run(
+        self,
+        input_data: Dict[str, Any],
+        on_stage: Optional[StageCallback] = None,
+        callbacks: Optional[List["BaseCallbackHandler"]] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         Run the agent with the given input.
         
@@ -102,27 +172,87 @@ Always confirm actions before posting to LinkedIn unless auto_post is enabled.
                 - description: Project description
                 - key_features: List of key features
                 - tone: Optional post tone override
+                or a free-form ``request`` string, which is always handled
+                by the LLM agent
+            on_stage: Optional callback receiving each pipeline stage's result
+                as it completes (the LLM agent only reports its final result)
+            callbacks: Optional LangChain callback handlers for the run
+            completed: Stage results of an earlier, interrupted run of the same
+                input; the pipeline skips the stages that succeeded
         
         Returns:
-            Dictionary with results from each step
+            Dictionary with results from each step, plus ``trace_file`` when
+            tracing is enabled; agent runs also report ``tool_calls`` (hits
+            and misses of the per-run tool memo)
         """
         logger.info(f"Starting CarbonTrack agent for project: {input_data.get('project_name')}")
         
+        tracer = self._new_tracer()
+        if tracer is None:
+            return self._execute(input_data, on_stage, callbacks, completed)
+        
+        try:
+            with tracer.trace("carbontrack.run", **self._trace_attributes(input_data)):
+                result = self._execute(input_data, on_stage, [*(callbacks or []), tracer], completed)
+        finally:
+            trace_file = tracer.export()
+        return {**result, "trace_file": str(trace_file)}
+    
+    def _execute(
+        self,
+        input_data: Dict[str, Any],
+        on_stage: Optional[StageCallback],
+        callbacks: Optional[List["BaseCallbackHandler"]],
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        if self._use_pipeline(input_data):
+            return self.pipeline.run(input_data, callbacks=callbacks, on_stage=on_stage, completed=completed)
+        if completed:
+            logger.warning("The LLM agent cannot skip completed stages; running the request again")
+        
         # Format the input for the agent
         formatted_input = self._format_input(input_data)
         
+        agent_executor = self.agent_executor
+        self.tool_memo.clear()
         try:
-            result = self.agent_executor.invoke({
-                "input": formatted_input
-            })
+            result = agent_executor.invoke(
+                {"input": formatted_input},
+                config={"callbacks": callbacks},
+            )
             logger.info("Agent execution completed successfully")
-            return result
+            return self._with_tool_stats(result)
         except Exception as e:
             logger.error(f"Agent execution failed: {e}")
             raise
     
+    def _with_tool_stats(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the run's tool call hit/miss counts to an agent result."""
+        stats = self.tool_memo.stats()
+        if stats["hits"]:
+            logger.info(f"Skipped {stats['hits']} repeated tool call(s) this run")
+        return {**result, "tool_calls": stats}
+    
+    def _new_tracer(self) -> Optional["TracingCallbackHandler"]:
+        """A fresh trace recorder for one run, when tracing is enabled."""
+        if not settings.trace_enabled:
+            return None
+        from tracing import TracingCallbackHandler
+        
+        self.last_trace = TracingCallbackHandler()
+        return self.last_trace
+    
+    def _trace_attributes(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "project_name": input_data.get("project_name"),
+            "execution_mode": "pipeline" if self._use_pipeline(input_data) else "agent",
+        }
+    
     def _format_input(self, input_data: Dict[str, Any]) -> str:
         """Format the input data into a prompt for the agent."""
+        if "request" in input_data:
+            return str(input_data["request"]).strip()
+        
         project_name = input_data.get("project_name", "Unknown Project")
         website_url = input_data.get("website_url", "")
         description = input_data.get("description", "")
@@ -152,29 +282,75 @@ Please proceed with these steps.
 """
         return prompt.strip()
     
-    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def arun(
+        self,
+        input_data: Dict[str, Any],
+        on_stage: Optional[StageCallback] = None,
+        callbacks: Optional[List["BaseCallbackHandler"]] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         Async version of run method.
         
         Args:
             input_data: Same as run()
+            on_stage: Same as run()
+            callbacks: Same as run()
+            completed: Same as run()
         
         Returns:
             Same as run()
         """
-        # For now, just call the sync version
-        # Can be enhanced with proper async support later
-        return self.run(input_data)
+        logger.info(f"Starting CarbonTrack agent for project: {input_data.get('project_name')}")
+        
+        tracer = self._new_tracer()
+        if tracer is None:
+            return await self._aexecute(input_data, on_stage, callbacks, completed)
+        
+        try:
+            with tracer.trace("carbontrack.run", **self._trace_attributes(input_data)):
+                result = await self._aexecute(input_data, on_stage, [*(callbacks or []), tracer], completed)
+        finally:
+            trace_file = tracer.export()
+        return {**result, "trace_file": str(trace_file)}
+    
+    async def _aexecute(
+        self,
+        input_data: Dict[str, Any],
+        on_stage: Optional[StageCallback],
+        callbacks: Optional[List["BaseCallbackHandler"]],
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        if self._use_pipeline(input_data):
+            return await self.pipeline.arun(input_data, callbacks=callbacks, on_stage=on_stage, completed=completed)
+        if completed:
+            logger.warning("The LLM agent cannot skip completed stages; running the request again")
+        
+        formatted_input = self._format_input(input_data)
+        
+        agent_executor = self.agent_executor
+        self.tool_memo.clear()
+        try:
+            result = await agent_executor.ainvoke(
+                {"input": formatted_input},
+                config={"callbacks": callbacks},
+            )
+            logger.info("Agent execution completed successfully")
+            return self._with_tool_stats(result)
+        except Exception as e:
+            logger.error(f"Agent execution failed: {e}")
+            raise
 
 
-def create_carbontrack_agent(tools: List[BaseTool]) -> CarbonTrackAgent:
+def create_carbontrack_agent(tools: List["BaseTool"], mode: Optional[str] = None) -> CarbonTrackAgent:
     """
     Factory function to create a CarbonTrack agent.
     
     Args:
         tools: List of LangChain tools
+        mode: Execution mode ("auto", "pipeline" or "agent"), defaults to settings
     
     Returns:
         Initialized CarbonTrack agent
     """
-    return CarbonTrackAgent(tools)
+    return CarbonTrackAgent(tools, mode=mode)
@@ -0,0 +1,232 @@
+"""
+CarbonTrack AI Agent - Batch Campaign Runner
+
+Runs the CarbonTrack agent over many project inputs with a bounded
+worker pool and collects per-job results plus an aggregate summary.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchJob:
+    """A single project input to promote."""
+    job_id: str
+    source: str
+    input_data: Dict[str, Any]
+
+
+@dataclass
+class BatchJobResult:
+    """Outcome of running the agent for one batch job."""
+    job_id: str
+    source: str
+    project_name: str
+    status: str
+    started_at: str
+    latency_seconds: float
+    output: str = ""
+    error: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class BatchSummary:
+    """Aggregate throughput and latency figures for a batch run."""
+    total: int
+    succeeded: int
+    failed: int
+    workers: int
+    wall_seconds: float
+    throughput_per_minute: float
+    latency_mean: float
+    latency_p50: float
+    latency_p95: float
+    latency_max: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _parse_jsonl(path: Path) -> List[BatchJob]:
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({e})") from e
+            if not isinstance(data, dict):
+                raise ValueError(f"{path}:{line_no}: expected a JSON object")
+            jobs.append(BatchJob(f"{path.stem}:{line_no}", f"{path}:{line_no}", data))
+    return jobs
+
+
+def _parse_json(path: Path) -> List[BatchJob]:
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: invalid JSON ({e})") from e
+    if isinstance(data, dict):
+        return [BatchJob(path.stem, str(path), data)]
+    if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+        return [
+            BatchJob(f"{path.stem}:{index}", f"{path}[{index}]", item)
+            for index, item in enumerate(data)
+        ]
+    raise ValueError(f"{path}: expected a JSON object or a list of objects")
+
+
+def load_batch_inputs(path: str) -> List[BatchJob]:
+    """
+    Load project inputs for a batch run.
+
+    Args:
+        path: A JSONL file (one project per line), a JSON file holding one
+            project or a list of projects, or a directory of such files.
+
+    Returns:
+        List of batch jobs in a stable order
+    """
+    source = Path(path)
+    if not source.exists():
+        raise ValueError(f"Batch input not found: {path}")
+
+    if source.is_dir():
+        files = sorted(
+            p for p in source.iterdir()
+            if p.is_file() and p.suffix in (".json", ".jsonl")
+        )
+    else:
+        files = [source]
+
+    jobs: List[BatchJob] = []
+    for file_path in files:
+        if file_path.suffix == ".jsonl":
+            jobs.extend(_parse_jsonl(file_path))
+        else:
+            jobs.extend(_parse_json(file_path))
+
+    logger.info(f"Loaded {len(jobs)} batch jobs from: {path}")
+    return jobs
+
+
+def summarize_results(
+    results: List[BatchJobResult],
+    workers: int,
+    wall_seconds: float,
+) -> BatchSummary:
+    """Compute aggregate throughput/latency for a list of job results."""
+    latencies = [r.latency_seconds for r in results]
+    succeeded = sum(1 for r in results if r.status == "succeeded")
+    return BatchSummary(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        workers=workers,
+        wall_seconds=round(wall_seconds, 3),
+        throughput_per_minute=round(len(results) / wall_seconds * 60, 2) if wall_seconds > 0 else 0.0,
+        latency_mean=round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        latency_p50=round(_percentile(latencies, 50), 3),
+        latency_p95=round(_percentile(latencies, 95), 3),
+        latency_max=round(max(latencies), 3) if latencies else 0.0,
+    )
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    agent_factory: Callable[[], Any],
+    max_workers: int = 4,
+    on_result: Optional[Callable[[BatchJobResult], None]] = None,
+) -> Tuple[List[BatchJobResult], BatchSummary]:
+    """
+    Run the agent over a list of jobs with a bounded worker pool.
+
+    Each worker thread builds its own agent once via ``agent_factory`` and
+    reuses it for every job it picks up, so the start-up cost is paid per
+    worker rather than per project.
+
+    Args:
+        jobs: Jobs to run
+        agent_factory: Callable returning an object with a ``run(input_data)`` method
+        max_workers: Maximum number of jobs running concurrently
+        on_result: Optional callback invoked as each job finishes
+
+    Returns:
+        Tuple of (results in input order, aggregate summary)
+    """
+    max_workers = max(1, min(max_workers, len(jobs) or 1))
+    local = threading.local()
+
+    def get_agent():
+        if not hasattr(local, "agent"):
+            local.agent = agent_factory()
+        return local.agent
+
+    def run_job(job: BatchJob) -> BatchJobResult:
+        project_name = job.input_data.get("project_name", "Unknown Project")
+        started_at = datetime.now(timezone.utc).isoformat()
+        start = time.perf_counter()
+        try:
+            result = get_agent().run(job.input_data)
+            output = result.get("output", "") if isinstance(result, dict) else str(result)
+            status, error = "succeeded", ""
+        except Exception as e:
+            logger.error(f"Batch job {job.job_id} failed: {e}")
+            output, status, error = "", "failed", str(e)
+        return BatchJobResult(
+            job_id=job.job_id,
+            source=job.source,
+            project_name=project_name,
+            status=status,
+            started_at=started_at,
+            latency_seconds=round(time.perf_counter() - start, 3),
+            output=str(output),
+            error=error,
+        )
+
+    logger.info(f"Running {len(jobs)} batch jobs with {max_workers} workers")
+    results: Dict[int, BatchJobResult] = {}
+    wall_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as pool:
+        futures = {pool.submit(run_job, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            job_result = future.result()
+            results[futures[future]] = job_result
+            if on_result:
+                on_result(job_result)
+
+    wall_seconds = time.perf_counter() - wall_start
+    ordered = [results[index] for index in range(len(jobs))]
+    summary = summarize_results(ordered, max_workers, wall_seconds)
+    logger.info(
+        f"Batch finished: {summary.succeeded}/{summary.total} succeeded "
+        f"in {summary.wall_seconds}s ({summary.throughput_per_minute} jobs/min)"
+    )
+    return ordered, summary
@@ -0,0 +1,152 @@
+"""
+CarbonTrack AI Agent - Generated Post Cache
+
+A small content-addressed SQLite cache for generated posts. Entries are
+keyed on a hash of the rendered prompt plus the provider, model,
+temperature and length limits that produced them, expire after a TTL
+and are evicted in least-recently-used order once the cache grows past
+its size bound.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from config import settings, OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = OUTPUT_DIR / "post_cache.sqlite3"
+
+
+class PostCache:
+    """Persistent, TTL- and size-bounded cache of generated posts."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file, defaults to OUTPUT_DIR/post_cache.sqlite3
+            ttl_seconds: Entry lifetime, defaults to settings.post_cache_ttl_seconds
+            max_entries: Maximum number of entries kept, defaults to settings.post_cache_max_entries
+        """
+        self.path = Path(path or DEFAULT_CACHE_PATH)
+        self.ttl_seconds = settings.post_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.post_cache_max_entries if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS posts (
+                    key TEXT PRIMARY KEY,
+                    post_text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_last_accessed ON posts (last_accessed)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(
+        prompt: str,
+        provider: str,
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        max_length: Optional[int] = None,
+    ) -> str:
+        """Content hash of a rendered prompt and the model and length settings used for it."""
+        payload = json.dumps(
+            {
+                "prompt": prompt,
+                "provider": provider,
+                "model": model,
+                "temperature": float(temperature),
+                "max_tokens": max_tokens,
+                "max_length": max_length,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached post for a key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT post_text, created_at FROM posts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            post_text, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM posts WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE posts SET last_accessed = ? WHERE key = ?", (now, key))
+            return post_text
+
+    def put(self, key: str, post_text: str) -> None:
+        """Store a post and evict the least recently used entries over the bound."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO posts (key, post_text, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, post_text, now, now),
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM posts WHERE created_at < ?", (now - self.ttl_seconds,))
+            if self.max_entries:
+                conn.execute(
+                    """
+                    DELETE FROM posts WHERE key IN (
+                        SELECT key FROM posts ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        """Remove every cached post."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM posts")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+
+_post_cache: Optional[PostCache] = None
+_post_cache_lock = threading.Lock()
+
+
+def get_post_cache() -> PostCache:
+    """Get the process-wide post cache."""
+    global _post_cache
+    with _post_cache_lock:
+        if _post_cache is None:
+            _post_cache = PostCache()
+        return _post_cache
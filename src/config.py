@@ -1,8 +1,13 @@
 """
 CarbonTrack AI Agent - Configuration Management
+
+``settings`` is a lightweight proxy: the environment and ``.env`` are read
+the first time a setting is accessed (or ``get_settings()`` is called), not
+when this module is imported.
 """
+import threading
 from pathlib import Path
-from typing import Literal
+from typing import List, Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -31,6 +36,22 @@ class Settings(BaseSettings):
         default="grok-beta",
         description="Grok model version"
     )
+    grok_base_url: str = Field(
+        default="https://api.x.ai/v1",
+        description="xAI OpenAI-compatible API base URL"
+    )
+    llm_temperature: float = Field(
+        default=0.7,
+        description="Sampling temperature for post generation and the agent"
+    )
+    llm_max_connections: int = Field(
+        default=10,
+        description="Maximum pooled HTTP connections per LLM client"
+    )
+    llm_keepalive_seconds: float = Field(
+        default=30.0,
+        description="How long idle LLM HTTP connections are kept alive"
+    )
     
     # LinkedIn Configuration
     linkedin_access_token: str = Field(
@@ -53,6 +74,42 @@ class Settings(BaseSettings):
         default="",
         description="LinkedIn password (for unofficial API)"
     )
+    linkedin_api_base_url: str = Field(
+        default="https://api.linkedin.com",
+        description="LinkedIn API base URL (override to point at a local stub)"
+    )
+    linkedin_api_version: str = Field(
+        default="202501",
+        description="LinkedIn-Version header (YYYYMM) for the versioned REST API"
+    )
+    linkedin_connect_timeout: float = Field(
+        default=10.0,
+        description="Seconds to wait for a connection to the LinkedIn API"
+    )
+    linkedin_read_timeout: float = Field(
+        default=60.0,
+        description="Seconds to wait for a LinkedIn API response"
+    )
+    linkedin_max_retries: int = Field(
+        default=4,
+        description="Retries for throttled (429) or failed (5xx, network) LinkedIn requests"
+    )
+    linkedin_backoff_base: float = Field(
+        default=1.0,
+        description="First retry delay in seconds, doubled on every retry (with jitter)"
+    )
+    linkedin_backoff_max: float = Field(
+        default=60.0,
+        description="Longest retry delay; a longer Retry-After fails the request instead"
+    )
+    linkedin_upload_workers: int = Field(
+        default=4,
+        description="Video parts uploaded in parallel"
+    )
+    linkedin_video_poll_timeout: float = Field(
+        default=600.0,
+        description="Seconds to wait for LinkedIn to finish processing an uploaded video"
+    )
     
     # CarbonTrack Configuration
     carbontrack_url: str = Field(
@@ -77,6 +134,55 @@ class Settings(BaseSettings):
         default="mp4",
         description="Video output format"
     )
+    video_scroll_speed: float = Field(
+        default=0,
+        description="Scroll speed in pixels per second (0 = fit one pass into the video duration)"
+    )
+    video_scroll_pauses: List[float] = Field(
+        default_factory=list,
+        description="Page positions (fractions 0-1) where scrolling pauses, e.g. [0.3, 0.6]"
+    )
+    video_scroll_pause_ms: int = Field(
+        default=1500,
+        description="Length of each scroll pause in milliseconds"
+    )
+    video_capture_mode: Literal["record_video", "screencast"] = Field(
+        default="record_video",
+        description="How recordings are captured: Playwright record_video (webm, then transcoded) "
+                    "or a DevTools screencast piped straight into ffmpeg"
+    )
+    video_screencast_quality: int = Field(
+        default=80,
+        description="JPEG quality (0-100) of screencast frames"
+    )
+    video_transcoder: Literal["auto", "ffmpeg", "opencv"] = Field(
+        default="auto",
+        description="Transcoder backend for webm conversion (auto prefers ffmpeg)"
+    )
+    ffmpeg_path: str = Field(
+        default="ffmpeg",
+        description="ffmpeg executable name or path"
+    )
+    ffmpeg_preset: str = Field(
+        default="veryfast",
+        description="libx264 preset (ultrafast ... veryslow)"
+    )
+    ffmpeg_crf: int = Field(
+        default=23,
+        description="libx264 constant rate factor (lower is higher quality)"
+    )
+    ffmpeg_threads: int = Field(
+        default=0,
+        description="ffmpeg encoder threads (0 = automatic)"
+    )
+    browser_pool_size: int = Field(
+        default=2,
+        description="Number of long-lived Chromium browsers used for recordings"
+    )
+    browser_max_recordings: int = Field(
+        default=25,
+        description="Recordings per pooled browser before it is relaunched (0 = never)"
+    )
     
     # Agent Behavior
     default_post_tone: Literal["professional", "casual", "enthusiastic", "technical"] = Field(
@@ -91,6 +197,114 @@ class Settings(BaseSettings):
         default=2000,
         description="Maximum character length for posts"
     )
+    llm_max_tokens: int = Field(
+        default=0,
+        description="Generation limit for posts in tokens (0 derives it from max_post_length)"
+    )
+    post_shorten_retries: int = Field(
+        default=1,
+        description="LLM calls allowed to shorten a post that overshoots max_post_length by more than post_shorten_overflow"
+    )
+    post_shorten_overflow: float = Field(
+        default=0.15,
+        description="Overshoot (fraction of max_post_length) above which a post is shortened instead of trimmed"
+    )
+    post_variant_concurrency: int = Field(
+        default=4,
+        description="Concurrent LLM calls when generating a post in several tones"
+    )
+    post_templates_dir: str = Field(
+        default="",
+        description="Directory of <tone>.txt post templates overriding or adding to the built-in ones"
+    )
+    prompt_token_budget: int = Field(
+        default=1024,
+        description="Maximum estimated prompt tokens sent to the LLM for a post (0 disables the check)"
+    )
+    execution_mode: Literal["auto", "pipeline", "agent"] = Field(
+        default="auto",
+        description="auto: direct pipeline for project inputs, LLM agent for free-form requests"
+    )
+    
+    # Post Cache
+    post_cache_enabled: bool = Field(
+        default=True,
+        description="Reuse previously generated posts for identical prompts"
+    )
+    post_cache_ttl_seconds: int = Field(
+        default=7 * 24 * 3600,
+        description="How long cached posts stay valid (0 disables expiry)"
+    )
+    post_cache_max_entries: int = Field(
+        default=1000,
+        description="Maximum number of cached posts before LRU eviction"
+    )
+    
+    # Duplicate Detection
+    dedup_enabled: bool = Field(
+        default=True,
+        description="Refuse to publish posts nearly identical to an already published post"
+    )
+    dedup_threshold: float = Field(
+        default=0.8,
+        description="Estimated Jaccard similarity (0-1) at which a post counts as a duplicate"
+    )
+    
+    # Batch Processing
+    batch_workers: int = Field(
+        default=4,
+        description="Number of projects promoted concurrently in batch mode"
+    )
+    
+    # Job Queue
+    queue_workers: int = Field(
+        default=2,
+        description="Concurrent workers per carbontrack-worker process"
+    )
+    queue_visibility_timeout: int = Field(
+        default=900,
+        description="Seconds a claimed job stays invisible to other workers without a heartbeat"
+    )
+    queue_max_attempts: int = Field(
+        default=3,
+        description="Attempts per job before it is marked failed"
+    )
+    queue_retry_delay: float = Field(
+        default=30.0,
+        description="Delay before a failed job is retried, doubled on each attempt"
+    )
+    queue_poll_interval: float = Field(
+        default=2.0,
+        description="Seconds an idle worker waits before polling the queue again"
+    )
+    
+    # Tracing
+    trace_enabled: bool = Field(
+        default=False,
+        description="Record a span trace of every agent run"
+    )
+    trace_file: str = Field(
+        default="",
+        description="File traces are appended to (default: output/traces/<trace-id>.jsonl)"
+    )
+    trace_format: Literal["jsonl", "otlp"] = Field(
+        default="jsonl",
+        description="jsonl: one span per line; otlp: OpenTelemetry OTLP/JSON, one request per line"
+    )
+    
+    # Metrics
+    metrics_port: int = Field(
+        default=0,
+        description="Port of the Prometheus /metrics endpoint (0 disables it)"
+    )
+    metrics_host: str = Field(
+        default="127.0.0.1",
+        description="Interface the /metrics endpoint binds to"
+    )
+    metrics_file: str = Field(
+        default="",
+        description="File a metrics snapshot is written to when a batch or worker finishes"
+    )
     
     # Logging
     log_level: str = Field(
@@ -108,8 +322,38 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Get the process-wide settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
+
+
+class LazySettings:
+    """Proxy that forwards attribute access to the settings loaded on first use."""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+    def __delattr__(self, name):
+        delattr(get_settings(), name)
+
+    def __repr__(self) -> str:
+        return repr(get_settings())
+
+
 # Global settings instance
-settings = Settings()
+settings = LazySettings()
 
 
 # Project paths
@@ -119,11 +363,8 @@ TOOLS_DIR = SRC_DIR / "tools"
 EXAMPLES_DIR = PROJECT_ROOT / "examples"
 OUTPUT_DIR = PROJECT_ROOT / "output"
 
-# Ensure output directory exists
-OUTPUT_DIR.mkdir(exist_ok=True)
-
 
-# Post generation templates
+# Post generation templates (compacted when loaded, see templates.py)
 POST_TEMPLATES = {
     "professional": """
     Create a professional LinkedIn post about {project_name}.
@@ -191,10 +432,19 @@ POST_TEMPLATES = {
 }
 
 
+# Asks the LLM to rewrite a post that came out far over the length limit
+SHORTEN_TEMPLATE = """
+Shorten this LinkedIn post to under {max_length} characters.
+Keep its tone, key message, call-to-action and hashtags. Reply with the post only.
+
+{post}
+"""
+
+
 def get_post_template(tone: str = None) -> str:
-    """Get the post generation template for a specific tone."""
-    tone = tone or settings.default_post_tone
-    return POST_TEMPLATES.get(tone, POST_TEMPLATES["professional"])
+    """Get the (compacted) post generation template for a specific tone."""
+    from templates import get_template
+    return get_template(tone).text
 
 
 def get_video_dimensions() -> tuple[int, int]:
@@ -0,0 +1,209 @@
+"""
+CarbonTrack AI Agent - Near-Duplicate Post Detection
+
+Every post published to LinkedIn is added to a persistent index so a new
+draft can be checked against the whole posting history before it goes out.
+
+Posts are compared by MinHash: each post is reduced to its set of word
+shingles (overlapping runs of ``SHINGLE_SIZE`` words) and summarised by
+``NUM_PERM`` minimum hash values, one per hash function. The fraction of
+equal values between two signatures estimates the Jaccard similarity of
+their shingle sets. Signatures are stored in SQLite next to the post and
+kept in memory as a NumPy matrix, so a check is one vectorized comparison
+against every past post; posts published since the last check (by this or
+another process) are appended to the matrix instead of reloading it.
+"""
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from config import settings, OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = OUTPUT_DIR / "published_posts.sqlite3"
+
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+# Fixed seed: signatures are stored, so the hash functions must never change
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"[#@]?\w+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Lower-cased word shingles of a text (the whole text if it is shorter than one shingle)."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    MinHash signature of a text.
+
+    Args:
+        text: Post text
+
+    Returns:
+        ``NUM_PERM`` uint32 values; an empty text gives all-max values
+    """
+    pieces = shingles(text)
+    if not pieces:
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(piece.encode("utf-8"), digest_size=4).digest(), "little")
+         for piece in pieces],
+        dtype=np.uint64,
+    ) % _MERSENNE_PRIME
+    # (a * x + b) mod p for every hash function and shingle; a * x < 2**62, so no overflow
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+@dataclass
+class DuplicateMatch:
+    """A previously published post similar to a draft."""
+    post_id: str
+    post_text: str
+    published_at: float
+    similarity: float
+
+    def describe(self) -> str:
+        published = time.strftime("%Y-%m-%d", time.localtime(self.published_at))
+        return (
+            f"Post is a near-duplicate ({self.similarity:.0%} similar) of post "
+            f"{self.post_id or 'unknown'} published on {published}"
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class PostIndex:
+    """Persistent MinHash index of published posts."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: SQLite database file, defaults to OUTPUT_DIR/published_posts.sqlite3
+        """
+        self.path = Path(path or DEFAULT_INDEX_PATH)
+        self._lock = threading.Lock()
+        self._signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._ids: List[int] = []
+        self._last_id = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS published_posts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    post_id TEXT NOT NULL,
+                    post_text TEXT NOT NULL,
+                    published_at REAL NOT NULL,
+                    signature BLOB NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _refresh(self, conn: sqlite3.Connection) -> None:
+        """Append signatures stored since the last refresh to the in-memory matrix."""
+        rows = conn.execute(
+            "SELECT id, signature FROM published_posts WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        if not rows:
+            return
+        new = np.frombuffer(b"".join(signature for _, signature in rows), dtype=np.uint32)
+        self._signatures = np.vstack([self._signatures, new.reshape(len(rows), NUM_PERM)])
+        self._ids.extend(row_id for row_id, _ in rows)
+        self._last_id = rows[-1][0]
+
+    def add(self, post_text: str, post_id: str = "") -> None:
+        """
+        Record a published post.
+
+        Args:
+            post_text: Text of the post
+            post_id: LinkedIn post ID or URN, if known
+        """
+        signature = minhash(post_text)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO published_posts (post_id, post_text, published_at, signature) VALUES (?, ?, ?, ?)",
+                (post_id, post_text, time.time(), signature.tobytes()),
+            )
+            self._refresh(conn)
+        logger.info(f"Added published post {post_id or '(no id)'} to the duplicate index")
+
+    def find_duplicate(self, post_text: str, threshold: Optional[float] = None) -> Optional[DuplicateMatch]:
+        """
+        Find the published post most similar to a draft.
+
+        Args:
+            post_text: Draft post text
+            threshold: Minimum estimated Jaccard similarity, defaults to
+                settings.dedup_threshold
+
+        Returns:
+            The most similar post at or above the threshold, or None
+        """
+        threshold = settings.dedup_threshold if threshold is None else threshold
+        signature = minhash(post_text)
+        with self._lock, self._connect() as conn:
+            self._refresh(conn)
+            if not self._ids:
+                return None
+            similarities = (self._signatures == signature).mean(axis=1)
+            best = int(similarities.argmax())
+            if similarities[best] < threshold:
+                return None
+            post_id, text, published_at = conn.execute(
+                "SELECT post_id, post_text, published_at FROM published_posts WHERE id = ?",
+                (self._ids[best],),
+            ).fetchone()
+        return DuplicateMatch(post_id, text, published_at, round(float(similarities[best]), 3))
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM published_posts").fetchone()[0]
+
+
+_post_index: Optional[PostIndex] = None
+_post_index_lock = threading.Lock()
+
+
+def get_post_index() -> PostIndex:
+    """Get the process-wide index of published posts."""
+    global _post_index
+    with _post_index_lock:
+        if _post_index is None:
+            _post_index = PostIndex()
+        return _post_index
@@ -0,0 +1,341 @@
+"""
+CarbonTrack AI Agent - Durable Job Queue
+
+Promotion jobs are stored in SQLite under OUTPUT_DIR, so they survive
+crashes and restarts and can be shared by any number of worker processes
+on the same machine. A worker claims a job for a visibility timeout and
+extends it with heartbeats; if the worker dies, the job becomes claimable
+again once the timeout passes. Each pipeline stage's result is stored as
+soon as the stage finishes.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import settings, OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = OUTPUT_DIR / "jobs.sqlite3"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, SUCCEEDED, FAILED)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+@dataclass
+class Job:
+    """A queued promotion and its progress."""
+    id: str
+    input_data: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    worker_id: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    stages: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def project_name(self) -> str:
+        return self.input_data.get("project_name", "Unknown Project")
+
+
+class JobQueue:
+    """SQLite-backed job queue with leases, retries and per-stage results."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        visibility_timeout: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            path: SQLite database file, defaults to OUTPUT_DIR/jobs.sqlite3
+            visibility_timeout: Seconds a claim lasts without a heartbeat,
+                defaults to settings.queue_visibility_timeout
+            max_attempts: Default attempts per job, defaults to settings.queue_max_attempts
+            retry_delay: Delay before the first retry (doubled per attempt),
+                defaults to settings.queue_retry_delay
+        """
+        self.path = Path(path or DEFAULT_QUEUE_PATH)
+        self.visibility_timeout = visibility_timeout or settings.queue_visibility_timeout
+        self.max_attempts = max_attempts or settings.queue_max_attempts
+        self.retry_delay = settings.queue_retry_delay if retry_delay is None else retry_delay
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    input TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_expires_at REAL,
+                    worker_id TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, available_at)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_stages (
+                    job_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    result TEXT,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, stage)
+                )
+                """
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run statements in one write transaction and close the connection.
+
+        BEGIN IMMEDIATE takes the write lock up front, so two workers can
+        never select and claim the same job.
+        """
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # -- producing ----------------------------------------------------------
+
+    def enqueue(
+        self,
+        input_data: Dict[str, Any],
+        job_id: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+    ) -> str:
+        """
+        Add a promotion job.
+
+        Args:
+            input_data: Project input (same schema as CarbonTrackAgent.run)
+            job_id: Optional id; enqueueing an existing id is a no-op
+            max_attempts: Attempts before the job fails, defaults to the queue's
+
+        Returns:
+            The job id
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO jobs (id, input, status, max_attempts, available_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, _dumps(input_data), QUEUED, max_attempts or self.max_attempts, now, now, now),
+            )
+        return job_id
+
+    # -- consuming ----------------------------------------------------------
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """
+        Lease the oldest available job to a worker.
+
+        Queued jobs whose retry delay has passed and running jobs whose lease
+        expired (their worker died) are both claimable. Expired jobs that have
+        used up their attempts are marked failed instead.
+
+        Returns:
+            The claimed job, or None if nothing is available
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts
+                """,
+                (FAILED, "Worker lease expired on the final attempt", now, RUNNING, now),
+            )
+            row = conn.execute(
+                """
+                SELECT id FROM jobs
+                WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?)
+                ORDER BY available_at, created_at
+                LIMIT 1
+                """,
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, attempts = attempts + 1, worker_id = ?,
+                    lease_expires_at = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (RUNNING, worker_id, now + self.visibility_timeout, now, row[0]),
+            )
+            return self._load(conn, row[0])
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend a claimed job's lease; False if the worker no longer owns it."""
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+                (now + self.visibility_timeout, now, job_id, worker_id, RUNNING),
+            ).rowcount
+        return updated == 1
+
+    def record_stage(self, job_id: str, stage: str, result: Any) -> None:
+        """Store the result of one pipeline stage as soon as it finishes."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_stages (job_id, stage, result, completed_at) VALUES (?, ?, ?, ?)",
+                (job_id, stage, _dumps(result), time.time()),
+            )
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """Mark a claimed job succeeded; False if the worker had lost the lease."""
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                """
+                UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND worker_id = ? AND status = ?
+                """,
+                (SUCCEEDED, _dumps(result), now, job_id, worker_id, RUNNING),
+            ).rowcount
+        if not updated:
+            logger.warning(f"Job {job_id} was no longer owned by {worker_id}, result discarded")
+        return updated == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Record a failed attempt, re-queueing the job with backoff if attempts remain.
+
+        Returns:
+            The job's new status, or None if the worker had lost the lease
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker_id = ? AND status = ?",
+                (job_id, worker_id, RUNNING),
+            ).fetchone()
+            if row is None:
+                return None
+            attempts, max_attempts = row
+            status = QUEUED if retry and attempts < max_attempts else FAILED
+            delay = self.retry_delay * 2 ** (attempts - 1)
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires_at = NULL,
+                    available_at = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (status, error, now + delay, now, job_id),
+            )
+        return status
+
+    # -- inspection -------------------------------------------------------
+
+    def _load(self, conn: sqlite3.Connection, job_id: str) -> Optional[Job]:
+        row = conn.execute(
+            "SELECT id, input, status, attempts, max_attempts, worker_id, result, error FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        stages = conn.execute(
+            "SELECT stage, result FROM job_stages WHERE job_id = ? ORDER BY completed_at", (job_id,)
+        ).fetchall()
+        return Job(
+            id=row[0],
+            input_data=json.loads(row[1]),
+            status=row[2],
+            attempts=row[3],
+            max_attempts=row[4],
+            worker_id=row[5],
+            result=json.loads(row[6]) if row[6] else None,
+            error=row[7],
+            stages={stage: json.loads(result) for stage, result in stages},
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job with its stage results."""
+        with self._read() as conn:
+            return self._load(conn, job_id)
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Job]:
+        """All jobs, optionally with one status, oldest first."""
+        with self._read() as conn:
+            if status:
+                ids = conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (status,))
+            else:
+                ids = conn.execute("SELECT id FROM jobs ORDER BY created_at")
+            return [self._load(conn, job_id) for (job_id,) in ids.fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._read() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update(dict(rows))
+        return counts
+
+    def pending(self) -> int:
+        """Jobs that are queued or running (including ones waiting for a retry)."""
+        counts = self.counts()
+        return counts[QUEUED] + counts[RUNNING]
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
@@ -0,0 +1,144 @@
+"""
+CarbonTrack AI Agent - Shared LLM Client Registry
+
+Chat model clients are created once per (provider, model, temperature,
+max tokens) and shared by the agent and all tools, so HTTP connections to
+Ollama or xAI are kept alive and reused instead of being re-opened on
+every call.
+"""
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Tuple[str, str, float, Optional[int]], Any] = {}
+# Stand-in clients from register_llm, used whatever max tokens is asked for
+_registered: Dict[Tuple[str, str, float], Any] = {}
+_lock = threading.Lock()
+
+
+def _http_limits():
+    """Connection pool limits shared by every LLM HTTP client."""
+    import httpx
+
+    return httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_connections,
+        keepalive_expiry=settings.llm_keepalive_seconds,
+    )
+
+
+def _create_ollama(model: str, temperature: float, max_tokens: Optional[int]):
+    try:
+        from langchain_ollama import ChatOllama
+    except ImportError:
+        logger.warning("langchain-ollama not installed, using langchain_community ChatOllama without connection pooling")
+        from langchain_community.chat_models import ChatOllama
+        return ChatOllama(
+            base_url=settings.ollama_base_url,
+            model=model,
+            temperature=temperature,
+            num_predict=max_tokens,
+        )
+
+    return ChatOllama(
+        base_url=settings.ollama_base_url,
+        model=model,
+        temperature=temperature,
+        num_predict=max_tokens,
+        client_kwargs={"limits": _http_limits()},
+    )
+
+
+def _create_grok(model: str, temperature: float, max_tokens: Optional[int]):
+    import httpx
+    # Grok uses OpenAI-compatible API
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        api_key=settings.grok_api_key,
+        base_url=settings.grok_base_url,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        http_client=httpx.Client(limits=_http_limits()),
+        http_async_client=httpx.AsyncClient(limits=_http_limits()),
+    )
+
+
+def llm_identity(
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+) -> Tuple[str, str, float]:
+    """Resolve (provider, model, temperature), filling gaps from settings."""
+    provider = provider or settings.llm_provider
+    if provider == "ollama":
+        model = model or settings.ollama_model
+    elif provider == "grok":
+        model = model or settings.grok_model
+    else:
+        raise ValueError(f"Unsupported LLM provider: {provider}")
+    temperature = settings.llm_temperature if temperature is None else temperature
+    return provider, model, float(temperature)
+
+
+def get_llm(
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+):
+    """
+    Get the shared chat model client for a provider/model/temperature.
+
+    Args:
+        provider: LLM provider ("ollama" or "grok"), defaults to settings
+        model: Model name, defaults to the provider's configured model
+        temperature: Sampling temperature, defaults to settings
+        max_tokens: Generation limit (Ollama ``num_predict``, OpenAI
+            ``max_tokens``); None leaves it to the model
+
+    Returns:
+        A LangChain chat model instance shared across the process
+    """
+    identity = llm_identity(provider, model, temperature)
+    provider, model, temperature = identity
+    key = (*identity, max_tokens)
+    with _lock:
+        llm = _registered.get(identity) or _clients.get(key)
+        if llm is None:
+            limit = f", max {max_tokens} tokens" if max_tokens else ""
+            logger.info(f"Creating {provider} client for model: {model}{limit}")
+            if provider == "ollama":
+                llm = _create_ollama(model, temperature, max_tokens)
+            else:
+                llm = _create_grok(model, temperature, max_tokens)
+            _clients[key] = llm
+    return llm
+
+
+def register_llm(
+    client: Any,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+) -> None:
+    """
+    Use ``client`` for a provider/model/temperature instead of creating one.
+
+    Lets benchmarks and tests run the real tools against a stand-in model.
+    """
+    identity = llm_identity(provider, model, temperature)
+    with _lock:
+        _registered[identity] = client
+
+
+def reset_llm_registry() -> None:
+    """Drop all cached and registered clients (used by tests and after settings changes)."""
+    with _lock:
+        _clients.clear()
+        _registered.clear()
@@ -7,34 +7,55 @@ import argparse
 import json
 import logging
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any
+from functools import partial
+from typing import Any, Callable, Dict
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from startup import ImportProfiler
+
+# Installed before the remaining imports so --profile-startup covers them
+_profiler = ImportProfiler.from_argv(sys.argv)
 
 from rich.console import Console
+from rich.live import Live
 from rich.logging import RichHandler
 from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
 from rich import print as rprint
 
-# Add src to path
-sys.path.append(str(Path(__file__).parent))
-
-from config import settings
-from agent import create_carbontrack_agent
-from tools import GeneratePostTool, CreateVideoTool, PostToLinkedInTool
+from config import settings, OUTPUT_DIR
+from batch import load_batch_inputs, run_batch
+from jobqueue import get_job_queue
+from metrics import serve_metrics, write_metrics
 
-# Setup logging
 console = Console()
-logging.basicConfig(
-    level=settings.log_level,
-    format="%(message)s",
-    handlers=[
-        RichHandler(console=console, rich_tracebacks=True),
-        logging.FileHandler(settings.log_file)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+def setup_logging(verbose: bool = False) -> None:
+    """Log to the console and the log file (called at start-up, not on import)."""
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else settings.log_level,
+        format="%(message)s",
+        handlers=[
+            RichHandler(console=console, rich_tracebacks=True),
+            logging.FileHandler(settings.log_file)
+        ]
+    )
+
+
+def checkpoint(label: str) -> None:
+    """Mark a start-up phase in the --profile-startup report."""
+    if _profiler is not None:
+        _profiler.checkpoint(label)
+
+
 def load_input_from_file(file_path: str) -> Dict[str, Any]:
     """Load input data from a JSON file."""
     try:
@@ -76,6 +97,295 @@ def load_input_interactive() -> Dict[str, Any]:
     }
 
 
+class StreamDisplay:
+    """Renders post tokens live in the console as they are generated."""
+    
+    def __init__(self):
+        self.text = ""
+        self.start = None
+        self.first_token_at = None
+        self._live = None
+        self._lock = threading.Lock()
+    
+    def _panel(self) -> Panel:
+        body = Text(self.text) if self.text else "[dim]Waiting for the first token...[/dim]"
+        return Panel(body, title="Post", border_style="cyan")
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self._live = Live(self._panel(), console=console, refresh_per_second=12)
+        self._live.__enter__()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._live.__exit__(*exc_info)
+    
+    def on_token(self, token: str) -> None:
+        """Token callback passed to GeneratePostTool (called from a worker thread)."""
+        with self._lock:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.text += token
+            self._live.update(self._panel())
+    
+    def summary(self) -> str:
+        if self.first_token_at is None:
+            return "No tokens were streamed"
+        return f"First token after {self.first_token_at - self.start:.2f}s"
+
+
+def build_agent(
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+    mode: str = None,
+    on_token: Callable[[str], None] = None,
+):
+    """
+    Create the tools and the CarbonTrack agent that uses them.
+    
+    Args:
+        use_cache: Serve identical post prompts from the post cache
+        refresh_cache: Regenerate posts and overwrite cached entries
+        mode: Execution mode ("auto", "pipeline" or "agent"), defaults to settings
+        on_token: Optional callback receiving post text as it is generated
+    """
+    # Imported here: LangChain and the tool dependencies are the bulk of start-up time
+    from agent import create_carbontrack_agent
+    from tools import GeneratePostTool, CreateVideoTool, PostToLinkedInTool
+    
+    tools = [
+        GeneratePostTool(use_cache=use_cache, refresh_cache=refresh_cache, on_token=on_token),
+        CreateVideoTool(),
+        PostToLinkedInTool()
+    ]
+    return create_carbontrack_agent(tools, mode=mode)
+
+
+def display_batch_summary(summary) -> None:
+    """Render the aggregate batch summary as a table."""
+    table = Table(title="Batch Summary", border_style="green")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right")
+    table.add_row("Jobs", str(summary.total))
+    table.add_row("Succeeded", f"[green]{summary.succeeded}[/green]")
+    table.add_row("Failed", f"[red]{summary.failed}[/red]" if summary.failed else "0")
+    table.add_row("Workers", str(summary.workers))
+    table.add_row("Wall time", f"{summary.wall_seconds:.1f}s")
+    table.add_row("Throughput", f"{summary.throughput_per_minute:.2f} jobs/min")
+    table.add_row("Latency mean", f"{summary.latency_mean:.2f}s")
+    table.add_row("Latency p50", f"{summary.latency_p50:.2f}s")
+    table.add_row("Latency p95", f"{summary.latency_p95:.2f}s")
+    table.add_row("Latency max", f"{summary.latency_max:.2f}s")
+    console.print(table)
+
+
+def display_trace_summary(tracer, trace_file: str) -> None:
+    """Show the duration and key metrics of each traced LLM call, tool and agent iteration."""
+    table = Table(title=f"Trace {tracer.trace_id}")
+    table.add_column("Span", style="cyan")
+    table.add_column("Kind")
+    table.add_column("Duration", justify="right")
+    table.add_column("Details")
+    
+    details = {
+        "llm.prompt_tokens": "prompt tokens",
+        "llm.completion_tokens": "completion tokens",
+        "llm.first_token_ms": "first token ms",
+        "media_upload.bytes": "bytes uploaded",
+        "video_encode.frames": "frames encoded",
+    }
+    for row in tracer.summary():
+        attributes = row["attributes"]
+        text = ", ".join(
+            f"{label}: {attributes[key]:,.0f}" for key, label in details.items() if key in attributes
+        )
+        status = "" if row["status"] == "ok" else " [red](error)[/red]"
+        table.add_row(row["name"] + status, row["kind"], f"{row['duration_ms'] / 1000:.2f}s", text)
+    
+    console.print(table)
+    console.print(f"[cyan]Trace written to {trace_file}[/cyan]")
+
+
+def run_batch_mode(
+    batch_path: str,
+    workers: int,
+    output_path: str = None,
+    agent_factory: Callable[[], Any] = build_agent,
+) -> int:
+    """
+    Promote every project in a batch input with a bounded worker pool.
+    
+    Args:
+        batch_path: JSONL file, JSON file or directory of project inputs
+        workers: Number of concurrent workers
+        output_path: Where to write per-job result records (JSONL)
+        agent_factory: Callable creating one agent per worker
+    
+    Returns:
+        Process exit code (non-zero if any job failed)
+    """
+    try:
+        jobs = load_batch_inputs(batch_path)
+    except ValueError as e:
+        logger.error(f"Error loading batch input: {e}")
+        return 1
+    
+    if not jobs:
+        console.print("[yellow]Batch input contains no projects.[/yellow]")
+        return 0
+    
+    if output_path:
+        results_path = Path(output_path)
+    else:
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        results_path = OUTPUT_DIR / f"batch-{timestamp}.jsonl"
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    console.print(f"\n[bold green]Running batch of {len(jobs)} projects with {workers} workers...[/bold green]\n")
+    
+    metrics_server = serve_metrics(settings.metrics_port, settings.metrics_host) if settings.metrics_port else None
+    
+    write_lock = threading.Lock()
+    with open(results_path, "w", encoding="utf-8") as results_file:
+        def record_result(job_result):
+            with write_lock:
+                results_file.write(json.dumps(job_result.to_dict()) + "\n")
+                results_file.flush()
+            status = "[green]✔[/green]" if job_result.status == "succeeded" else "[red]✘[/red]"
+            console.print(
+                f"{status} {job_result.project_name} "
+                f"({job_result.job_id}, {job_result.latency_seconds:.1f}s)"
+            )
+        
+        _, summary = run_batch(jobs, agent_factory, max_workers=workers, on_result=record_result)
+        results_file.write(json.dumps({"summary": summary.to_dict()}) + "\n")
+    
+    display_batch_summary(summary)
+    console.print(f"[cyan]Per-job results written to:[/cyan] {results_path}")
+    if settings.metrics_file:
+        console.print(f"[cyan]Metrics written to:[/cyan] {write_metrics(settings.metrics_file)}")
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    return 1 if summary.failed else 0
+
+
+def enqueue_mode(input_data: Dict[str, Any] = None, batch_path: str = None) -> int:
+    """
+    Add projects to the durable job queue for workers to promote.
+    
+    Args:
+        input_data: A single project input
+        batch_path: JSONL file, JSON file or directory of project inputs
+    
+    Returns:
+        Process exit code
+    """
+    if batch_path:
+        try:
+            inputs = [job.input_data for job in load_batch_inputs(batch_path)]
+        except ValueError as e:
+            logger.error(f"Error loading batch input: {e}")
+            return 1
+    else:
+        inputs = [input_data]
+    
+    queue = get_job_queue()
+    for data in inputs:
+        job_id = queue.enqueue(data)
+        console.print(f"[green]Queued[/green] {data.get('project_name', 'Unknown Project')} as job {job_id}")
+    console.print(f"[cyan]{len(inputs)} job(s) queued in:[/cyan] {queue.path}")
+    console.print("[cyan]Run them with:[/cyan] python src/worker.py")
+    return 0
+
+
+def import_published_mode(path: str) -> int:
+    """
+    Add already published posts to the duplicate index.
+    
+    Args:
+        path: JSONL file with a "post_text" (and optional "post_id") per line
+    
+    Returns:
+        Process exit code
+    """
+    from dedup import get_post_index
+    
+    index = get_post_index()
+    imported = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("post_text"):
+                logger.error(f"{path}:{line_number}: missing post_text")
+                return 1
+            index.add(record["post_text"], str(record.get("post_id", "")))
+            imported += 1
+    console.print(f"[green]Imported {imported} published posts[/green] ({len(index)} indexed in {index.path})")
+    return 0
+
+
+def variants_mode(
+    input_data: Dict[str, Any],
+    tones: str,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+) -> int:
+    """
+    Generate the post in several tones at once and show them side by side.
+    
+    Nothing is recorded or posted; pick a tone and run again with it.
+    
+    Args:
+        input_data: Project input
+        tones: Comma-separated tones, or "all" for every template
+        use_cache: Serve identical post prompts from the post cache
+        refresh_cache: Regenerate and overwrite cached posts
+    
+    Returns:
+        Process exit code (non-zero if every variant failed)
+    """
+    from tools.generate_post import GeneratePostTool
+    
+    features = input_data.get("key_features", [])
+    if isinstance(features, list):
+        features = ", ".join(features)
+    requested = None if tones == "all" else [tone.strip() for tone in tones.split(",") if tone.strip()]
+    
+    console.print("\n[bold green]Generating post variants...[/bold green]\n")
+    start = time.perf_counter()
+    variants = GeneratePostTool(use_cache=use_cache, refresh_cache=refresh_cache).generate_variants(
+        project_name=input_data.get("project_name", ""),
+        description=input_data.get("description", ""),
+        website_url=input_data.get("website_url", ""),
+        key_features=features,
+        tones=requested,
+    )
+    wall_seconds = time.perf_counter() - start
+    
+    table = Table(title="Post Variants", border_style="green")
+    table.add_column("Tone", style="cyan")
+    table.add_column("Length", justify="right")
+    table.add_column("Latency", justify="right")
+    table.add_column("Source")
+    for variant in variants:
+        if variant.error:
+            console.print(Panel(f"[red]{variant.error}[/red]", title=variant.tone, border_style="red"))
+            table.add_row(variant.tone, "-", "-", "[red]failed[/red]")
+            continue
+        console.print(Panel(variant.text, title=variant.tone, border_style="green"))
+        table.add_row(
+            variant.tone,
+            str(len(variant.text)),
+            f"{variant.latency_seconds:.2f}s",
+            "cache" if variant.cached else "llm",
+        )
+    console.print(table)
+    console.print(f"[cyan]{len(variants)} variants in {wall_seconds:.1f}s[/cyan]")
+    return 0 if any(not variant.error for variant in variants) else 1
+
+
 def display_welcome():
     """Display welcome message."""
     welcome_text = """
@@ -100,6 +410,7 @@ Auto-post: [cyan]{auto_post}[/cyan]
 
 def main():
     """Main entry point for the CarbonTrack agent."""
+    checkpoint("modules imported")
     parser = argparse.ArgumentParser(
         description="CarbonTrack Promoter - AI Agent for LinkedIn Promotion"
     )
@@ -114,6 +425,97 @@ def main():
         action="store_true",
         help="Run in interactive mode (prompt for input)"
     )
+    parser.add_argument(
+        "--batch",
+        "-b",
+        type=str,
+        help="Path to a JSONL file, JSON file or directory of project inputs to promote in one run"
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help=f"Number of concurrent workers in batch mode (default: {settings.batch_workers})"
+    )
+    parser.add_argument(
+        "--batch-output",
+        type=str,
+        help="Path of the JSONL file receiving per-job batch results"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "pipeline", "agent"],
+        default=None,
+        help=f"Execution mode: direct pipeline or LLM agent (default: {settings.execution_mode})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the generated post cache"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Regenerate posts even when cached, replacing the cached entry"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Show the post live as it is generated (single project runs)"
+    )
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Add the --input or --batch projects to the job queue instead of running them"
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="Record a span trace of each run (to FILE, default: output/traces/<trace-id>.jsonl)"
+    )
+    parser.add_argument(
+        "--trace-format",
+        choices=["jsonl", "otlp"],
+        help=f"Trace file format (default: {settings.trace_format})"
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        metavar="RUN_ID",
+        help="Resume a failed run from its manifest in output/runs/, skipping the stages that completed"
+    )
+    parser.add_argument(
+        "--import-published",
+        type=str,
+        metavar="FILE",
+        help="Add past posts (JSONL with post_text and optional post_id) to the duplicate index and exit"
+    )
+    parser.add_argument(
+        "--variants",
+        nargs="?",
+        const="all",
+        metavar="TONES",
+        help="Generate the post in several tones (comma-separated, default: all) "
+             "with concurrent LLM calls and show them side by side, without posting"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this port at /metrics during batch runs"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Write a Prometheus metrics snapshot to this file when a batch finishes"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import and start-up timings on exit"
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -122,16 +524,66 @@ def main():
     )
     
     args = parser.parse_args()
+    checkpoint("arguments parsed")
     
-    # Set logging level
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
+    setup_logging(args.verbose)
+    
+    if args.trace is not None:
+        settings.trace_enabled = True
+        if args.trace:
+            settings.trace_file = args.trace
+    if args.trace_format:
+        settings.trace_format = args.trace_format
+    if args.metrics_port is not None:
+        settings.metrics_port = args.metrics_port
+    if args.metrics_file:
+        settings.metrics_file = args.metrics_file
     
     # Display welcome message
     display_welcome()
     
+    agent_factory = partial(
+        build_agent,
+        use_cache=not args.no_cache,
+        refresh_cache=args.refresh,
+        mode=args.mode,
+    )
+    
+    if args.import_published:
+        sys.exit(import_published_mode(args.import_published))
+    
+    if args.enqueue:
+        if not (args.batch or args.input):
+            parser.error("--enqueue requires --input or --batch")
+        input_data = load_input_from_file(args.input) if args.input else None
+        sys.exit(enqueue_mode(input_data, args.batch))
+    
+    if args.batch:
+        workers = args.workers or settings.batch_workers
+        try:
+            sys.exit(run_batch_mode(args.batch, workers, args.batch_output, agent_factory))
+        except KeyboardInterrupt:
+            console.print("\n\n[yellow]Batch cancelled by user.[/yellow]")
+            sys.exit(130)
+    
     # Load input data
-    if args.input:
+    manifest = None
+    if args.resume:
+        from runs import RunManifest
+        
+        try:
+            manifest = RunManifest.load(args.resume)
+        except ValueError as e:
+            parser.error(str(e))
+        if manifest.status == "succeeded":
+            console.print(f"[yellow]Run {manifest.run_id} already succeeded; nothing to resume.[/yellow]")
+            sys.exit(0)
+        input_data = manifest.input_data
+        console.print(
+            f"\n[cyan]Resuming run {manifest.run_id}; completed stages: "
+            f"{', '.join(manifest.completed_stages()) or 'none'}[/cyan]\n"
+        )
+    elif args.input:
         input_data = load_input_from_file(args.input)
     elif args.interactive:
         input_data = load_input_interactive()
@@ -150,22 +602,39 @@ def main():
             "tone": "professional"
         }
     
+    if args.variants:
+        sys.exit(variants_mode(input_data, args.variants, not args.no_cache, args.refresh))
+    
     try:
-        # Initialize tools
+        # Initialize tools and create agent
         console.print("\n[cyan]Initializing tools...[/cyan]")
-        tools = [
-            GeneratePostTool(),
-            CreateVideoTool(),
-            PostToLinkedInTool()
-        ]
-        
-        # Create agent
         console.print("[cyan]Creating CarbonTrack agent...[/cyan]")
-        agent = create_carbontrack_agent(tools)
+        display = StreamDisplay() if args.stream else None
+        agent = agent_factory(on_token=display.on_token) if display else agent_factory()
+        checkpoint("agent created")
+        
+        # Record each stage in the run's manifest so a failed run can be resumed
+        from runs import RunManifest
+        
+        if manifest is None:
+            manifest = RunManifest.create(input_data)
+        else:
+            manifest.resume()
+        run_kwargs = {
+            "on_stage": manifest.record_stage,
+            "callbacks": [manifest.callback_handler()],
+            "completed": manifest.completed_stages(),
+        }
         
         # Run agent
         console.print("\n[bold green]Running agent...[/bold green]\n")
-        result = agent.run(input_data)
+        if display:
+            with display:
+                result = agent.run(input_data, **run_kwargs)
+            console.print(f"[cyan]{display.summary()}[/cyan]")
+        else:
+            result = agent.run(input_data, **run_kwargs)
+        manifest.finish(result)
         
         # Display results
         console.print("\n[bold green]✅ Agent execution completed![/bold green]\n")
@@ -174,13 +643,28 @@ def main():
             title="Results",
             border_style="green"
         ))
+        tool_calls = result.get("tool_calls")
+        if tool_calls and tool_calls["hits"]:
+            console.print(
+                f"[cyan]Reused {tool_calls['hits']} repeated tool call(s); "
+                f"{tool_calls['misses']} executed[/cyan]"
+            )
+        if agent.last_trace is not None:
+            display_trace_summary(agent.last_trace, result.get("trace_file"))
+        console.print(f"[cyan]Run manifest:[/cyan] {manifest.path}")
         
     except KeyboardInterrupt:
         console.print("\n\n[yellow]Operation cancelled by user.[/yellow]")
+        if manifest is not None:
+            manifest.fail("cancelled")
+            console.print(f"[cyan]Resume with:[/cyan] python src/main.py --resume {manifest.run_id}")
         sys.exit(0)
     except Exception as e:
         logger.exception("Error running agent")
         console.print(f"\n[bold red]❌ Error: {e}[/bold red]\n")
+        if manifest is not None:
+            manifest.fail(str(e))
+            console.print(f"[cyan]Resume with:[/cyan] python src/main.py --resume {manifest.run_id}")
         sys.exit(1)
 
 
@@ -0,0 +1,164 @@
+"""
+CarbonTrack AI Agent - Per-Run Tool Memoization
+
+The LLM agent can call a tool again with the same arguments, typically
+after an output parsing error makes it retry a step it already completed.
+Wrapping the agent's tools in ``MemoizedTool`` makes every distinct call
+run at most once per agent run: a repeated call returns the first result
+instead of recording the video or generating the post again.
+
+Calls are keyed on the tool name and its arguments after validation
+against the tool's input schema (so omitted defaults and surrounding
+whitespace do not make two calls differ). Failed calls, whether they
+raise or return an ``Error...`` string, are not memoized, so a retry
+really retries.
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+
+from metrics import TOOL_MEMO_LOOKUPS
+from pipeline import is_tool_error
+
+logger = logging.getLogger(__name__)
+
+
+class ToolMemo:
+    """Results of the tool calls made during one agent run."""
+
+    def __init__(self):
+        self._results: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._async_locks: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Stable key of a tool call."""
+        return json.dumps({"tool": tool_name, "args": arguments}, sort_keys=True, default=str)
+
+    def clear(self) -> None:
+        """Forget every result and count, at the start of a new run."""
+        with self._lock:
+            self._results.clear()
+            self._locks.clear()
+            self._async_locks.clear()
+            self._counts.clear()
+
+    def _count(self, tool_name: str, hit: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(tool_name, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+        TOOL_MEMO_LOOKUPS.inc(tool=tool_name, result="hit" if hit else "miss")
+
+    def _lookup(self, key: str, tool_name: str) -> Tuple[bool, Any]:
+        with self._lock:
+            found = key in self._results
+            result = self._results.get(key)
+        if found:
+            self._count(tool_name, hit=True)
+            logger.info(f"Reusing the result of an identical earlier {tool_name} call")
+        return found, result
+
+    def _store(self, key: str, tool_name: str, result: Any) -> Any:
+        self._count(tool_name, hit=False)
+        if not is_tool_error(result):
+            with self._lock:
+                self._results[key] = result
+        return result
+
+    def call(self, tool_name: str, arguments: Dict[str, Any], func: Callable[[], Any]) -> Any:
+        """
+        Run a tool call unless an identical one already succeeded in this run.
+
+        Concurrent identical calls wait for the first one instead of running
+        alongside it.
+
+        Args:
+            tool_name: Name of the tool
+            arguments: Normalized call arguments
+            func: Runs the tool
+
+        Returns:
+            The tool result
+        """
+        key = self.make_key(tool_name, arguments)
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            found, result = self._lookup(key, tool_name)
+            if found:
+                return result
+            return self._store(key, tool_name, func())
+
+    async def acall(self, tool_name: str, arguments: Dict[str, Any], func: Callable[[], Awaitable[Any]]) -> Any:
+        """Async version of call."""
+        key = self.make_key(tool_name, arguments)
+        with self._lock:
+            key_lock = self._async_locks.setdefault(key, asyncio.Lock())
+        async with key_lock:
+            found, result = self._lookup(key, tool_name)
+            if found:
+                return result
+            return self._store(key, tool_name, await func())
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts, in total and per tool."""
+        with self._lock:
+            by_tool = {name: dict(counts) for name, counts in self._counts.items()}
+        return {
+            "hits": sum(counts["hits"] for counts in by_tool.values()),
+            "misses": sum(counts["misses"] for counts in by_tool.values()),
+            "by_tool": by_tool,
+        }
+
+
+class MemoizedTool(BaseTool):
+    """A tool whose identical calls within one run execute only once."""
+
+    tool: BaseTool
+    memo: ToolMemo
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, memo: ToolMemo) -> "MemoizedTool":
+        """Wrap a tool, keeping its name, description and input schema."""
+        return cls(
+            tool=tool,
+            memo=memo,
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+        )
+
+    def _normalize(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Call arguments with schema defaults filled in and strings stripped."""
+        schema = self.tool.args_schema
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            kwargs = schema(**kwargs).model_dump()
+        return {
+            name: value.strip() if isinstance(value, str) else value
+            for name, value in kwargs.items()
+        }
+
+    def _run(self, run_manager: Optional[CallbackManagerForToolRun] = None, **kwargs) -> Any:
+        return self.memo.call(
+            self.name,
+            self._normalize(kwargs),
+            lambda: self.tool._run(**kwargs, run_manager=run_manager),
+        )
+
+    async def _arun(self, run_manager: Optional[AsyncCallbackManagerForToolRun] = None, **kwargs) -> Any:
+        return await self.memo.acall(
+            self.name,
+            self._normalize(kwargs),
+            lambda: self.tool._arun(**kwargs, run_manager=run_manager),
+        )
@@ -0,0 +1,384 @@
+"""
+CarbonTrack AI Agent - Metrics
+
+An in-process registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format. Recording is always on (an update is a
+dict write under a lock); exposing the values is optional: ``serve_metrics``
+starts a local ``/metrics`` endpoint for long-running workers, and
+``write_metrics`` dumps a snapshot to a file, e.g. at the end of a batch.
+
+The metrics the tools record are defined at the bottom of this module.
+"""
+import logging
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def samples(self) -> List[str]:
+        """Sample lines in the text exposition format."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    """A value that only goes up (e.g. posts generated)."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Metric):
+    """A value that goes up and down, set directly or read from a function at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], Dict[LabelValues, float]]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_function(self, function: Optional[Callable[[], Dict[LabelValues, float]]]) -> None:
+        """
+        Compute the gauge when it is rendered instead of storing values.
+
+        Args:
+            function: Returns {label values: value}; ``{(): value}`` for a
+                gauge without labels. None removes it again.
+        """
+        with self._lock:
+            self._function = function
+
+    def value(self, **labels: Any) -> float:
+        return dict(self._current()).get(self._key(labels), 0.0)
+
+    def _current(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            function = self._function
+            values = dict(self._values)
+        if function is not None:
+            try:
+                values = {tuple(str(part) for part in key): value for key, value in function().items()}
+            except Exception as e:
+                logger.warning(f"Could not compute {self.name}: {e}")
+        return sorted(values.items())
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in self._current()]
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (per-bucket counts, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def snapshot(self, **labels: Any) -> Dict[str, float]:
+        """Count and sum of the observations for a label set."""
+        with self._lock:
+            counts, total = self._values.get(self._key(labels)) or ([0], 0.0)
+            return {"count": sum(counts), "sum": total}
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = self._labels(key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """A set of metrics, rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered as a different {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> Path:
+        """
+        Write a snapshot of all metrics to a file (replaced atomically).
+
+        Args:
+            path: Output file, e.g. ``output/metrics.prom``
+
+        Returns:
+            The path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staged = path.with_name(f".{path.name}.tmp")
+        staged.write_text(self.render(), encoding="utf-8")
+        os.replace(staged, path)
+        return path
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve ``/metrics`` from a daemon thread.
+
+        Args:
+            port: Port to listen on (0 picks a free port)
+            host: Interface to bind, local only by default
+
+        Returns:
+            The running server; call ``shutdown()`` to stop it
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"metrics: {format % args}")
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+REGISTRY = MetricsRegistry()
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve the shared registry on ``/metrics`` (see MetricsRegistry.serve)."""
+    return REGISTRY.serve(port, host)
+
+
+def write_metrics(path: Path) -> Path:
+    """Dump the shared registry to a file (see MetricsRegistry.write)."""
+    return REGISTRY.write(path)
+
+
+POSTS_GENERATED = REGISTRY.counter(
+    "carbontrack_posts_generated_total",
+    "Posts returned by generate_post, by source (llm or cache)",
+    ["source"],
+)
+PROMPT_TOKENS = REGISTRY.histogram(
+    "carbontrack_prompt_tokens",
+    "Estimated tokens of each rendered post prompt",
+    ["template"],
+    buckets=(64, 128, 256, 384, 512, 768, 1024, 2048),
+)
+LLM_LATENCY = REGISTRY.histogram(
+    "carbontrack_llm_latency_seconds",
+    "Time for the LLM to produce a complete post",
+    ["provider"],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120),
+)
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "carbontrack_llm_time_to_first_token_seconds",
+    "Time until the first streamed token of a post",
+    ["provider"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+LLM_WASTED_TOKENS = REGISTRY.counter(
+    "carbontrack_llm_wasted_tokens_total",
+    "Estimated generated tokens thrown away to fit max_post_length (trimmed text or a shortened draft)",
+    ["reason"],
+)
+POST_LENGTH_FIXES = REGISTRY.counter(
+    "carbontrack_post_length_fixes_total",
+    "Posts that stopped at the token limit, were trimmed or were shortened by the LLM",
+    ["action"],
+)
+DUPLICATE_POSTS = REGISTRY.counter(
+    "carbontrack_duplicate_posts_total",
+    "Drafts not published because they nearly duplicate an already published post",
+)
+RECORDING_DURATION = REGISTRY.histogram(
+    "carbontrack_recording_seconds",
+    "Wall time to record a demo video, including page load",
+    ["capture_mode"],
+    buckets=(5, 10, 20, 30, 45, 60, 90, 120, 180, 300),
+)
+TRANSCODE_SPEED = REGISTRY.histogram(
+    "carbontrack_transcode_speed_ratio",
+    "Video encode speed as a multiple of realtime",
+    ["backend"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32),
+)
+UPLOAD_BYTES = REGISTRY.counter(
+    "carbontrack_upload_bytes_total",
+    "Media bytes uploaded to LinkedIn",
+)
+UPLOAD_THROUGHPUT = REGISTRY.histogram(
+    "carbontrack_upload_bytes_per_second",
+    "Throughput of each media upload",
+    buckets=(1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8),
+)
+LINKEDIN_RESPONSES = REGISTRY.counter(
+    "carbontrack_linkedin_responses_total",
+    "LinkedIn API responses (every attempt, including retried ones) by status class",
+    ["status"],
+)
+TOOL_MEMO_LOOKUPS = REGISTRY.counter(
+    "carbontrack_tool_memo_lookups_total",
+    "Agent tool calls served from the per-run memo (hit) or executed (miss)",
+    ["tool", "result"],
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "carbontrack_stage_duration_seconds",
+    "Duration of each pipeline stage",
+    ["stage"],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300),
+)
+JOBS_PROCESSED = REGISTRY.counter(
+    "carbontrack_jobs_processed_total",
+    "Queue jobs run by this process, by resulting status",
+    ["status"],
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "carbontrack_queue_jobs",
+    "Jobs in the queue by status",
+    ["status"],
+)
@@ -0,0 +1,279 @@
+"""
+CarbonTrack AI Agent - Direct Promotion Pipeline
+
+Runs the fixed generate_post -> create_video -> post_to_linkedin recipe
+by calling the tools directly instead of asking the LLM to plan each step.
+Post generation and video recording are independent, so they run
+concurrently; publishing waits for both.
+"""
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from config import settings
+from metrics import STAGE_DURATION
+
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_TOOLS = ("generate_post", "create_video", "post_to_linkedin")
+
+# Called with (stage name, tool result) as soon as each stage finishes
+StageCallback = Callable[[str, Any], None]
+
+
+def is_tool_error(result: Any) -> bool:
+    """Tools report failures as strings starting with 'Error'."""
+    return isinstance(result, str) and result.strip().startswith("Error")
+
+
+def slugify(name: str) -> str:
+    """Turn a project name into a safe file name stem."""
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    return slug or "demo"
+
+
+class PromotionPipeline:
+    """Deterministic, planner-free execution of the promotion recipe."""
+
+    def __init__(self, tools: List["BaseTool"]):
+        """
+        Initialize the pipeline.
+
+        Args:
+            tools: Tools providing generate_post, create_video and post_to_linkedin
+        """
+        self.tools = {tool.name: tool for tool in tools}
+
+    @property
+    def available(self) -> bool:
+        """Whether all three pipeline tools are present."""
+        return all(name in self.tools for name in PIPELINE_TOOLS)
+
+    def _post_args(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        key_features = input_data.get("key_features", [])
+        if isinstance(key_features, (list, tuple)):
+            key_features = ", ".join(str(feature) for feature in key_features)
+        return {
+            "project_name": input_data.get("project_name", "Unknown Project"),
+            "description": input_data.get("description", ""),
+            "website_url": input_data.get("website_url", ""),
+            "key_features": key_features,
+            "tone": input_data.get("tone") or settings.default_post_tone,
+        }
+
+    def _video_args(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "website_url": input_data.get("website_url", ""),
+            "duration": input_data.get("video_duration", settings.video_duration),
+            "output_filename": slugify(input_data.get("project_name", "")),
+        }
+
+    def _reusable_stages(self, completed: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Successful stage results from an earlier attempt that can be used as they are."""
+        stages = {
+            name: result for name, result in (completed or {}).items()
+            if name in PIPELINE_TOOLS and not is_tool_error(result)
+        }
+        video_path = stages.get("create_video")
+        if video_path and not Path(video_path).exists():
+            logger.warning(f"Recorded video {video_path} no longer exists, recording it again")
+            del stages["create_video"]
+        if stages:
+            logger.info(f"Reusing completed stages: {', '.join(stages)}")
+        return stages
+
+    def _invoke(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        timings: Dict[str, float],
+        callbacks: Optional[list] = None,
+        on_stage: Optional[StageCallback] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if completed and name in completed:
+            timings[name] = 0.0
+            return completed[name]
+        start = time.perf_counter()
+        try:
+            result = self.tools[name].invoke(args, config={"callbacks": callbacks})
+        finally:
+            timings[name] = round(time.perf_counter() - start, 3)
+            STAGE_DURATION.observe(timings[name], stage=name)
+        if on_stage is not None:
+            on_stage(name, result)
+        return result
+
+    async def _ainvoke(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        timings: Dict[str, float],
+        callbacks: Optional[list] = None,
+        on_stage: Optional[StageCallback] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if completed and name in completed:
+            timings[name] = 0.0
+            return completed[name]
+        start = time.perf_counter()
+        try:
+            result = await self.tools[name].ainvoke(args, config={"callbacks": callbacks})
+        finally:
+            timings[name] = round(time.perf_counter() - start, 3)
+            STAGE_DURATION.observe(timings[name], stage=name)
+        if on_stage is not None:
+            on_stage(name, result)
+        return result
+
+    def run(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        on_stage: Optional[StageCallback] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the promotion recipe for a project.
+
+        Args:
+            input_data: Project information (same schema as CarbonTrackAgent.run)
+            callbacks: Optional LangChain callback handlers passed to every tool
+            on_stage: Optional callback receiving each stage's result as it completes
+            completed: Stage results of an earlier, interrupted attempt; stages
+                that succeeded are not run again (and not reported to on_stage)
+
+        Returns:
+            Dictionary with the generated post, video path, LinkedIn result,
+            per-stage timings and a human-readable ``output`` summary
+
+        Raises:
+            RuntimeError: If post generation or publishing fails
+        """
+        project_name = input_data.get("project_name", "Unknown Project")
+        logger.info(f"Running direct pipeline for project: {project_name}")
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        post_args = self._post_args(input_data)
+        video_args = self._video_args(input_data)
+        record_video = bool(video_args["website_url"])
+        completed = self._reusable_stages(completed)
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline") as pool:
+            post_future = pool.submit(
+                self._invoke, "generate_post", post_args, timings, callbacks, on_stage, completed
+            )
+            video_future = (
+                pool.submit(self._invoke, "create_video", video_args, timings, callbacks, on_stage, completed)
+                if record_video else None
+            )
+            post_text = post_future.result()
+            video_result = video_future.result() if video_future else ""
+
+        video_path = self._check_stages(post_text, video_result)
+        linkedin_result = self._invoke(
+            "post_to_linkedin",
+            {"post_text": post_text, "video_path": video_path},
+            timings,
+            callbacks,
+            on_stage,
+            completed,
+        )
+        return self._build_result(input_data, post_text, video_result, linkedin_result, timings, start)
+
+    async def arun(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        on_stage: Optional[StageCallback] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Async version of run: the tools are awaited on the running event loop.
+
+        Args:
+            input_data: Same as run()
+            callbacks: Same as run()
+            on_stage: Same as run()
+            completed: Same as run()
+
+        Returns:
+            Same as run()
+        """
+        project_name = input_data.get("project_name", "Unknown Project")
+        logger.info(f"Running direct pipeline for project: {project_name}")
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        post_args = self._post_args(input_data)
+        video_args = self._video_args(input_data)
+        completed = self._reusable_stages(completed)
+
+        async def no_video() -> str:
+            return ""
+
+        post_text, video_result = await asyncio.gather(
+            self._ainvoke("generate_post", post_args, timings, callbacks, on_stage, completed),
+            self._ainvoke("create_video", video_args, timings, callbacks, on_stage, completed)
+            if video_args["website_url"] else no_video(),
+        )
+
+        video_path = self._check_stages(post_text, video_result)
+        linkedin_result = await self._ainvoke(
+            "post_to_linkedin",
+            {"post_text": post_text, "video_path": video_path},
+            timings,
+            callbacks,
+            on_stage,
+            completed,
+        )
+        return self._build_result(input_data, post_text, video_result, linkedin_result, timings, start)
+
+    def _check_stages(self, post_text: Any, video_result: Any) -> str:
+        """Fail on post errors; return the usable video path (or '')."""
+        if is_tool_error(post_text):
+            raise RuntimeError(post_text)
+        if is_tool_error(video_result):
+            logger.warning(f"Video step failed, continuing without video: {video_result}")
+            return ""
+        return video_result
+
+    def _build_result(
+        self,
+        input_data: Dict[str, Any],
+        post_text: str,
+        video_result: str,
+        linkedin_result: Any,
+        timings: Dict[str, float],
+        start: float,
+    ) -> Dict[str, Any]:
+        if is_tool_error(linkedin_result):
+            raise RuntimeError(linkedin_result)
+
+        video_path = "" if is_tool_error(video_result) else video_result
+        timings["total"] = round(time.perf_counter() - start, 3)
+        logger.info(f"Direct pipeline completed in {timings['total']}s")
+
+        output = "\n\n".join([
+            f"Post:\n{post_text}",
+            f"Video: {video_path or 'None'}",
+            f"LinkedIn: {linkedin_result}",
+        ])
+        return {
+            "input": input_data,
+            "output": output,
+            "mode": "pipeline",
+            "post_text": post_text,
+            "video_path": video_path,
+            "video_error": video_result if is_tool_error(video_result) else "",
+            "linkedin_result": linkedin_result,
+            "timings": timings,
+        }
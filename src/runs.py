@@ -0,0 +1,175 @@
+"""
+CarbonTrack AI Agent - Run Manifests
+
+Every run started from ``main.py`` writes a manifest to
+``OUTPUT_DIR/runs/<run-id>.json``: the project input, each pipeline
+stage's result as soon as the stage finishes, and the artifacts produced
+along the way (post text, video path, LinkedIn asset URN and post ID).
+``main.py --resume <run-id>`` reruns the input with the successful stages
+reused, so a failed publish does not record the video or generate the
+post again.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import OUTPUT_DIR
+from pipeline import is_tool_error
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = OUTPUT_DIR / "runs"
+
+# Artifact recorded for each stage result
+STAGE_ARTIFACTS = {"generate_post": "post_text", "create_video": "video_path"}
+_POST_ID = re.compile(r"Post ID: (\S+)")
+
+
+def manifest_path(run_id: str, runs_dir: Optional[Path] = None) -> Path:
+    """Where the manifest of a run is stored."""
+    return Path(runs_dir or RUNS_DIR) / f"{run_id}.json"
+
+
+@dataclass
+class RunManifest:
+    """Persistent record of one run's progress."""
+    run_id: str
+    input_data: Dict[str, Any]
+    path: Path
+    status: str = "running"
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    attempts: int = 1
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    output: str = ""
+    error: str = ""
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, input_data: Dict[str, Any], runs_dir: Optional[Path] = None) -> "RunManifest":
+        """
+        Start the manifest of a new run.
+
+        Args:
+            input_data: Project input of the run
+            runs_dir: Manifest directory, defaults to OUTPUT_DIR/runs
+
+        Returns:
+            The saved manifest
+        """
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        manifest = cls(run_id, input_data, manifest_path(run_id, runs_dir))
+        manifest.save()
+        logger.info(f"Run {run_id} started, manifest: {manifest.path}")
+        return manifest
+
+    @classmethod
+    def load(cls, run_id: str, runs_dir: Optional[Path] = None) -> "RunManifest":
+        """
+        Open the manifest of an earlier run to resume it.
+
+        Raises:
+            ValueError: If the run has no (readable) manifest
+        """
+        path = manifest_path(run_id, runs_dir)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise ValueError(f"No manifest for run {run_id} in {path.parent}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Unreadable manifest {path}: {e}")
+        data.pop("path", None)
+        return cls(path=path, **data)
+
+    def completed_stages(self) -> Dict[str, Any]:
+        """Results of the stages that succeeded, for CarbonTrackAgent.run(completed=...)."""
+        with self._lock:
+            return {name: stage["result"] for name, stage in self.stages.items() if stage["succeeded"]}
+
+    def record_stage(self, stage: str, result: Any) -> None:
+        """Store a stage's result as soon as it finishes (a pipeline ``on_stage`` callback)."""
+        succeeded = not is_tool_error(result)
+        with self._lock:
+            self.stages[stage] = {"result": result, "succeeded": succeeded, "completed_at": time.time()}
+            if succeeded and stage in STAGE_ARTIFACTS and result:
+                self.artifacts[STAGE_ARTIFACTS[stage]] = result
+            if succeeded and stage == "post_to_linkedin":
+                match = _POST_ID.search(str(result))
+                if match:
+                    self.artifacts["post_id"] = match.group(1)
+        self.save()
+
+    def record_artifact(self, name: str, value: Any) -> None:
+        """Store an artifact reported while a stage was still running."""
+        with self._lock:
+            self.artifacts[name] = value
+        self.save()
+
+    def resume(self) -> None:
+        """Mark the start of another attempt at the run."""
+        with self._lock:
+            self.attempts += 1
+            self.status = "running"
+            self.error = ""
+        self.save()
+
+    def finish(self, result: Dict[str, Any]) -> None:
+        """Mark the run succeeded."""
+        with self._lock:
+            self.status = "succeeded"
+            self.output = str(result.get("output", ""))
+        self.save()
+
+    def fail(self, error: str) -> None:
+        """Mark the run failed; its completed stages are kept for resuming."""
+        with self._lock:
+            self.status = "failed"
+            self.error = error
+        self.save()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["path"] = str(self.path)
+        return data
+
+    def save(self) -> None:
+        """Write the manifest atomically, so a crash never leaves it half written."""
+        with self._lock:
+            self.updated_at = time.time()
+            payload = json.dumps(self.to_dict(), indent=2, default=str)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".json.tmp")
+            temp_path.write_text(payload, encoding="utf-8")
+            os.replace(temp_path, self.path)
+
+    def callback_handler(self) -> "ManifestCallbackHandler":
+        """Callback handler recording the LinkedIn asset URN and post ID as they are reported."""
+        return ManifestCallbackHandler(self)
+
+
+class ManifestCallbackHandler(BaseCallbackHandler):
+    """Records artifacts that tools report with ``tracing.emit_event``."""
+
+    run_inline = True
+    # Events and the attributes that are stored as artifacts
+    EVENTS = {"linkedin_media": ("asset_urn",), "linkedin_post": ("post_id",)}
+
+    def __init__(self, manifest: RunManifest):
+        self.manifest = manifest
+
+    def on_custom_event(self, name, data, *, run_id, **kwargs):
+        for key in self.EVENTS.get(name, ()):
+            if isinstance(data, dict) and data.get(key):
+                self.manifest.record_artifact(key, data[key])
@@ -0,0 +1,84 @@
+"""
+CarbonTrack AI Agent - Startup Profiling
+
+``ImportProfiler`` times every module imported after it is installed, plus
+named checkpoints of the CLI's own start-up, and prints a report at exit.
+``main.py`` installs it before its own imports when ``--profile-startup``
+is passed, so the report covers the whole start-up.
+"""
+import atexit
+import builtins
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class ImportProfiler:
+    """Measures import times (like ``python -X importtime``) and start-up checkpoints."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # module -> (cumulative seconds, self seconds)
+        self.imports: Dict[str, Tuple[float, float]] = {}
+        self.checkpoints: List[Tuple[str, float]] = []
+        self._original_import = None
+        self._local = threading.local()
+
+    @classmethod
+    def from_argv(cls, argv: List[str], flag: str = "--profile-startup") -> Optional["ImportProfiler"]:
+        """Install a profiler if the flag is on the command line."""
+        if flag not in argv:
+            return None
+        profiler = cls()
+        profiler.install()
+        atexit.register(profiler.report)
+        return profiler
+
+    def install(self) -> None:
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first-time absolute imports do real work worth timing
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.imports.setdefault(name, (elapsed, elapsed - children))
+
+    def checkpoint(self, label: str) -> None:
+        """Record the time since start-up at a named point."""
+        self.checkpoints.append((label, time.perf_counter() - self.start))
+
+    def slowest(self, limit: int = 15) -> List[Tuple[str, float, float]]:
+        """The slowest imports as (module, cumulative seconds, self seconds)."""
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, total, own) for name, (total, own) in ranked[:limit]]
+
+    def report(self, limit: int = 15) -> None:
+        """Print checkpoints and the slowest imports to stderr."""
+        self.uninstall()
+        out = sys.stderr
+        out.write("\nStartup profile\n")
+        for label, seconds in self.checkpoints:
+            out.write(f"  {seconds * 1000:8.1f} ms  {label}\n")
+        out.write(f"  {(time.perf_counter() - self.start) * 1000:8.1f} ms  exit\n")
+        out.write(f"\nSlowest imports ({len(self.imports)} modules loaded)\n")
+        out.write(f"  {'cumulative':>10}  {'self':>8}  module\n")
+        for name, total, own in self.slowest(limit):
+            out.write(f"  {total * 1000:8.1f}ms  {own * 1000:6.1f}ms  {name}\n")
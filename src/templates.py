@@ -0,0 +1,177 @@
+"""
+CarbonTrack AI Agent - Prompt Templates
+
+Post templates are compacted once when they are loaded (indentation,
+trailing whitespace and repeated blank lines removed) and parsed into
+literal/placeholder segments, so rendering is a single join. Every render
+reports an estimate of its prompt tokens: on a CPU-bound local model the
+prompt is prefilled token by token, so prompt size is latency.
+
+Templates come from ``config.POST_TEMPLATES``; ``<tone>.txt`` files in
+``settings.post_templates_dir`` override them or add new tones.
+"""
+import logging
+import re
+import string
+import textwrap
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import settings, POST_TEMPLATES, SHORTEN_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+# Placeholders a post template may use
+TEMPLATE_FIELDS = frozenset({"project_name", "description", "features", "website_url", "max_length"})
+SHORTEN_FIELDS = frozenset({"post", "max_length"})
+
+DEFAULT_TONE = "professional"
+
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]|\n|[ \t]{2,}")
+_SPACES = re.compile(r"[ \t]{2,}")
+
+# (literal text, placeholder name or None, format spec)
+Segment = Tuple[str, Optional[str], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a text.
+
+    Counts words, punctuation marks, newlines and runs of indentation, with
+    long words split into pieces of four characters as subword tokenizers
+    do; close to the Llama and GPT tokenizers for English prose, without
+    loading either.
+    """
+    return sum(-(-len(piece) // 4) for piece in _TOKEN_PIECE.findall(text))
+
+
+def compact(text: str) -> str:
+    """Remove indentation, runs of spaces, trailing whitespace and repeated blank lines."""
+    lines = [_SPACES.sub(" ", line).strip() for line in textwrap.dedent(text).strip().splitlines()]
+    compacted: List[str] = []
+    for line in lines:
+        if line or (compacted and compacted[-1]):
+            compacted.append(line)
+    return "\n".join(compacted)
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """A rendered prompt and its estimated size."""
+    text: str
+    tokens: int
+
+
+class PostTemplate:
+    """A compacted post template, parsed once and rendered many times."""
+
+    def __init__(
+        self,
+        name: str,
+        source: str,
+        origin: str = "built-in",
+        allowed_fields: frozenset = TEMPLATE_FIELDS,
+    ):
+        """
+        Args:
+            name: Tone the template is used for
+            source: Template text with ``{placeholder}`` fields
+            origin: Where the template came from, for error messages
+            allowed_fields: Placeholders the template may use
+
+        Raises:
+            ValueError: If the template is empty or uses unknown placeholders
+        """
+        self.name = name
+        self.origin = origin
+        self.text = compact(source)
+        if not self.text:
+            raise ValueError(f"Post template '{name}' ({origin}) is empty")
+
+        self._segments: List[Segment] = []
+        for literal, field_name, format_spec, _ in string.Formatter().parse(self.text):
+            if field_name is not None and field_name not in allowed_fields:
+                raise ValueError(
+                    f"Post template '{name}' ({origin}) uses unknown placeholder {{{field_name}}}; "
+                    f"available: {', '.join(sorted(allowed_fields))}"
+                )
+            self._segments.append((literal, field_name, format_spec or ""))
+        self.fields = frozenset(field for _, field, _ in self._segments if field)
+        # Tokens of the fixed instructions, paid on every render
+        self.static_tokens = estimate_tokens("".join(literal for literal, _, _ in self._segments))
+
+    def render(self, **values) -> RenderedPrompt:
+        """
+        Fill in the placeholders.
+
+        Args:
+            **values: Values for the template fields (extra values are ignored)
+
+        Returns:
+            The prompt text and its estimated token count
+        """
+        parts = []
+        for literal, field_name, format_spec in self._segments:
+            parts.append(literal)
+            if field_name is not None:
+                parts.append(format(values[field_name], format_spec))
+        text = "".join(parts)
+        return RenderedPrompt(text, estimate_tokens(text))
+
+
+class TemplateSet:
+    """The post templates for every tone."""
+
+    def __init__(self, templates_dir: Optional[Path] = None):
+        """
+        Args:
+            templates_dir: Directory of ``<tone>.txt`` files overriding or
+                adding to the built-in templates
+        """
+        self.templates: Dict[str, PostTemplate] = {
+            tone: PostTemplate(tone, source) for tone, source in POST_TEMPLATES.items()
+        }
+        self.shorten = PostTemplate("shorten", SHORTEN_TEMPLATE, allowed_fields=SHORTEN_FIELDS)
+        if templates_dir is not None:
+            self._load_dir(Path(templates_dir))
+
+    def _load_dir(self, templates_dir: Path) -> None:
+        if not templates_dir.is_dir():
+            raise ValueError(f"Post templates directory not found: {templates_dir}")
+        for path in sorted(templates_dir.glob("*.txt")):
+            self.templates[path.stem] = PostTemplate(path.stem, path.read_text(encoding="utf-8"), str(path))
+            logger.info(f"Loaded post template '{path.stem}' from {path}")
+
+    def get(self, tone: Optional[str] = None) -> PostTemplate:
+        """The template for a tone (default: settings), falling back to professional."""
+        tone = tone or settings.default_post_tone
+        return self.templates.get(tone) or self.templates[DEFAULT_TONE]
+
+
+_template_set: Optional[TemplateSet] = None
+_template_set_dir: Optional[str] = None
+_template_set_lock = threading.Lock()
+
+
+def get_template_set() -> TemplateSet:
+    """The shared, loaded-once template set (reloaded if the templates directory setting changes)."""
+    global _template_set, _template_set_dir
+    templates_dir = settings.post_templates_dir
+    with _template_set_lock:
+        if _template_set is None or _template_set_dir != templates_dir:
+            _template_set = TemplateSet(Path(templates_dir) if templates_dir else None)
+            _template_set_dir = templates_dir
+        return _template_set
+
+
+def get_template(tone: Optional[str] = None) -> PostTemplate:
+    """The compiled post template for a tone."""
+    return get_template_set().get(tone)
+
+
+def get_shorten_template() -> PostTemplate:
+    """The compiled template asking the LLM to shorten an over-long post."""
+    return get_template_set().shorten
@@ -1,12 +1,28 @@
 """
 CarbonTrack AI Agent - Tools Package
+
+Tools are imported on first access, so importing the package (or one of
+its helper modules) does not load LangChain, Playwright or HTTP clients
+for tools that are never used.
 """
-from .generate_post import GeneratePostTool
-from .create_video import CreateVideoTool
-from .post_to_linkedin import PostToLinkedInTool
+import importlib
+
+_EXPORTS = {
+    "GeneratePostTool": ".generate_post",
+    "CreateVideoTool": ".create_video",
+    "PostToLinkedInTool": ".post_to_linkedin",
+}
 
 __all__ = [
     "GeneratePostTool",
     "CreateVideoTool",
     "PostToLinkedInTool",
 ]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
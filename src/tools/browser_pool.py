@@ -0,0 +1,221 @@
+"""
+Browser Pool - Long-lived Chromium instances for video recording
+
+Launching Chromium is the largest fixed cost of a recording, so the pool
+keeps a few browsers alive and hands out a fresh, isolated BrowserContext
+for each recording. Playwright's async objects belong to the event loop
+that created them, so the pool owns a dedicated loop running on a
+background thread; sync callers block on it and async callers await it.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _BrowserSlot:
+    """One pooled browser and how many recordings it has served."""
+    browser: Any = None
+    recordings: int = 0
+
+
+class BrowserPool:
+    """
+    A fixed-size pool of Chromium browsers.
+
+    Each slot launches its browser lazily, checks it is still connected
+    before handing out a context, and relaunches it after
+    ``max_recordings`` recordings to bound memory growth.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_recordings: Optional[int] = None,
+        launch_options: Optional[dict] = None,
+    ):
+        """
+        Initialize the pool (browsers are launched on first use).
+
+        Args:
+            size: Number of browsers, defaults to settings.browser_pool_size
+            max_recordings: Recordings per browser before it is recycled,
+                defaults to settings.browser_max_recordings (0 = never)
+            launch_options: Extra keyword arguments for chromium.launch()
+        """
+        self.size = max(1, size or settings.browser_pool_size)
+        self.max_recordings = settings.browser_max_recordings if max_recordings is None else max_recordings
+        self.launch_options = {"headless": True, **(launch_options or {})}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._slots: List[_BrowserSlot] = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    # -- lifecycle -------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="browser-pool", daemon=True
+            )
+            self._thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+            except Exception:
+                self._stop_loop()
+                raise
+            logger.info(f"Browser pool started with {self.size} slots")
+
+    async def _start(self) -> None:
+        self._playwright = await self._start_playwright()
+        self._slots = [_BrowserSlot() for _ in range(self.size)]
+        self._idle = asyncio.Queue()
+        for slot in self._slots:
+            self._idle.put_nowait(slot)
+
+    async def _start_playwright(self):
+        from playwright.async_api import async_playwright
+        return await async_playwright().start()
+
+    async def _launch_browser(self):
+        return await self._playwright.chromium.launch(**self.launch_options)
+
+    def _stop_loop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def shutdown(self, timeout: float = 60) -> None:
+        """Wait for in-flight recordings, close every browser and stop the loop."""
+        with self._lock:
+            if self._thread is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(timeout), self._loop).result(timeout + 5)
+            except Exception as e:
+                logger.warning(f"Browser pool did not shut down cleanly: {e}")
+            self._stop_loop()
+            logger.info("Browser pool shut down")
+
+    async def _shutdown(self, timeout: float) -> None:
+        # Take every slot back so in-flight recordings can finish first
+        try:
+            for _ in self._slots:
+                await asyncio.wait_for(self._idle.get(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting for recordings to finish, closing browsers anyway")
+        for slot in self._slots:
+            await self._close_browser(slot)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _close_browser(self, slot: _BrowserSlot) -> None:
+        if slot.browser is None:
+            return
+        try:
+            await slot.browser.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser: {e}")
+        slot.browser = None
+        slot.recordings = 0
+
+    # -- running work on the pool loop ---------------------------------
+
+    def run(self, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a coroutine on the pool loop from synchronous code."""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro_factory(), self._loop).result()
+
+    async def arun(self, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a coroutine on the pool loop and await it from another loop."""
+        await asyncio.to_thread(self._ensure_started)
+        future = asyncio.run_coroutine_threadsafe(coro_factory(), self._loop)
+        return await asyncio.wrap_future(future)
+
+    # -- contexts ---------------------------------------------------------
+
+    async def _checkout(self, slot: _BrowserSlot):
+        """Return a healthy browser for a slot, recycling or relaunching as needed."""
+        if slot.browser is not None:
+            if not slot.browser.is_connected():
+                logger.warning("Pooled browser disconnected, relaunching")
+                await self._close_browser(slot)
+            elif self.max_recordings and slot.recordings >= self.max_recordings:
+                logger.info(f"Recycling browser after {slot.recordings} recordings")
+                await self._close_browser(slot)
+        if slot.browser is None:
+            slot.browser = await self._launch_browser()
+            slot.recordings = 0
+        return slot.browser
+
+    @asynccontextmanager
+    async def new_context(self, **context_options) -> AsyncIterator[Any]:
+        """
+        Lease a fresh BrowserContext from a pooled browser.
+
+        Must be used from a coroutine running on the pool loop (see run/arun).
+        The context is closed when the block exits.
+        """
+        slot = await self._idle.get()
+        context = None
+        try:
+            browser = await self._checkout(slot)
+            try:
+                context = await browser.new_context(**context_options)
+            except Exception:
+                # The browser may have died between the health check and now
+                await self._close_browser(slot)
+                browser = await self._checkout(slot)
+                context = await browser.new_context(**context_options)
+            yield context
+        finally:
+            if context is not None:
+                slot.recordings += 1
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Error closing browser context: {e}")
+            self._idle.put_nowait(slot)
+
+
+_browser_pool: Optional[BrowserPool] = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get the process-wide browser pool."""
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool()
+        return _browser_pool
+
+
+@atexit.register
+def shutdown_browser_pool() -> None:
+    """Gracefully close the process-wide browser pool, if it was started."""
+    global _browser_pool
+    with _browser_pool_lock:
+        pool, _browser_pool = _browser_pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -1,22 +1,34 @@
 """
 Create Video Tool - Records website demos using Playwright
 """
-from typing import Optional, Type
+from typing import Optional, Tuple, Type
 from langchain_core.tools import BaseTool
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
 from pydantic import BaseModel, Field
-from playwright.sync_api import sync_playwright
 from pathlib import Path
+import asyncio
+import os
+import shutil
+import tempfile
 import time
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config import settings, get_video_dimensions, OUTPUT_DIR
+from tools.browser_pool import get_browser_pool
+from tools.scroll_driver import drive_scroll
+from tools.screencast import ScreencastRecorder
+from tools.transcode import FFmpegTranscoder, TranscodeResult, get_transcoder
+from metrics import RECORDING_DURATION, TRANSCODE_SPEED
+from tracing import emit_event
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Each recording writes into its own temporary directory under here
+RECORDINGS_DIR = OUTPUT_DIR / ".recordings"
+
 
 class CreateVideoInput(BaseModel):
     """Input schema for the CreateVideo tool."""
@@ -58,117 +70,237 @@ class CreateVideoTool(BaseTool):
         """Create a demo video of the website."""
         logger.info(f"Creating {duration}s video of: {website_url}")
         
+        work_dir = self._new_work_dir()
         try:
-            # Get video settings
-            width, height = get_video_dimensions()
-            output_path = OUTPUT_DIR / f"{output_filename}.{settings.video_format}"
-            
-            with sync_playwright() as p:
-                # Launch browser
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context(
-                    viewport={"width": width, "height": height},
-                    record_video_dir=str(OUTPUT_DIR),
-                    record_video_size={"width": width, "height": height}
-                )
-                page = context.new_page()
-                
-                logger.info(f"Loading website: {website_url}")
-                page.goto(website_url, wait_until="networkidle")
-                
-                # Scroll through the page slowly
-                start_time = time.time()
-                scroll_position = 0
-                page_height = page.evaluate("document.body.scrollHeight")
-                scroll_step = page_height / (duration * 2)  # Scroll speed
-                
-                logger.info("Recording video...")
-                while (time.time() - start_time) < duration:
-                    scroll_position += scroll_step
-                    page.evaluate(f"window.scrollTo(0, {scroll_position})")
-                    time.sleep(0.5)
-                    
-                    # Reset scroll if we reach the bottom
-                    if scroll_position >= page_height:
-                        scroll_position = 0
-                
-                # Close browser and save video
-                logger.info("Finalizing video...")
-                context.close()
-                browser.close()
-            
-            # The video is saved with a generated name, we need to rename it
-            video_files = list(OUTPUT_DIR.glob("*.webm"))
-            if video_files:
-                latest_video = max(video_files, key=lambda p: p.stat().st_mtime)
-                
-                # Convert webm to desired format if needed
-                if settings.video_format != "webm":
-                    self._convert_video(latest_video, output_path)
-                    latest_video.unlink()  # Remove original webm
-                else:
-                    latest_video.rename(output_path)
-                
-                logger.info(f"Video created successfully: {output_path}")
-                return str(output_path)
-            else:
-                error_msg = "No video file was created"
-                logger.error(error_msg)
-                return f"Error: {error_msg}"
-            
+            recording, encoded = get_browser_pool().run(lambda: self._record(website_url, duration, work_dir))
+            if encoded is not None:
+                self._report_encode(encoded)
+            return self._save_video(recording, output_filename)
         except Exception as e:
             logger.error(f"Error creating video: {e}")
             return f"Error creating video: {str(e)}"
-    
-    def _convert_video(self, input_path: Path, output_path: Path):
-        """Convert video format using opencv if needed."""
-        try:
-            import cv2
-            
-            logger.info(f"Converting video from {input_path.suffix} to {output_path.suffix}")
-            
-            # Read the video
-            cap = cv2.VideoCapture(str(input_path))
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            # Define codec and create VideoWriter
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                out.write(frame)
-            
-            cap.release()
-            out.release()
-            logger.info("Video conversion complete")
-            
-        except ImportError:
-            logger.warning("OpenCV not available, keeping webm format")
-            input_path.rename(output_path.with_suffix('.webm'))
-        except Exception as e:
-            logger.error(f"Error converting video: {e}")
-            # Fallback: just rename to .webm
-            input_path.rename(output_path.with_suffix('.webm'))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
     
     async def _arun(
         self,
         website_url: str,
         duration: int = 30,
         output_filename: str = "demo",
-        run_manager: Optional[CallbackManagerForToolRun] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
-        """Async version - for now just calls sync version."""
-        return self._run(
-            website_url=website_url,
-            duration=duration,
-            output_filename=output_filename,
-            run_manager=run_manager,
+        """Create a demo video without blocking the event loop."""
+        logger.info(f"Creating {duration}s video of: {website_url}")
+        
+        work_dir = self._new_work_dir()
+        try:
+            recording, encoded = await get_browser_pool().arun(lambda: self._record(website_url, duration, work_dir))
+            if encoded is not None:
+                self._report_encode(encoded)
+            # Transcoding is CPU-bound, keep it off the event loop
+            return await asyncio.to_thread(self._save_video, recording, output_filename)
+        except Exception as e:
+            logger.error(f"Error creating video: {e}")
+            return f"Error creating video: {str(e)}"
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _new_work_dir(self) -> Path:
+        """Create a private directory for one recording job."""
+        RECORDINGS_DIR.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix="rec-", dir=RECORDINGS_DIR))
+    
+    def _capture_mode(self) -> str:
+        """The configured capture mode, falling back to record_video when screencast cannot work."""
+        mode = settings.video_capture_mode
+        if mode == "screencast":
+            if settings.video_format == "webm":
+                logger.info("Screencast capture encodes H.264, using record_video for webm output")
+                return "record_video"
+            if not FFmpegTranscoder.available():
+                logger.warning(f"ffmpeg not found at '{settings.ffmpeg_path}', using record_video capture")
+                return "record_video"
+        return mode
+    
+    async def _record(
+        self, website_url: str, duration: int, work_dir: Path
+    ) -> Tuple[Path, Optional[TranscodeResult]]:
+        """
+        Record the website in a fresh context.
+        
+        Returns:
+            The exact video file, and its encode result when it was encoded
+            during capture (screencast mode)
+        """
+        mode = self._capture_mode()
+        start = time.perf_counter()
+        if mode == "screencast":
+            result = await self._record_screencast(website_url, duration, work_dir)
+            RECORDING_DURATION.observe(time.perf_counter() - start, capture_mode=mode)
+            return result.output_path, result
+        
+        # Get video settings
+        width, height = get_video_dimensions()
+        
+        async with get_browser_pool().new_context(
+            viewport={"width": width, "height": height},
+            record_video_dir=str(work_dir),
+            record_video_size={"width": width, "height": height}
+        ) as context:
+            page = await context.new_page()
+            video = page.video
+            
+            await self._load_page(page, website_url)
+            await self._scroll(page, duration)
+            
+            # Closing the context (on leaving this block) writes the video
+            logger.info("Finalizing video...")
+        
+        if video is None:
+            raise RuntimeError("No video file was created")
+        RECORDING_DURATION.observe(time.perf_counter() - start, capture_mode=mode)
+        return Path(await video.path()), None
+    
+    async def _record_screencast(self, website_url: str, duration: int, work_dir: Path) -> TranscodeResult:
+        """Record through the DevTools screencast, encoding frames as they arrive."""
+        width, height = get_video_dimensions()
+        recorder = ScreencastRecorder(work_dir / f"screencast.{settings.video_format}", (width, height))
+        
+        async with get_browser_pool().new_context(viewport={"width": width, "height": height}) as context:
+            page = await context.new_page()
+            await self._load_page(page, website_url)
+            try:
+                await recorder.start(context, page)
+                await self._scroll(page, duration)
+                result = await recorder.stop()
+            except BaseException:
+                await recorder.abort()
+                raise
+        
+        logger.info(f"Screencast encoded in {result.elapsed_seconds:.1f}s after capture")
+        return result
+    
+    async def _load_page(self, page, website_url: str) -> None:
+        logger.info(f"Loading website: {website_url}")
+        await page.goto(website_url, wait_until="networkidle")
+    
+    async def _scroll(self, page, duration: int) -> None:
+        # Scrolling runs inside the page; we only wait for it to finish
+        logger.info("Recording video...")
+        stats = await drive_scroll(page, duration)
+        logger.debug(f"Scroll finished: {stats}")
+    
+    def _save_video(self, recording: Path, output_filename: str) -> str:
+        """Convert the recording if needed and atomically move it to its final name."""
+        if not recording.exists():
+            error_msg = "No video file was created"
+            logger.error(error_msg)
+            return f"Error: {error_msg}"
+        
+        # Build the final file next to the recording, then publish it in one step
+        staged_path = recording.parent / f"{output_filename}.{settings.video_format}"
+        if recording.suffix != staged_path.suffix:
+            staged_path = self._convert_video(recording, staged_path)
+        else:
+            # Already in the requested format (webm output or a screencast encode)
+            recording.rename(staged_path)
+        
+        output_path = self._publish(staged_path, recording.parent.name.replace("rec-", "", 1))
+        
+        logger.info(f"Video created successfully: {output_path}")
+        return str(output_path)
+    
+    def _publish(self, staged_path: Path, job_suffix: str) -> Path:
+        """
+        Move a finished video into OUTPUT_DIR without replacing another job's video.
+        
+        The video is placed under its requested name, which fails if the
+        name is taken (another job with the same output_filename, or an earlier
+        run); it is then published as ``<name>-<job_suffix>`` instead.
+        
+        Args:
+            staged_path: Finished video in the recording's temporary directory
+            job_suffix: Name suffix unique to this recording
+        
+        Returns:
+            Final path of the video
+        """
+        output_path = OUTPUT_DIR / staged_path.name
+        try:
+            self._place(staged_path, output_path)
+        except FileExistsError:
+            output_path = OUTPUT_DIR / f"{staged_path.stem}-{job_suffix}{staged_path.suffix}"
+            logger.info(f"{staged_path.name} already exists, saving the video as {output_path.name}")
+            self._place(staged_path, output_path)
+        staged_path.unlink()
+        return output_path
+    
+    @staticmethod
+    def _place(staged_path: Path, output_path: Path) -> None:
+        """
+        Create output_path with the video's contents, raising FileExistsError if it exists.
+        
+        A hard link is used where the filesystem supports one; elsewhere (FAT,
+        exFAT, some shared or network mounts) the video is copied into a file
+        that is created exclusively, so neither way can replace another video.
+        """
+        try:
+            os.link(staged_path, output_path)
+            return
+        except FileExistsError:
+            raise
+        except OSError as e:
+            logger.debug(f"Cannot hard-link into {output_path.parent} ({e}), copying the video instead")
+        with open(staged_path, "rb") as source, open(output_path, "xb") as target:
+            try:
+                shutil.copyfileobj(source, target)
+            except BaseException:
+                target.close()
+                output_path.unlink()
+                raise
+    
+    def _report_encode(self, result: TranscodeResult) -> None:
+        """Report encode metrics to the run trace (called on the tool's thread) and registry."""
+        TRANSCODE_SPEED.observe(result.speed, backend=result.backend)
+        emit_event(
+            "video_encode",
+            backend=result.backend,
+            frames=result.frames,
+            media_seconds=round(result.media_seconds, 3),
+            elapsed_seconds=round(result.elapsed_seconds, 3),
+            speed=round(result.speed, 2),
         )
+    
+    def _convert_video(self, input_path: Path, output_path: Path) -> Path:
+        """
+        Convert video format with the configured transcoder backend.
+        
+        Returns:
+            Path of the produced file (the original webm if conversion failed)
+        """
+        transcoder = get_transcoder()
+        if transcoder is None:
+            logger.warning("Neither ffmpeg nor OpenCV is available, keeping webm format")
+            fallback = output_path.with_suffix('.webm')
+            input_path.rename(fallback)
+            return fallback
+        
+        try:
+            logger.info(f"Converting video from {input_path.suffix} to {output_path.suffix} with {transcoder.name}")
+            result = transcoder.transcode(input_path, output_path)
+            logger.info(
+                f"Video conversion complete: {result.media_seconds:.1f}s of video in "
+                f"{result.elapsed_seconds:.1f}s ({result.speed:.1f}x realtime, {result.backend})"
+            )
+            self._report_encode(result)
+            return output_path
+            
+        except Exception as e:
+            logger.error(f"Error converting video: {e}")
+            # Fallback: just rename to .webm
+            fallback = output_path.with_suffix('.webm')
+            input_path.rename(fallback)
+            return fallback
 
 
 # Example usage
@@ -1,21 +1,56 @@
 """
 Generate Post Tool - Creates LinkedIn posts using LLM
 """
-from typing import Any, Dict, Optional, Type
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import BaseTool
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
 from pydantic import BaseModel, Field
-from langchain_community.chat_models import ChatOllama
 
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from config import settings, get_post_template
+from config import settings
+from llm import get_llm, llm_identity
+from cache import PostCache, get_post_cache
+from metrics import (
+    LLM_LATENCY,
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLM_WASTED_TOKENS,
+    POST_LENGTH_FIXES,
+    POSTS_GENERATED,
+    PROMPT_TOKENS,
+)
+from templates import estimate_tokens, get_shorten_template, get_template, get_template_set
+from tools.post_length import end_at_sentence, max_tokens_for_length, trim_to_sentence
+from tracing import emit_event
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Called with each chunk of post text as the LLM produces it
+TokenCallback = Callable[[str], None]
+
+
+@dataclass
+class PostVariant:
+    """One tone's version of a post, from generate_variants."""
+    tone: str
+    text: str = ""
+    latency_seconds: float = 0.0
+    cached: bool = False
+    error: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# (variant, prompt, cache, cache key) of a variant that still needs the LLM
+_PendingVariant = Tuple[PostVariant, str, Optional[PostCache], str]
+
 
 class GeneratePostInput(BaseModel):
     """Input schema for the GeneratePost tool."""
@@ -48,6 +83,278 @@ class GeneratePostTool(BaseTool):
     Returns the generated post text.
     """
     args_schema: Type[BaseModel] = GeneratePostInput
+    use_cache: bool = True
+    refresh_cache: bool = False
+    on_token: Optional[TokenCallback] = None
+    last_generation_metrics: Dict[str, float] = {}
+    
+    def _cache(self) -> Optional[PostCache]:
+        """Return the post cache if caching is enabled for this tool."""
+        if self.use_cache and settings.post_cache_enabled:
+            return get_post_cache()
+        return None
+    
+    def _build_prompt(
+        self,
+        project_name: str,
+        description: str,
+        website_url: str,
+        key_features: str,
+        tone: str,
+    ) -> str:
+        """
+        Render the post template for a project.
+        
+        Raises:
+            ValueError: If the prompt exceeds settings.prompt_token_budget
+        """
+        # Parse key features
+        features = [f.strip() for f in key_features.split(",") if f.strip()]
+        features_str = "\n".join(f"- {f}" for f in features)
+        
+        # Templates are compacted and parsed once, at first use
+        template = get_template(tone)
+        prompt = template.render(
+            project_name=project_name,
+            description=description,
+            features=features_str,
+            website_url=website_url,
+            max_length=settings.max_post_length
+        )
+        
+        PROMPT_TOKENS.observe(prompt.tokens, template=template.name)
+        emit_event("prompt", template=template.name, tokens=prompt.tokens, chars=len(prompt.text))
+        logger.debug(f"Prompt for '{template.name}' template: ~{prompt.tokens} tokens")
+        
+        # Every prompt token is prefill time on the model, refuse runaway inputs
+        budget = settings.prompt_token_budget
+        if budget and prompt.tokens > budget:
+            raise ValueError(
+                f"Prompt is ~{prompt.tokens} tokens, over the {budget} token budget "
+                f"(the template alone is ~{template.static_tokens}); shorten the description or features"
+            )
+        return prompt.text
+    
+    def _lookup_cache(self, prompt: str) -> Tuple[Optional[PostCache], str, Optional[str]]:
+        """Return (cache, cache key, cached post or None) for a prompt."""
+        cache = self._cache()
+        cache_key = PostCache.make_key(
+            prompt, *llm_identity(), max_tokens=self._max_tokens(), max_length=settings.max_post_length
+        )
+        cached = None
+        if cache is not None and not self.refresh_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                POSTS_GENERATED.inc(source="cache")
+                logger.info("Post served from cache")
+        return cache, cache_key, cached
+    
+    def _finalize_post(self, post_text: str, cache: Optional[PostCache], cache_key: str) -> str:
+        """Enforce the length limit and store the post in the cache."""
+        # Ensure post is within length limit, ending on a whole sentence
+        if len(post_text) > settings.max_post_length:
+            trimmed = trim_to_sentence(post_text, settings.max_post_length)
+            LLM_WASTED_TOKENS.inc(max(0, estimate_tokens(post_text) - estimate_tokens(trimmed)), reason="trimmed")
+            POST_LENGTH_FIXES.inc(action="trimmed")
+            logger.warning(f"Post too long ({len(post_text)} chars), trimmed to {len(trimmed)} at a sentence boundary")
+            post_text = trimmed
+        
+        if cache is not None:
+            cache.put(cache_key, post_text)
+        
+        POSTS_GENERATED.inc(source="llm")
+        logger.info("Post generated successfully")
+        return post_text
+    
+    @staticmethod
+    def _max_tokens() -> int:
+        """Generation limit: settings.llm_max_tokens, or about max_post_length characters."""
+        return settings.llm_max_tokens or max_tokens_for_length(settings.max_post_length)
+    
+    def _llm(self):
+        """The shared LLM client, limited to about max_post_length characters of output."""
+        return get_llm(max_tokens=self._max_tokens())
+    
+    @staticmethod
+    def _stopped_at_limit(message) -> bool:
+        """Whether generation ended because it ran out of tokens (Ollama done_reason, OpenAI finish_reason)."""
+        metadata = getattr(message, "response_metadata", None)
+        if not isinstance(metadata, dict):
+            return False
+        return "length" in (metadata.get("done_reason"), metadata.get("finish_reason"))
+    
+    def _complete(self, post_text: str, stopped_at_limit: bool) -> str:
+        """Drop the unfinished sentence of a post cut off by the token limit."""
+        if not stopped_at_limit:
+            return post_text
+        POST_LENGTH_FIXES.inc(action="token_limit")
+        completed = end_at_sentence(post_text)
+        LLM_WASTED_TOKENS.inc(max(0, estimate_tokens(post_text) - estimate_tokens(completed)), reason="trimmed")
+        logger.info(f"Post reached the token limit, ended at its last full sentence ({len(completed)} chars)")
+        return completed
+    
+    def _needs_shortening(self, post_text: str) -> bool:
+        """Too far over the limit to trim without losing much of the post."""
+        return len(post_text) > settings.max_post_length * (1 + settings.post_shorten_overflow)
+    
+    def _shorten_prompt(self, post_text: str) -> str:
+        return get_shorten_template().render(post=post_text, max_length=settings.max_post_length).text
+    
+    def _record_shortened(self, draft: str, shortened: str) -> str:
+        """Account for a shortening call and pick the shorter usable text."""
+        # The whole draft was generated for nothing
+        LLM_WASTED_TOKENS.inc(estimate_tokens(draft), reason="shortened")
+        POST_LENGTH_FIXES.inc(action="shortened")
+        shortened = shortened.strip()
+        logger.info(f"Post was {len(draft)} chars, shortened by the LLM to {len(shortened)}")
+        return shortened if shortened and len(shortened) < len(draft) else draft
+    
+    def _fit(self, post_text: str) -> str:
+        """Ask the LLM to shorten a post far over the limit, at most post_shorten_retries times."""
+        for _ in range(settings.post_shorten_retries):
+            if not self._needs_shortening(post_text):
+                break
+            message = self._llm().invoke(self._shorten_prompt(post_text))
+            shortened = self._complete(message.content, self._stopped_at_limit(message))
+            post_text = self._record_shortened(post_text, shortened)
+        return post_text
+    
+    async def _afit(self, post_text: str) -> str:
+        """Async version of _fit."""
+        for _ in range(settings.post_shorten_retries):
+            if not self._needs_shortening(post_text):
+                break
+            message = await self._llm().ainvoke(self._shorten_prompt(post_text))
+            shortened = self._complete(message.content, self._stopped_at_limit(message))
+            post_text = self._record_shortened(post_text, shortened)
+        return post_text
+    
+    def _record_metrics(self, start: float, first_token: Optional[float], chunks: int, chars: int) -> None:
+        """Store and log time-to-first-token and total generation time."""
+        total = time.perf_counter() - start
+        ttft = (first_token - start) if first_token is not None else total
+        self.last_generation_metrics = {
+            "ttft_seconds": round(ttft, 3),
+            "total_seconds": round(total, 3),
+            "chunks": chunks,
+            "chars": chars,
+        }
+        LLM_LATENCY.observe(total, provider=settings.llm_provider)
+        LLM_TIME_TO_FIRST_TOKEN.observe(ttft, provider=settings.llm_provider)
+        logger.info(f"Post streamed: first token after {ttft:.2f}s, complete after {total:.2f}s ({chunks} chunks)")
+    
+    def _stream_tokens(self, prompt: str, state: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Yield post text chunks from the LLM as they arrive, recording TTFT.
+        
+        ``state["stopped_at_limit"]`` is set when the stream ends at the token limit.
+        """
+        start = time.perf_counter()
+        first_token = None
+        chunks = chars = 0
+        for chunk in self._llm().stream(prompt):
+            if state is not None and self._stopped_at_limit(chunk):
+                state["stopped_at_limit"] = True
+            text = chunk.content
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter()
+            chunks += 1
+            chars += len(text)
+            yield text
+        self._record_metrics(start, first_token, chunks, chars)
+    
+    async def _astream_tokens(self, prompt: str, state: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Async version of _stream_tokens."""
+        start = time.perf_counter()
+        first_token = None
+        chunks = chars = 0
+        async for chunk in self._llm().astream(prompt):
+            if state is not None and self._stopped_at_limit(chunk):
+                state["stopped_at_limit"] = True
+            text = chunk.content
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter()
+            chunks += 1
+            chars += len(text)
+            yield text
+        self._record_metrics(start, first_token, chunks, chars)
+    
+    def stream_post(
+        self,
+        project_name: str,
+        description: str,
+        website_url: str,
+        key_features: str = "",
+        tone: str = "professional",
+    ) -> Iterator[str]:
+        """
+        Generate a post, yielding its text as the LLM produces it.
+        
+        A cached post is yielded as a single chunk. Once the iterator is
+        exhausted the finished post is stored in the cache; the post returned
+        by ``_run`` is the same text, trimmed to a sentence boundary if it
+        exceeds the length limit (it is never re-generated shorter here,
+        since the text has already been shown).
+        
+        Args:
+            Same as _run
+        
+        Yields:
+            Chunks of post text
+        """
+        prompt = self._build_prompt(project_name, description, website_url, key_features, tone)
+        cache, cache_key, cached = self._lookup_cache(prompt)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        state: Dict[str, Any] = {}
+        for text in self._stream_tokens(prompt, state):
+            parts.append(text)
+            yield text
+        post_text = self._complete("".join(parts), state.get("stopped_at_limit", False))
+        self._finalize_post(post_text, cache, cache_key)
+    
+    def _invoke_post(self, prompt: str) -> str:
+        """Generate post text in a single (non-streamed) LLM call."""
+        start = time.perf_counter()
+        message = self._llm().invoke(prompt)
+        LLM_LATENCY.observe(time.perf_counter() - start, provider=settings.llm_provider)
+        return self._complete(message.content, self._stopped_at_limit(message))
+    
+    async def _ainvoke_post(self, prompt: str) -> str:
+        """Async version of _invoke_post."""
+        start = time.perf_counter()
+        message = await self._llm().ainvoke(prompt)
+        LLM_LATENCY.observe(time.perf_counter() - start, provider=settings.llm_provider)
+        return self._complete(message.content, self._stopped_at_limit(message))
+    
+    def _generate(self, prompt: str) -> str:
+        """Generate post text, streaming it to on_token when a callback is set."""
+        if self.on_token is None:
+            return self._invoke_post(prompt)
+        parts = []
+        state: Dict[str, Any] = {}
+        for text in self._stream_tokens(prompt, state):
+            parts.append(text)
+            self.on_token(text)
+        return self._complete("".join(parts), state.get("stopped_at_limit", False))
+    
+    async def _agenerate(self, prompt: str) -> str:
+        """Async version of _generate."""
+        if self.on_token is None:
+            return await self._ainvoke_post(prompt)
+        parts = []
+        state: Dict[str, Any] = {}
+        async for text in self._astream_tokens(prompt, state):
+            parts.append(text)
+            self.on_token(text)
+        return self._complete("".join(parts), state.get("stopped_at_limit", False))
     
     def _run(
         self,
@@ -62,50 +369,21 @@ class GeneratePostTool(BaseTool):
         logger.info(f"Generating {tone} post for project: {project_name}")
         
         try:
-            # Parse key features
-            features = [f.strip() for f in key_features.split(",") if f.strip()]
-            features_str = "\n".join(f"- {f}" for f in features)
+            prompt = self._build_prompt(project_name, description, website_url, key_features, tone)
             
-            # Get the appropriate template
-            template = get_post_template(tone)
+            # Serve identical prompts from the cache
+            cache, cache_key, cached = self._lookup_cache(prompt)
+            if cached is not None:
+                if self.on_token is not None:
+                    self.on_token(cached)
+                return cached
             
-            # Format the prompt
-            prompt = template.format(
-                project_name=project_name,
-                description=description,
-                features=features_str,
-                website_url=website_url,
-                max_length=settings.max_post_length
-            )
-            
-            # Generate post using LLM
-            if settings.llm_provider == "ollama":
-                llm = ChatOllama(
-                    base_url=settings.ollama_base_url,
-                    model=settings.ollama_model,
-                    temperature=0.7,
-                )
-            elif settings.llm_provider == "grok":
-                from langchain_openai import ChatOpenAI
-                llm = ChatOpenAI(
-                    api_key=settings.grok_api_key,
-                    base_url="https://api.x.ai/v1",
-                    model=settings.grok_model,
-                    temperature=0.7,
-                )
-            else:
-                raise ValueError(f"Unsupported LLM provider: {settings.llm_provider}")
-            
-            response = llm.invoke(prompt)
-            post_text = response.content
-            
-            # Ensure post is within length limit
-            if len(post_text) > settings.max_post_length:
-                logger.warning(f"Post too long ({len(post_text)} chars), truncating...")
-                post_text = post_text[:settings.max_post_length - 3] + "..."
-            
-            logger.info("Post generated successfully")
-            return post_text
+            # Generate post using the shared LLM client
+            post_text = self._generate(prompt)
+            if self.on_token is None:
+                # Streamed text has already been shown, so it is only trimmed, never re-generated
+                post_text = self._fit(post_text)
+            return self._finalize_post(post_text, cache, cache_key)
             
         except Exception as e:
             logger.error(f"Error generating post: {e}")
@@ -118,17 +396,141 @@ class GeneratePostTool(BaseTool):
         website_url: str,
         key_features: str = "",
         tone: str = "professional",
-        run_manager: Optional[CallbackManagerForToolRun] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
-        """Async version - for now just calls sync version."""
-        return self._run(
-            project_name=project_name,
-            description=description,
-            website_url=website_url,
-            key_features=key_features,
-            tone=tone,
-            run_manager=run_manager,
-        )
+        """Generate a LinkedIn post without blocking the event loop."""
+        logger.info(f"Generating {tone} post for project: {project_name}")
+        
+        try:
+            prompt = self._build_prompt(project_name, description, website_url, key_features, tone)
+            
+            # Serve identical prompts from the cache
+            cache, cache_key, cached = self._lookup_cache(prompt)
+            if cached is not None:
+                if self.on_token is not None:
+                    self.on_token(cached)
+                return cached
+            
+            # Generate post using the shared LLM client
+            post_text = await self._agenerate(prompt)
+            if self.on_token is None:
+                # Streamed text has already been shown, so it is only trimmed, never re-generated
+                post_text = await self._afit(post_text)
+            return self._finalize_post(post_text, cache, cache_key)
+            
+        except Exception as e:
+            logger.error(f"Error generating post: {e}")
+            return f"Error generating post: {str(e)}"
+    
+    # -- variants ---------------------------------------------------------
+    
+    def _prepare_variants(
+        self,
+        project_name: str,
+        description: str,
+        website_url: str,
+        key_features: str,
+        tones: Optional[Sequence[str]],
+    ) -> Tuple[List[PostVariant], List[_PendingVariant]]:
+        """Render every tone's prompt and serve what the cache has."""
+        known = get_template_set().templates
+        variants: List[PostVariant] = []
+        pending: List[_PendingVariant] = []
+        for tone in dict.fromkeys(tones or known):
+            variant = PostVariant(tone)
+            variants.append(variant)
+            if tone not in known:
+                variant.error = f"Error generating post: unknown tone '{tone}'"
+                continue
+            try:
+                prompt = self._build_prompt(project_name, description, website_url, key_features, tone)
+            except ValueError as e:
+                variant.error = f"Error generating post: {e}"
+                continue
+            cache, cache_key, cached = self._lookup_cache(prompt)
+            if cached is not None:
+                variant.text, variant.cached = cached, True
+            else:
+                pending.append((variant, prompt, cache, cache_key))
+        return variants, pending
+    
+    def _collect_variants(self, pending: List[_PendingVariant], results: List[Any]) -> None:
+        """Store each batched generation in its variant (and the cache)."""
+        for (variant, _, cache, cache_key), result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error generating {variant.tone} variant: {result}")
+                variant.error = f"Error generating post: {result}"
+                continue
+            post_text, variant.latency_seconds = result
+            variant.text = self._finalize_post(post_text, cache, cache_key)
+    
+    def _timed_post(self, prompt: str) -> Tuple[str, float]:
+        start = time.perf_counter()
+        post_text = self._fit(self._invoke_post(prompt))
+        return post_text, round(time.perf_counter() - start, 3)
+    
+    async def _atimed_post(self, prompt: str) -> Tuple[str, float]:
+        start = time.perf_counter()
+        post_text = await self._afit(await self._ainvoke_post(prompt))
+        return post_text, round(time.perf_counter() - start, 3)
+    
+    def generate_variants(
+        self,
+        project_name: str,
+        description: str,
+        website_url: str,
+        key_features: str = "",
+        tones: Optional[Sequence[str]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[PostVariant]:
+        """
+        Generate the post in several tones with concurrent LLM calls.
+        
+        The prompts are submitted together through LangChain's batch
+        interface, so the wall-clock time is roughly that of the slowest
+        variant rather than the sum. Cached variants are not regenerated,
+        and a failed variant does not fail the others.
+        
+        Args:
+            project_name, description, website_url, key_features: Same as _run
+            tones: Tones to generate, defaults to every available template
+            max_concurrency: Concurrent LLM calls, defaults to
+                settings.post_variant_concurrency
+        
+        Returns:
+            One PostVariant per tone, in the order requested
+        """
+        variants, pending = self._prepare_variants(project_name, description, website_url, key_features, tones)
+        if pending:
+            logger.info(f"Generating {len(pending)} post variants for project: {project_name}")
+            results = RunnableLambda(self._timed_post).batch(
+                [prompt for _, prompt, _, _ in pending],
+                config={"max_concurrency": max_concurrency or settings.post_variant_concurrency},
+                return_exceptions=True,
+            )
+            self._collect_variants(pending, results)
+        return variants
+    
+    async def agenerate_variants(
+        self,
+        project_name: str,
+        description: str,
+        website_url: str,
+        key_features: str = "",
+        tones: Optional[Sequence[str]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[PostVariant]:
+        """Async version of generate_variants."""
+        variants, pending = self._prepare_variants(project_name, description, website_url, key_features, tones)
+        if pending:
+            logger.info(f"Generating {len(pending)} post variants for project: {project_name}")
+            results = await RunnableLambda(self._timed_post, afunc=self._atimed_post).abatch(
+                [prompt for _, prompt, _, _ in pending],
+                config={"max_concurrency": max_concurrency or settings.post_variant_concurrency},
+                return_exceptions=True,
+            )
+            self._collect_variants(pending, results)
+        return variants
 
 
 # Example usage
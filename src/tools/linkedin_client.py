@@ -0,0 +1,335 @@
+"""
+LinkedIn API Client - Pooled, retrying HTTP access to the LinkedIn API
+
+One client (per base URL, token and API version) is shared by everything
+that talks to LinkedIn. It keeps a pooled ``requests.Session`` for sync
+callers and one ``httpx.AsyncClient`` per event loop for async callers,
+applies connect/read timeouts to every request, and retries throttled
+(429) and failed (5xx, network) requests with exponential backoff and
+jitter, honoring ``Retry-After``.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import settings
+from metrics import LINKEDIN_RESPONSES
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Only these are retried after a server error or a dropped connection;
+# a POST may already have taken effect, so it is retried only when
+# throttled or when the connection could not be opened at all
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_connect_failure(error: Exception) -> bool:
+    """Whether a request (requests or httpx) failed before connecting, so it never reached LinkedIn."""
+    if isinstance(error, (requests.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    if not isinstance(error, requests.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    # urllib3 raises NewConnectionError, a ConnectTimeoutError, for refused and unresolved connections
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class LinkedInClient:
+    """Shared HTTP client for the LinkedIn API with retries and counters."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        access_token: Optional[str] = None,
+        api_version: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+    ):
+        """
+        Initialize the client (settings provide every default).
+
+        Args:
+            base_url: API base URL that relative paths are resolved against
+            access_token: OAuth token sent with every request
+            api_version: LinkedIn-Version header for the versioned /rest API
+            max_retries: Retries per request
+            backoff_base: First retry delay in seconds
+            backoff_max: Longest retry delay in seconds
+        """
+        self.base_url = (base_url or settings.linkedin_api_base_url).rstrip("/")
+        self.access_token = settings.linkedin_access_token if access_token is None else access_token
+        self.api_version = api_version or settings.linkedin_api_version
+        self.max_retries = settings.linkedin_max_retries if max_retries is None else max_retries
+        self.backoff_base = settings.linkedin_backoff_base if backoff_base is None else backoff_base
+        self.backoff_max = settings.linkedin_backoff_max if backoff_max is None else backoff_max
+        self.timeout = (settings.linkedin_connect_timeout, settings.linkedin_read_timeout)
+        self.pool_size = max(10, settings.linkedin_upload_workers)
+
+        # Built once and reused for every request
+        self.default_headers = {"Authorization": f"Bearer {self.access_token}"}
+        self.rest_headers = {
+            "LinkedIn-Version": self.api_version,
+            "X-Restli-Protocol-Version": "2.0.0",
+        }
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self.default_headers)
+
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._counters: Counter = Counter()
+        self._counters_lock = threading.Lock()
+
+    # -- helpers ------------------------------------------------------------
+
+    def url(self, path: str) -> str:
+        """Resolve an API path; absolute URLs (e.g. upload URLs) are used as is."""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _headers(self, path: str, headers: Optional[dict]) -> Optional[dict]:
+        if path.startswith("/rest/"):
+            return {**self.rest_headers, **(headers or {})}
+        return headers
+
+    @staticmethod
+    def _rewind(body) -> None:
+        """Restart a streamed request body (see upload_stream.FileSlice) before a retry."""
+        if hasattr(body, "rewind"):
+            body.rewind()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counters_lock:
+            self._counters[name] += amount
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Requests sent, retries, throttled (429) responses and failed requests."""
+        with self._counters_lock:
+            return {name: self._counters[name] for name in ("requests", "retries", "throttled", "failures")}
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential delay for a retry, half of it randomized to spread out clients."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _response_delay(self, method: str, attempt: int, status_code: int, retry_after: Optional[str]) -> Optional[float]:
+        """Delay before retrying a response, or None if it should be returned."""
+        if status_code not in RETRY_STATUSES:
+            return None
+        if status_code == 429:
+            self._count("throttled")
+        elif method not in IDEMPOTENT_METHODS:
+            return None
+        if attempt >= self.max_retries:
+            return None
+
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            return self._backoff(attempt)
+        if delay > self.backoff_max:
+            logger.warning(f"LinkedIn asked to retry after {delay:.0f}s, longer than the {self.backoff_max:.0f}s limit")
+            return None
+        return delay
+
+    def _error_delay(self, method: str, attempt: int, connect_failed: bool) -> Optional[float]:
+        """Delay before retrying after a network error, or None to raise it."""
+        if attempt >= self.max_retries or not (connect_failed or method in IDEMPOTENT_METHODS):
+            return None
+        return self._backoff(attempt)
+
+    def _log_retry(self, method: str, url: str, reason: str, delay: float, attempt: int) -> None:
+        logger.warning(f"LinkedIn {method} {url} {reason}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+
+    # -- sync -------------------------------------------------------------
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying throttled and transient failures.
+
+        Args:
+            method: HTTP method
+            path: API path (e.g. "/v2/ugcPosts") or absolute URL
+            **kwargs: Passed to requests (json, data, headers, timeout, ...)
+
+        Returns:
+            The final response (which may still be an error status)
+        """
+        method = method.upper()
+        url = self.url(path)
+        kwargs["headers"] = self._headers(path, kwargs.get("headers"))
+        kwargs.setdefault("timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            self._count("requests")
+            self._rewind(kwargs.get("data"))
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = self._error_delay(method, attempt, is_connect_failure(e))
+                if delay is None:
+                    self._count("failures")
+                    raise
+                self._log_retry(method, url, f"failed ({e.__class__.__name__})", delay, attempt)
+            else:
+                LINKEDIN_RESPONSES.inc(status=f"{response.status_code // 100}xx")
+                delay = self._response_delay(
+                    method, attempt, response.status_code, response.headers.get("Retry-After")
+                )
+                if delay is None:
+                    if response.status_code >= 400:
+                        self._count("failures")
+                    return response
+                self._log_retry(method, url, f"returned {response.status_code}", delay, attempt)
+                response.close()
+
+            attempt += 1
+            self._count("retries")
+            time.sleep(delay)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    # -- async ------------------------------------------------------------
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """The pooled AsyncClient for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            connect, read = self.timeout
+            client = httpx.AsyncClient(
+                headers=self.default_headers,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def arequest(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Async version of request (kwargs are passed to httpx: json, content, headers, ...)."""
+        method = method.upper()
+        url = self.url(path)
+        kwargs["headers"] = self._headers(path, kwargs.get("headers"))
+        content = kwargs.get("content")
+        streamed = hasattr(content, "__aiter__") and hasattr(content, "__len__")
+        if streamed:
+            # Sized streams get a Content-Length instead of chunked encoding
+            kwargs["headers"] = {"Content-Length": str(len(content)), **(kwargs["headers"] or {})}
+        client = self._async_client()
+
+        attempt = 0
+        while True:
+            self._count("requests")
+            self._rewind(content)
+            if streamed:
+                # httpx would treat an object that is also sync-iterable as a sync stream
+                kwargs["content"] = content.__aiter__()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                delay = self._error_delay(method, attempt, is_connect_failure(e))
+                if delay is None:
+                    self._count("failures")
+                    raise
+                self._log_retry(method, url, f"failed ({e.__class__.__name__})", delay, attempt)
+            else:
+                LINKEDIN_RESPONSES.inc(status=f"{response.status_code // 100}xx")
+                delay = self._response_delay(
+                    method, attempt, response.status_code, response.headers.get("Retry-After")
+                )
+                if delay is None:
+                    if response.status_code >= 400:
+                        self._count("failures")
+                    return response
+                self._log_retry(method, url, f"returned {response.status_code}", delay, attempt)
+
+            attempt += 1
+            self._count("retries")
+            await asyncio.sleep(delay)
+
+    async def apost(self, path: str, **kwargs) -> httpx.Response:
+        return await self.arequest("POST", path, **kwargs)
+
+    async def aput(self, path: str, **kwargs) -> httpx.Response:
+        return await self.arequest("PUT", path, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the AsyncClient of the running event loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[Tuple[str, str, str], LinkedInClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_linkedin_client() -> LinkedInClient:
+    """Get the shared client for the configured base URL, token and API version."""
+    key = (settings.linkedin_api_base_url, settings.linkedin_access_token, settings.linkedin_api_version)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = LinkedInClient(*key)
+        return client
+
+
+def reset_linkedin_clients() -> None:
+    """Close and forget all shared clients (used by tests)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,294 @@
+"""
+LinkedIn Video Upload - Multi-part, parallel and resumable
+
+Implements the Videos API flow: initializeUpload returns one upload URL
+per byte range, the parts are PUT in parallel through the shared LinkedIn
+client, finalizeUpload commits them by ETag, and the video is polled until
+LinkedIn has processed it before the post is created. Acknowledged parts
+are recorded in a sidecar file next to the video, so an upload that fails
+halfway resumes from where it stopped instead of starting over.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+import requests
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import settings
+from tools.linkedin_client import LinkedInClient, get_linkedin_client
+from tools.upload_stream import FileSlice, ProgressCallback, UploadProgress
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STATE_SUFFIX = ".linkedin-upload.json"
+
+# Upload URLs are short-lived, so older resume state is discarded
+UPLOAD_STATE_MAX_AGE = 8 * 3600
+
+INITIAL_POLL_INTERVAL = 2.0
+MAX_POLL_INTERVAL = 30.0
+
+
+@dataclass
+class UploadState:
+    """Progress of one video upload, persisted between attempts."""
+    video_urn: str
+    upload_token: str
+    file_size: int
+    file_mtime_ns: int
+    instructions: List[dict]
+    etags: Dict[str, str] = field(default_factory=dict)
+    finalized: bool = False
+    created_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["UploadState"]:
+        try:
+            return cls(**json.loads(path.read_text()))
+        except FileNotFoundError:
+            return None
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable upload state {path}: {e}")
+            return None
+
+    def save(self, path: Path) -> None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self)))
+        os.replace(tmp_path, path)
+
+    def matches(self, video_path: Path) -> bool:
+        """Whether this state belongs to the file as it is now and is still fresh."""
+        stat = video_path.stat()
+        return (
+            self.file_size == stat.st_size
+            and self.file_mtime_ns == stat.st_mtime_ns
+            and time.time() - self.created_at < UPLOAD_STATE_MAX_AGE
+        )
+
+    @property
+    def part_ids(self) -> List[str]:
+        """ETags of all parts, in upload instruction order."""
+        return [self.etags[str(index)] for index in range(len(self.instructions))]
+
+
+def upload_state_path(video_path: Path) -> Path:
+    """Sidecar file holding the resume state for a video."""
+    return video_path.with_name(video_path.name + UPLOAD_STATE_SUFFIX)
+
+
+class VideoUploader:
+    """Upload a video file to LinkedIn and publish it as a post."""
+
+    def __init__(
+        self,
+        client: Optional[LinkedInClient] = None,
+        workers: Optional[int] = None,
+        poll_timeout: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        """
+        Initialize the uploader.
+
+        Args:
+            client: API client, defaults to the shared get_linkedin_client()
+            workers: Parallel part uploads, defaults to settings.linkedin_upload_workers
+            poll_timeout: Seconds to wait for video processing,
+                defaults to settings.linkedin_video_poll_timeout
+            poll_interval: First delay between status polls (doubles up to
+                MAX_POLL_INTERVAL), defaults to INITIAL_POLL_INTERVAL
+        """
+        self.client = client or get_linkedin_client()
+        self.workers = max(1, workers or settings.linkedin_upload_workers)
+        self.poll_timeout = settings.linkedin_video_poll_timeout if poll_timeout is None else poll_timeout
+        self.poll_interval = poll_interval or INITIAL_POLL_INTERVAL
+        self.last_upload_metrics: Dict[str, float] = {}
+
+    def _owner(self) -> str:
+        return f"urn:li:person:{settings.linkedin_user_id}"
+
+    # -- upload -----------------------------------------------------------
+
+    def upload(self, video_path: Path, progress_callback: Optional[ProgressCallback] = None) -> str:
+        """
+        Upload a video, resuming a previous attempt if possible.
+
+        Args:
+            video_path: Video file to upload
+            progress_callback: Called with (bytes_sent, total_bytes) as parts are sent
+
+        Returns:
+            The video URN, once LinkedIn reports it as available
+
+        Raises:
+            RuntimeError: If any step of the upload fails
+        """
+        state_path = upload_state_path(video_path)
+        state = UploadState.load(state_path)
+        if state is not None and state.matches(video_path):
+            logger.info(f"Resuming upload of {video_path.name}: {len(state.etags)}/{len(state.instructions)} parts done")
+        else:
+            state = self._initialize(video_path)
+            state.save(state_path)
+
+        if not state.finalized:
+            self._upload_parts(video_path, state, state_path, progress_callback)
+            self._finalize(state)
+            state.finalized = True
+            state.save(state_path)
+
+        self._wait_until_available(state.video_urn)
+        return state.video_urn
+
+    def _initialize(self, video_path: Path) -> UploadState:
+        stat = video_path.stat()
+        response = self.client.post(
+            "/rest/videos?action=initializeUpload",
+            json={
+                "initializeUploadRequest": {
+                    "owner": self._owner(),
+                    "fileSizeBytes": stat.st_size,
+                    "uploadCaptions": False,
+                    "uploadThumbnail": False,
+                }
+            },
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to initialize video upload: {response.status_code} - {response.text}")
+
+        value = response.json()["value"]
+        logger.info(f"Registered video upload {value['video']} in {len(value['uploadInstructions'])} parts")
+        return UploadState(
+            video_urn=value["video"],
+            upload_token=value.get("uploadToken", ""),
+            file_size=stat.st_size,
+            file_mtime_ns=stat.st_mtime_ns,
+            instructions=value["uploadInstructions"],
+        )
+
+    def _upload_parts(
+        self,
+        video_path: Path,
+        state: UploadState,
+        state_path: Path,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> None:
+        """PUT every part that has not been acknowledged yet, in parallel."""
+        pending = [index for index in range(len(state.instructions)) if str(index) not in state.etags]
+        lock = threading.Lock()
+        # Parts acknowledged by an earlier attempt count as already sent
+        already_sent = sum(self._part_size(state.instructions[int(index)]) for index in state.etags)
+        progress = UploadProgress(state.file_size, progress_callback, video_path.name, already_sent)
+
+        def upload_part(index: int) -> None:
+            instruction = state.instructions[index]
+            # Streamed from disk: each worker holds one read chunk, not the whole part
+            body = FileSlice(
+                video_path, instruction["firstByte"], self._part_size(instruction), progress=progress
+            )
+            try:
+                response = self.client.put(
+                    instruction["uploadUrl"],
+                    headers={"Content-Type": "application/octet-stream"},
+                    data=body,
+                )
+            finally:
+                body.close()
+            etag = response.headers.get("ETag")
+            if response.status_code not in (200, 201) or not etag:
+                raise RuntimeError(
+                    f"Failed to upload part {index + 1}/{len(state.instructions)}: "
+                    f"{response.status_code} - {response.text}"
+                )
+            # Record the part right away so a later failure can resume after it
+            with lock:
+                state.etags[str(index)] = etag
+                state.save(state_path)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="linkedin-upload") as pool:
+            futures = [pool.submit(upload_part, index) for index in pending]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        self.last_upload_metrics = progress.log_summary()
+
+    @staticmethod
+    def _part_size(instruction: dict) -> int:
+        return instruction["lastByte"] - instruction["firstByte"] + 1
+
+    def _finalize(self, state: UploadState) -> None:
+        response = self.client.post(
+            "/rest/videos?action=finalizeUpload",
+            json={
+                "finalizeUploadRequest": {
+                    "video": state.video_urn,
+                    "uploadToken": state.upload_token,
+                    "uploadedPartIds": state.part_ids,
+                }
+            },
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to finalize video upload: {response.status_code} - {response.text}")
+
+    def _wait_until_available(self, video_urn: str) -> None:
+        """Poll the video status with exponential backoff until it is processed."""
+        deadline = time.monotonic() + self.poll_timeout
+        delay = self.poll_interval
+        while True:
+            response = self.client.get(f"/rest/videos/{quote(video_urn, safe='')}")
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to get video status: {response.status_code} - {response.text}")
+
+            status = response.json().get("status")
+            if status == "AVAILABLE":
+                logger.info(f"Video {video_urn} is available")
+                return
+            if status == "PROCESSING_FAILED":
+                raise RuntimeError(f"LinkedIn failed to process video {video_urn}")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"Timed out waiting for video {video_urn} to be processed (status: {status})")
+            logger.debug(f"Video {video_urn} is {status}, checking again in {delay:.0f}s")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, MAX_POLL_INTERVAL)
+
+    # -- publishing -------------------------------------------------------
+
+    def create_post(self, post_text: str, video_urn: str) -> requests.Response:
+        """Create a public post with the uploaded video attached."""
+        return self.client.post(
+            "/rest/posts",
+            json={
+                "author": self._owner(),
+                "commentary": post_text,
+                "visibility": "PUBLIC",
+                "distribution": {
+                    "feedDistribution": "MAIN_FEED",
+                    "targetEntities": [],
+                    "thirdPartyDistributionChannels": [],
+                },
+                "content": {"media": {"id": video_urn}},
+                "lifecycleState": "PUBLISHED",
+                "isReshareDisabledByAuthor": False,
+            },
+        )
+
+    @staticmethod
+    def clear_state(video_path: Path) -> None:
+        """Forget the resume state once the video has been posted."""
+        upload_state_path(video_path).unlink(missing_ok=True)
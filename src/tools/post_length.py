@@ -0,0 +1,82 @@
+"""
+Post Length - Fitting generated posts to the length limit
+
+The LLM is given a token budget derived from ``max_post_length`` so it
+stops close to the limit instead of writing far past it. A post that still
+overshoots is trimmed after the last sentence that fits, keeping its
+trailing hashtag line, instead of being cut mid-word.
+"""
+import math
+import re
+
+# Average characters per token of English posts (hashtags, URLs and emojis are denser)
+CHARS_PER_TOKEN = 3.5
+
+ELLIPSIS = "…"
+
+_SENTENCE_END = re.compile(r"[.!?…](?=[\s\"')\]]|$)|\n[ \t]*\n")
+_HASHTAG_LINE = re.compile(r"\n\s*((?:#\w+[ \t]*)+)\s*$")
+
+
+def max_tokens_for_length(max_chars: int) -> int:
+    """Generation budget, in tokens, for a post of at most ``max_chars`` characters."""
+    return max(16, math.ceil(max_chars / CHARS_PER_TOKEN))
+
+
+def trim_to_sentence(text: str, limit: int, min_fraction: float = 0.5) -> str:
+    """
+    Shorten text to at most ``limit`` characters, ending at a sentence boundary.
+
+    A trailing hashtag line is kept if it takes at most a third of the limit.
+    Without a sentence boundary in the last ``1 - min_fraction`` of the limit
+    the text is cut at a word boundary and ends with an ellipsis.
+
+    Args:
+        text: Post text
+        limit: Maximum length in characters
+        min_fraction: Shortest acceptable result for a sentence cut, as a
+            fraction of the limit
+
+    Returns:
+        The text itself if it fits, otherwise the trimmed text
+    """
+    text = text.rstrip()
+    if len(text) <= limit:
+        return text
+
+    tags = _HASHTAG_LINE.search(text)
+    if tags and len(tags.group(1).strip()) + 2 <= limit // 3:
+        hashtags = tags.group(1).strip()
+        body = trim_to_sentence(text[:tags.start()], limit - len(hashtags) - 2, min_fraction)
+        return f"{body}\n\n{hashtags}"
+
+    end = None
+    for match in _SENTENCE_END.finditer(text, 0, limit + 1):
+        if match.end() <= limit:
+            end = match.end()
+    if end is not None and end >= limit * min_fraction:
+        return text[:end].rstrip()
+
+    cut = text[:limit - len(ELLIPSIS)]
+    space = max(cut.rfind(" "), cut.rfind("\n"))
+    if space > 0:
+        cut = cut[:space]
+    return cut.rstrip(" \n,;:-") + ELLIPSIS
+
+
+def end_at_sentence(text: str) -> str:
+    """
+    Drop the unfinished last sentence of a generation stopped by its token limit.
+
+    The text is kept up to its last complete sentence, however short that
+    leaves it: a short post of whole sentences reads better than a long one
+    ending in a fragment. Only text without any finished sentence is
+    closed with an ellipsis instead.
+    """
+    text = text.rstrip()
+    if not text or _HASHTAG_LINE.search(text):
+        return text
+    ends = [match.end() for match in _SENTENCE_END.finditer(text)]
+    if not ends:
+        return text.rstrip(" ,;:-") + ELLIPSIS
+    return text[:ends[-1]].rstrip()
@@ -1,22 +1,32 @@
 """
 Post to LinkedIn Tool - Publishes content to LinkedIn
 """
-from typing import Optional, Type
+from typing import Callable, Optional, Type
 from langchain_core.tools import BaseTool
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
 from pydantic import BaseModel, Field
 from pathlib import Path
-import requests
+import asyncio
 import json
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config import settings
+from dedup import DuplicateMatch, get_post_index
+from metrics import DUPLICATE_POSTS
+from tracing import emit_event
+from tools.linkedin_client import LinkedInClient, get_linkedin_client
+from tools.linkedin_video import VideoUploader
+from tools.upload_stream import FileSlice, UploadProgress
 import logging
 
 logger = logging.getLogger(__name__)
 
+UGC_POSTS_PATH = "/v2/ugcPosts"
+REGISTER_UPLOAD_PATH = "/v2/assets?action=registerUpload"
+RESTLI_HEADERS = {"X-Restli-Protocol-Version": "2.0.0"}
+
 
 class PostToLinkedInInput(BaseModel):
     """Input schema for the PostToLinkedIn tool."""
@@ -46,6 +56,8 @@ class PostToLinkedInTool(BaseTool):
     Returns confirmation of the post or error message.
     """
     args_schema: Type[BaseModel] = PostToLinkedInInput
+    # Called with (bytes_sent, total_bytes) while media is uploaded
+    progress_callback: Optional[Callable[[int, int], None]] = None
     
     def _run(
         self,
@@ -60,6 +72,9 @@ class PostToLinkedInTool(BaseTool):
         # Check if auto-posting is enabled
         if not settings.auto_post:
             logger.info("Auto-post is disabled. Content prepared but not posted.")
+            duplicate = self._find_duplicate(post_text)
+            if duplicate is not None:
+                logger.warning(f"{duplicate.describe()}; it would not be published")
             return self._preview_post(post_text, video_path, image_path)
         
         # Validate credentials
@@ -68,6 +83,13 @@ class PostToLinkedInTool(BaseTool):
             logger.error(error_msg)
             return f"Error: {error_msg}"
         
+        # Never publish (nearly) the same post twice
+        duplicate = self._find_duplicate(post_text)
+        if duplicate is not None:
+            DUPLICATE_POSTS.inc()
+            logger.error(f"Not posting: {duplicate.describe()}")
+            return f"Error: {duplicate.describe()}. Edit the post, or set DEDUP_ENABLED=false to publish it anyway."
+        
         try:
             # Post to LinkedIn
             if video_path:
@@ -81,6 +103,16 @@ class PostToLinkedInTool(BaseTool):
             logger.error(f"Error posting to LinkedIn: {e}")
             return f"Error posting to LinkedIn: {str(e)}"
     
+    def _find_duplicate(self, post_text: str) -> Optional[DuplicateMatch]:
+        """The already published post this one nearly duplicates, if any."""
+        if not settings.dedup_enabled:
+            return None
+        try:
+            return get_post_index().find_duplicate(post_text)
+        except Exception as e:
+            logger.warning(f"Duplicate check skipped, the post index is unavailable: {e}")
+            return None
+    
     def _preview_post(self, post_text: str, video_path: str, image_path: str) -> str:
         """Create a preview of the post without actually posting."""
         preview = f"""
@@ -101,44 +133,75 @@ To enable auto-posting, set AUTO_POST=true in .env
         print(preview)
         return "Post prepared successfully. Preview shown above."
     
-    def _post_text_only(self, post_text: str) -> str:
-        """Post text-only content to LinkedIn."""
-        logger.info("Posting text-only to LinkedIn")
-        
-        url = "https://api.linkedin.com/v2/ugcPosts"
-        headers = {
-            "Authorization": f"Bearer {settings.linkedin_access_token}",
-            "Content-Type": "application/json",
-            "X-Restli-Protocol-Version": "2.0.0"
+    def _share_payload(self, post_text: str, media_urn: Optional[str] = None) -> dict:
+        """Build a ugcPosts payload, optionally with an image attachment."""
+        share_content = {
+            "shareCommentary": {
+                "text": post_text
+            },
+            "shareMediaCategory": "IMAGE" if media_urn else "NONE"
         }
+        if media_urn:
+            share_content["media"] = [
+                {
+                    "status": "READY",
+                    "media": media_urn
+                }
+            ]
         
-        payload = {
+        return {
             "author": f"urn:li:person:{settings.linkedin_user_id}",
             "lifecycleState": "PUBLISHED",
             "specificContent": {
-                "com.linkedin.ugc.ShareContent": {
-                    "shareCommentary": {
-                        "text": post_text
-                    },
-                    "shareMediaCategory": "NONE"
-                }
+                "com.linkedin.ugc.ShareContent": share_content
             },
             "visibility": {
                 "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
             }
         }
-        
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code == 201:
-            post_id = response.json().get("id")
-            logger.info(f"Post published successfully: {post_id}")
-            return f"✅ Post published successfully! Post ID: {post_id}"
+    
+    def _register_image_payload(self) -> dict:
+        """Build the registerUpload payload for a feed image."""
+        return {
+            "registerUploadRequest": {
+                "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
+                "owner": f"urn:li:person:{settings.linkedin_user_id}",
+                "serviceRelationships": [
+                    {
+                        "relationshipType": "OWNER",
+                        "identifier": "urn:li:userGeneratedContent"
+                    }
+                ]
+            }
+        }
+    
+    def _publish_result(self, status_code: int, body: dict, text: str, label: str, post_text: str) -> str:
+        """Turn a ugcPosts response into the tool's result message, indexing published posts."""
+        if status_code == 201:
+            post_id = body.get("id")
+            logger.info(f"{label} published successfully: {post_id}")
+            emit_event("linkedin_post", post_id=post_id)
+            try:
+                get_post_index().add(post_text, post_id or "")
+            except Exception as e:
+                # The post is live; a missing index entry must not report it as failed
+                logger.warning(f"Could not add post {post_id} to the duplicate index: {e}")
+            return f"✅ {label} published successfully! Post ID: {post_id}"
         else:
-            error_msg = f"Failed to post: {response.status_code} - {response.text}"
+            error_msg = f"Failed to post: {status_code} - {text}"
             logger.error(error_msg)
             return f"Error: {error_msg}"
     
+    def _post_text_only(self, post_text: str) -> str:
+        """Post text-only content to LinkedIn."""
+        logger.info("Posting text-only to LinkedIn")
+        
+        response = get_linkedin_client().post(
+            UGC_POSTS_PATH, headers=RESTLI_HEADERS, json=self._share_payload(post_text)
+        )
+        body = response.json() if response.status_code == 201 else {}
+        return self._publish_result(response.status_code, body, response.text, "Post", post_text)
+    
     def _post_with_image(self, post_text: str, image_path: str) -> str:
         """Post with an image attachment."""
         logger.info(f"Posting with image: {image_path}")
@@ -147,99 +210,46 @@ To enable auto-posting, set AUTO_POST=true in .env
         image_urn = self._upload_image(image_path)
         if not image_urn:
             return "Error: Failed to upload image"
+        emit_event("linkedin_media", asset_urn=image_urn)
         
-        url = "https://api.linkedin.com/v2/ugcPosts"
-        headers = {
-            "Authorization": f"Bearer {settings.linkedin_access_token}",
-            "Content-Type": "application/json",
-            "X-Restli-Protocol-Version": "2.0.0"
-        }
-        
-        payload = {
-            "author": f"urn:li:person:{settings.linkedin_user_id}",
-            "lifecycleState": "PUBLISHED",
-            "specificContent": {
-                "com.linkedin.ugc.ShareContent": {
-                    "shareCommentary": {
-                        "text": post_text
-                    },
-                    "shareMediaCategory": "IMAGE",
-                    "media": [
-                        {
-                            "status": "READY",
-                            "media": image_urn
-                        }
-                    ]
-                }
-            },
-            "visibility": {
-                "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
-            }
-        }
-        
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code == 201:
-            post_id = response.json().get("id")
-            logger.info(f"Post with image published successfully: {post_id}")
-            return f"✅ Post with image published successfully! Post ID: {post_id}"
-        else:
-            error_msg = f"Failed to post: {response.status_code} - {response.text}"
-            logger.error(error_msg)
-            return f"Error: {error_msg}"
+        response = get_linkedin_client().post(
+            UGC_POSTS_PATH, headers=RESTLI_HEADERS, json=self._share_payload(post_text, image_urn)
+        )
+        body = response.json() if response.status_code == 201 else {}
+        return self._publish_result(response.status_code, body, response.text, "Post with image", post_text)
     
     def _post_with_video(self, post_text: str, video_path: str) -> str:
-        """Post with a video attachment."""
+        """Post with a video attachment (multi-part upload, then publish)."""
         logger.info(f"Posting with video: {video_path}")
         
-        # Note: Video posting to LinkedIn is more complex and requires:
-        # 1. Registering the upload
-        # 2. Uploading the video in chunks
-        # 3. Finalizing the upload
-        # 4. Creating the post with the video URN
+        path = Path(video_path)
+        if not path.exists():
+            return f"Error: Video file not found: {video_path}"
         
-        # For now, provide a simplified implementation
-        logger.warning("Video posting is a complex multi-step process")
+        uploader = VideoUploader()
+        video_urn = uploader.upload(path, progress_callback=self.progress_callback)
+        emit_event("linkedin_media", asset_urn=video_urn)
+        response = uploader.create_post(post_text, video_urn)
         
-        return """
-⚠️ Video posting requires additional setup.
-
-LinkedIn video posts require:
-1. Registering video upload
-2. Chunked upload process
-3. Video processing time
-
-For now, please:
-1. Upload the video manually from: {video_path}
-2. Or use the text-only post and add video later
-
-Future versions will support automated video posting.
-""".format(video_path=video_path)
+        # The REST posts API returns the new post's URN in a header
+        body = {"id": response.headers.get("x-restli-id")} if response.status_code == 201 else {}
+        result = self._publish_result(response.status_code, body, response.text, "Post with video", post_text)
+        if response.status_code == 201:
+            VideoUploader.clear_state(path)
+        return result
+    
+    def _media_body(self, path: str) -> FileSlice:
+        """A streamed upload body for a media file, reporting progress."""
+        body = FileSlice(path)
+        body.progress = UploadProgress(len(body), self.progress_callback, label=Path(path).name)
+        return body
     
     def _upload_image(self, image_path: str) -> Optional[str]:
         """Upload an image to LinkedIn and return the asset URN."""
         try:
             # Step 1: Register upload
-            register_url = "https://api.linkedin.com/v2/assets?action=registerUpload"
-            headers = {
-                "Authorization": f"Bearer {settings.linkedin_access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            register_payload = {
-                "registerUploadRequest": {
-                    "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
-                    "owner": f"urn:li:person:{settings.linkedin_user_id}",
-                    "serviceRelationships": [
-                        {
-                            "relationshipType": "OWNER",
-                            "identifier": "urn:li:userGeneratedContent"
-                        }
-                    ]
-                }
-            }
-            
-            response = requests.post(register_url, headers=headers, json=register_payload)
+            client = get_linkedin_client()
+            response = client.post(REGISTER_UPLOAD_PATH, json=self._register_image_payload())
             
             if response.status_code != 200:
                 logger.error(f"Failed to register upload: {response.text}")
@@ -249,20 +259,15 @@ Future versions will support automated video posting.
             upload_url = upload_info["value"]["uploadMechanism"]["com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"]["uploadUrl"]
             asset_urn = upload_info["value"]["asset"]
             
-            # Step 2: Upload the image
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-            
-            upload_headers = {
-                "Authorization": f"Bearer {settings.linkedin_access_token}",
-            }
-            
-            upload_response = requests.put(upload_url, headers=upload_headers, data=image_data)
+            # Step 2: Upload the image, streamed from disk
+            body = self._media_body(image_path)
+            upload_response = client.put(upload_url, data=body)
             
             if upload_response.status_code != 201:
                 logger.error(f"Failed to upload image: {upload_response.text}")
                 return None
             
+            body.progress.log_summary()
             logger.info(f"Image uploaded successfully: {asset_urn}")
             return asset_urn
             
@@ -275,15 +280,98 @@ Future versions will support automated video posting.
         post_text: str,
         video_path: str = "",
         image_path: str = "",
-        run_manager: Optional[CallbackManagerForToolRun] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
-        """Async version - for now just calls sync version."""
-        return self._run(
-            post_text=post_text,
-            video_path=video_path,
-            image_path=image_path,
-            run_manager=run_manager,
+        """Post content to LinkedIn without blocking the event loop."""
+        logger.info("Preparing to post to LinkedIn")
+        
+        # Check if auto-posting is enabled
+        if not settings.auto_post:
+            logger.info("Auto-post is disabled. Content prepared but not posted.")
+            duplicate = self._find_duplicate(post_text)
+            if duplicate is not None:
+                logger.warning(f"{duplicate.describe()}; it would not be published")
+            return self._preview_post(post_text, video_path, image_path)
+        
+        # Validate credentials
+        if not settings.linkedin_access_token or not settings.linkedin_user_id:
+            error_msg = "LinkedIn credentials not configured. Please set LINKEDIN_ACCESS_TOKEN and LINKEDIN_USER_ID."
+            logger.error(error_msg)
+            return f"Error: {error_msg}"
+        
+        # Never publish (nearly) the same post twice
+        duplicate = self._find_duplicate(post_text)
+        if duplicate is not None:
+            DUPLICATE_POSTS.inc()
+            logger.error(f"Not posting: {duplicate.describe()}")
+            return f"Error: {duplicate.describe()}. Edit the post, or set DEDUP_ENABLED=false to publish it anyway."
+        
+        try:
+            client = get_linkedin_client()
+            # Post to LinkedIn
+            if video_path:
+                # Parts are already uploaded in parallel on a thread pool
+                return await asyncio.to_thread(self._post_with_video, post_text, video_path)
+            elif image_path:
+                return await self._apost_with_image(client, post_text, image_path)
+            else:
+                return await self._apost_text_only(client, post_text)
+            
+        except Exception as e:
+            logger.error(f"Error posting to LinkedIn: {e}")
+            return f"Error posting to LinkedIn: {str(e)}"
+    
+    async def _apost_text_only(self, client: LinkedInClient, post_text: str) -> str:
+        """Async version of _post_text_only."""
+        logger.info("Posting text-only to LinkedIn")
+        
+        response = await client.apost(UGC_POSTS_PATH, headers=RESTLI_HEADERS, json=self._share_payload(post_text))
+        body = response.json() if response.status_code == 201 else {}
+        return self._publish_result(response.status_code, body, response.text, "Post", post_text)
+    
+    async def _apost_with_image(self, client: LinkedInClient, post_text: str, image_path: str) -> str:
+        """Async version of _post_with_image."""
+        logger.info(f"Posting with image: {image_path}")
+        
+        image_urn = await self._aupload_image(client, image_path)
+        if not image_urn:
+            return "Error: Failed to upload image"
+        emit_event("linkedin_media", asset_urn=image_urn)
+        
+        response = await client.apost(
+            UGC_POSTS_PATH, headers=RESTLI_HEADERS, json=self._share_payload(post_text, image_urn)
         )
+        body = response.json() if response.status_code == 201 else {}
+        return self._publish_result(response.status_code, body, response.text, "Post with image", post_text)
+    
+    async def _aupload_image(self, client: LinkedInClient, image_path: str) -> Optional[str]:
+        """Async version of _upload_image."""
+        try:
+            response = await client.apost(REGISTER_UPLOAD_PATH, json=self._register_image_payload())
+            
+            if response.status_code != 200:
+                logger.error(f"Failed to register upload: {response.text}")
+                return None
+            
+            upload_info = response.json()
+            mechanism = upload_info["value"]["uploadMechanism"]
+            upload_url = mechanism["com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"]["uploadUrl"]
+            asset_urn = upload_info["value"]["asset"]
+            
+            body = self._media_body(image_path)
+            upload_response = await client.aput(upload_url, content=body)
+            
+            if upload_response.status_code != 201:
+                logger.error(f"Failed to upload image: {upload_response.text}")
+                return None
+            
+            body.progress.log_summary()
+            logger.info(f"Image uploaded successfully: {asset_urn}")
+            return asset_urn
+            
+        except Exception as e:
+            logger.error(f"Error uploading image: {e}")
+            return None
 
 
 # Example usage
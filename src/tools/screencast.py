@@ -0,0 +1,157 @@
+"""
+Screencast Recorder - Captures a page through the Chromium DevTools screencast
+
+Frames from ``Page.startScreencast`` arrive as JPEG images whenever the
+page repaints. They are piped straight into ffmpeg at a constant frame
+rate (the latest frame is repeated when the page has not changed), so no
+intermediate webm is written and transcoded.
+"""
+import asyncio
+import base64
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import settings
+from tools.transcode import FFmpegTranscoder, TranscodeResult
+
+logger = logging.getLogger(__name__)
+
+
+class ScreencastRecorder:
+    """Record one page to a video file via CDP screencast frames and ffmpeg."""
+
+    def __init__(
+        self,
+        output_path: Path,
+        size: Tuple[int, int],
+        fps: Optional[int] = None,
+        quality: Optional[int] = None,
+        transcoder: Optional[FFmpegTranscoder] = None,
+    ):
+        """
+        Initialize the recorder.
+
+        Args:
+            output_path: Encoded video file to write
+            size: Output (width, height), also the maximum screencast frame size
+            fps: Output frame rate, defaults to settings.video_fps
+            quality: JPEG quality of screencast frames (0-100), defaults to
+                settings.video_screencast_quality
+            transcoder: ffmpeg encoder settings, defaults to FFmpegTranscoder()
+        """
+        self.output_path = output_path
+        self.size = size
+        self.fps = fps or settings.video_fps
+        self.quality = settings.video_screencast_quality if quality is None else quality
+        self.transcoder = transcoder or FFmpegTranscoder(fps=self.fps)
+        self.frames_received = 0
+        self.frames_written = 0
+        self._session = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._frame: Optional[bytes] = None
+        self._first_frame = asyncio.Event()
+        self._started_at = 0.0
+
+    async def start(self, context, page) -> None:
+        """Start ffmpeg and the screencast for ``page``."""
+        self._process = await asyncio.create_subprocess_exec(
+            *self.transcoder.pipe_command(self.output_path, self.size),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._session = await context.new_cdp_session(page)
+        self._session.on("Page.screencastFrame", self._on_frame)
+        width, height = self.size
+        await self._session.send("Page.startScreencast", {
+            "format": "jpeg",
+            "quality": self.quality,
+            "maxWidth": width,
+            "maxHeight": height,
+            "everyNthFrame": 1,
+        })
+        self._writer = asyncio.create_task(self._write_frames())
+
+    async def _on_frame(self, params: dict) -> None:
+        self._frame = base64.b64decode(params["data"])
+        self.frames_received += 1
+        self._first_frame.set()
+        try:
+            # Chromium sends the next frame only after this one is acknowledged
+            await self._session.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})
+        except Exception as e:
+            logger.debug(f"Could not acknowledge screencast frame: {e}")
+
+    async def _write_frames(self) -> None:
+        """Feed ffmpeg the latest frame at a constant rate, catching up if delayed."""
+        await self._first_frame.wait()
+        loop = asyncio.get_running_loop()
+        self._started_at = loop.time()
+        interval = 1 / self.fps
+        while True:
+            due = int((loop.time() - self._started_at) * self.fps) + 1
+            while self.frames_written < due:
+                self._process.stdin.write(self._frame)
+                self.frames_written += 1
+            await self._process.stdin.drain()
+            await asyncio.sleep(self._started_at + self.frames_written * interval - loop.time())
+
+    async def stop(self) -> TranscodeResult:
+        """
+        Stop capturing and wait for ffmpeg to finish the file.
+
+        Raises:
+            RuntimeError: If no frame was captured or ffmpeg failed
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await self._session.send("Page.stopScreencast")
+        except Exception as e:
+            logger.debug(f"Could not stop screencast: {e}")
+        await self._stop_writer()
+        if self._frame is not None and not self.frames_written:
+            # Very short recordings may end before the writer's first tick
+            self._process.stdin.write(self._frame)
+            self.frames_written = 1
+
+        encode_start = loop.time()
+        self._process.stdin.close()
+        _, stderr = await self._process.communicate()
+        if self._process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {self._process.returncode}: {stderr.decode().strip()}")
+        if not self.frames_written:
+            raise RuntimeError("No screencast frames were captured")
+
+        logger.info(
+            f"Screencast captured {self.frames_received} frames, "
+            f"wrote {self.frames_written} at {self.fps} fps"
+        )
+        return TranscodeResult(
+            output_path=self.output_path,
+            backend="screencast",
+            media_seconds=self.frames_written / self.fps,
+            elapsed_seconds=loop.time() - encode_start,
+            frames=self.frames_written,
+        )
+
+    async def abort(self) -> None:
+        """Stop capturing and kill ffmpeg without waiting for a usable file."""
+        await self._stop_writer()
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+
+    async def _stop_writer(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.cancel()
+        try:
+            await self._writer
+        except (asyncio.CancelledError, BrokenPipeError, ConnectionResetError):
+            pass
+        self._writer = None
@@ -0,0 +1,118 @@
+"""
+Scroll Driver - Smooth in-page scrolling for demo recordings
+
+A single script is injected into the page and drives scrolling from
+requestAnimationFrame with easing, optional pause points and live
+re-measurement of the page height (so lazily loaded content is still
+reached). Python only awaits the promise it returns, so there is no
+per-step round-trip to the browser.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import settings
+
+
+SCROLL_SCRIPT = """
+async ({ durationMs, speed, pauses, pauseMs }) => {
+    const root = document.scrollingElement || document.documentElement;
+    const maxScroll = () => Math.max(0, root.scrollHeight - window.innerHeight);
+    const ease = (t) => (t < 0.5 ? 4 * t * t * t : 1 - Math.pow(-2 * t + 2, 3) / 2);
+
+    // Scroll targets as fractions of the page; every stop except the last pauses
+    const stops = pauses.filter((p) => p > 0 && p < 1).sort((a, b) => a - b);
+    stops.push(1);
+    const travelMs = Math.max(durationMs * 0.2, durationMs - pauseMs * (stops.length - 1));
+
+    return new Promise((resolve) => {
+        const start = performance.now();
+        let frames = 0;
+        let index = 0;
+        let segmentStart = start;
+        let fromY = root.scrollTop;
+        let previousStop = 0;
+        let pausedUntil = 0;
+
+        const segmentMs = () => {
+            if (speed > 0) {
+                return (Math.abs(stops[index] * maxScroll() - fromY) / speed) * 1000;
+            }
+            return travelMs * (stops[index] - previousStop);
+        };
+        let currentSegmentMs = segmentMs();
+
+        const step = (now) => {
+            frames += 1;
+            if (now - start >= durationMs) {
+                resolve({ frames, scrollHeight: root.scrollHeight, position: root.scrollTop });
+                return;
+            }
+            if (now < pausedUntil) {
+                requestAnimationFrame(step);
+                return;
+            }
+            if (index < stops.length) {
+                // Re-measure every frame so content loaded while scrolling is included
+                const target = stops[index] * maxScroll();
+                const t = currentSegmentMs > 0 ? Math.min(1, (now - segmentStart) / currentSegmentMs) : 1;
+                window.scrollTo(0, fromY + (target - fromY) * ease(t));
+                if (t >= 1) {
+                    if (index < stops.length - 1) {
+                        pausedUntil = now + pauseMs;
+                    }
+                    previousStop = stops[index];
+                    fromY = target;
+                    index += 1;
+                    segmentStart = Math.max(now, pausedUntil);
+                    if (index < stops.length) {
+                        currentSegmentMs = segmentMs();
+                    }
+                }
+            }
+            requestAnimationFrame(step);
+        };
+        requestAnimationFrame(step);
+    });
+}
+"""
+
+
+def scroll_options(
+    duration: float,
+    speed: Optional[float] = None,
+    pauses: Optional[List[float]] = None,
+    pause_ms: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Build the options passed to SCROLL_SCRIPT.
+
+    Args:
+        duration: Total scrolling time in seconds
+        speed: Scroll speed in pixels per second, 0 to fit one pass into the duration
+        pauses: Page fractions (0-1) at which to pause
+        pause_ms: Length of each pause in milliseconds
+    """
+    return {
+        "durationMs": max(0, int(duration * 1000)),
+        "speed": settings.video_scroll_speed if speed is None else speed,
+        "pauses": list(settings.video_scroll_pauses if pauses is None else pauses),
+        "pauseMs": settings.video_scroll_pause_ms if pause_ms is None else pause_ms,
+    }
+
+
+async def drive_scroll(page, duration: float, **options) -> Dict[str, Any]:
+    """
+    Scroll the page for ``duration`` seconds and wait until it is done.
+
+    Args:
+        page: Playwright async Page
+        duration: Total scrolling time in seconds
+        **options: Overrides for scroll_options (speed, pauses, pause_ms)
+
+    Returns:
+        Stats reported by the page (frames rendered, final height and position)
+    """
+    return await page.evaluate(SCROLL_SCRIPT, scroll_options(duration, **options))
@@ -0,0 +1,234 @@
+"""
+Video Transcoding - Converts Playwright's webm recordings
+
+Two backends are available: a local ffmpeg (H.264 via libx264, the
+preferred path) and the original OpenCV frame loop, which is only used
+when ffmpeg is not installed.
+"""
+import logging
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TranscodeResult:
+    """Outcome of a transcode, including how fast it ran."""
+    output_path: Path
+    backend: str
+    media_seconds: float
+    elapsed_seconds: float
+    frames: int = 0
+
+    @property
+    def speed(self) -> float:
+        """Encode speed as a multiple of realtime (2.0 = twice as fast as playback)."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.media_seconds / self.elapsed_seconds
+
+
+class Transcoder:
+    """Base class for video transcoder backends."""
+
+    name = "base"
+
+    def transcode(self, input_path: Path, output_path: Path) -> TranscodeResult:
+        raise NotImplementedError
+
+
+class FFmpegTranscoder(Transcoder):
+    """Transcode with a local ffmpeg binary (libx264, configurable preset/CRF/threads)."""
+
+    name = "ffmpeg"
+
+    def __init__(
+        self,
+        executable: Optional[str] = None,
+        preset: Optional[str] = None,
+        crf: Optional[int] = None,
+        threads: Optional[int] = None,
+        fps: Optional[int] = None,
+    ):
+        self.executable = executable or settings.ffmpeg_path
+        self.preset = preset or settings.ffmpeg_preset
+        self.crf = settings.ffmpeg_crf if crf is None else crf
+        self.threads = settings.ffmpeg_threads if threads is None else threads
+        self.fps = fps or settings.video_fps
+
+    @classmethod
+    def available(cls, executable: Optional[str] = None) -> bool:
+        """Whether the configured ffmpeg binary can be found."""
+        return shutil.which(executable or settings.ffmpeg_path) is not None
+
+    def encoder_args(self, size: Optional[Tuple[int, int]] = None) -> List[str]:
+        """
+        H.264 output options shared by file and streaming inputs.
+
+        Args:
+            size: Fixed output (width, height); by default the input size is
+                kept, rounded down to even dimensions
+        """
+        if size:
+            width, height = size
+            # libx264 with yuv420p requires even dimensions
+            scale = f"scale={width - width % 2}:{height - height % 2}"
+        else:
+            scale = "scale=trunc(iw/2)*2:trunc(ih/2)*2"
+        return [
+            "-c:v", "libx264",
+            "-preset", self.preset,
+            "-crf", str(self.crf),
+            "-pix_fmt", "yuv420p",
+            "-vf", scale,
+            "-r", str(self.fps),
+            "-threads", str(self.threads),
+            "-movflags", "+faststart",
+            "-an",
+        ]
+
+    def command(self, input_path: Path, output_path: Path) -> List[str]:
+        """Build the ffmpeg command line for a file-to-file transcode."""
+        return [
+            self.executable,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-nostats",
+            "-progress", "pipe:1",
+            "-y",
+            "-i", str(input_path),
+            *self.encoder_args(),
+            str(output_path),
+        ]
+
+    def pipe_command(self, output_path: Path, size: Optional[Tuple[int, int]] = None) -> List[str]:
+        """Build the ffmpeg command line for JPEG frames streamed on stdin at self.fps."""
+        return [
+            self.executable,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-nostats",
+            "-y",
+            "-f", "image2pipe",
+            "-c:v", "mjpeg",
+            "-framerate", str(self.fps),
+            "-i", "pipe:0",
+            *self.encoder_args(size),
+            str(output_path),
+        ]
+
+    @staticmethod
+    def parse_progress(progress: str) -> float:
+        """Return the encoded media duration (seconds) from ffmpeg -progress output."""
+        media_seconds = 0.0
+        for line in progress.splitlines():
+            key, _, value = line.partition("=")
+            # out_time_ms is reported in microseconds despite its name
+            if key in ("out_time_us", "out_time_ms") and value.strip().lstrip("-").isdigit():
+                media_seconds = max(media_seconds, int(value) / 1_000_000)
+        return media_seconds
+
+    @staticmethod
+    def parse_frames(progress: str) -> int:
+        """Return the number of frames encoded from ffmpeg -progress output."""
+        frames = 0
+        for line in progress.splitlines():
+            key, _, value = line.partition("=")
+            if key == "frame" and value.strip().isdigit():
+                frames = max(frames, int(value))
+        return frames
+
+    def transcode(self, input_path: Path, output_path: Path) -> TranscodeResult:
+        start = time.perf_counter()
+        completed = subprocess.run(
+            self.command(input_path, output_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {completed.returncode}: {completed.stderr.strip()}")
+        return TranscodeResult(
+            output_path=output_path,
+            backend=self.name,
+            media_seconds=self.parse_progress(completed.stdout),
+            elapsed_seconds=time.perf_counter() - start,
+            frames=self.parse_frames(completed.stdout),
+        )
+
+
+class OpenCVTranscoder(Transcoder):
+    """Frame-by-frame re-encode with OpenCV (mp4v); slow, kept as a fallback."""
+
+    name = "opencv"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import cv2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def transcode(self, input_path: Path, output_path: Path) -> TranscodeResult:
+        import cv2
+
+        start = time.perf_counter()
+
+        # Read the video
+        cap = cv2.VideoCapture(str(input_path))
+        fps = cap.get(cv2.CAP_PROP_FPS) or settings.video_fps
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        # Define codec and create VideoWriter
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(str(output_path), fourcc, int(fps), (width, height))
+
+        frames = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+            frames += 1
+
+        cap.release()
+        out.release()
+        return TranscodeResult(
+            output_path=output_path,
+            backend=self.name,
+            media_seconds=frames / fps if fps else 0.0,
+            elapsed_seconds=time.perf_counter() - start,
+            frames=frames,
+        )
+
+
+def get_transcoder(backend: Optional[str] = None) -> Optional[Transcoder]:
+    """
+    Pick a transcoder backend.
+
+    Args:
+        backend: "auto", "ffmpeg" or "opencv", defaults to settings.video_transcoder
+
+    Returns:
+        A transcoder, or None if no backend is available
+    """
+    backend = backend or settings.video_transcoder
+    if backend in ("auto", "ffmpeg") and FFmpegTranscoder.available():
+        return FFmpegTranscoder()
+    if backend == "ffmpeg":
+        logger.warning(f"ffmpeg not found at '{settings.ffmpeg_path}', falling back to OpenCV")
+    if OpenCVTranscoder.available():
+        return OpenCVTranscoder()
+    return None
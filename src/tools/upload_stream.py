@@ -0,0 +1,165 @@
+"""
+Upload Streams - Constant-memory request bodies for media uploads
+
+``FileSlice`` exposes a byte range of a file as a file-like, iterable and
+async-iterable body, so requests/httpx read it from disk in bounded chunks
+instead of the whole file being loaded into memory first. Bytes sent are
+reported to an ``UploadProgress``, which aggregates the parts of an upload,
+calls an optional progress callback and measures throughput, which is
+logged, reported to the run trace and recorded in the metrics registry.
+"""
+import asyncio
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+from metrics import UPLOAD_BYTES, UPLOAD_THROUGHPUT
+from tracing import emit_event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Called with (bytes_sent, total_bytes)
+ProgressCallback = Callable[[int, int], None]
+
+
+class UploadProgress:
+    """Bytes sent across all parts of one upload, with throughput."""
+
+    def __init__(
+        self,
+        total: int,
+        callback: Optional[ProgressCallback] = None,
+        label: str = "upload",
+        already_sent: int = 0,
+    ):
+        """
+        Args:
+            total: Size of the upload in bytes
+            callback: Called with (bytes_sent, total) as data is sent, at most
+                once per percent of progress
+            label: Name used in log messages
+            already_sent: Bytes sent by an earlier, resumed attempt (counted
+                for progress but not for throughput)
+        """
+        self.total = total
+        self.callback = callback
+        self.label = label
+        self.already_sent = already_sent
+        self.sent = already_sent
+        self._reported = -1
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def advance(self, delta: int) -> None:
+        """Add (or, when a part is re-sent, subtract) bytes sent."""
+        with self._lock:
+            self.sent += delta
+            sent = self.sent
+            percent = sent * 100 // self.total if self.total else 100
+            if self.callback is None or (percent == self._reported and sent != self.total):
+                return
+            self._reported = percent
+        self.callback(sent, self.total)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def metrics(self) -> Dict[str, float]:
+        """Bytes sent in this attempt, elapsed seconds and throughput in bytes per second."""
+        elapsed = self.elapsed
+        sent = self.sent - self.already_sent
+        return {
+            "bytes": sent,
+            "seconds": round(elapsed, 3),
+            "bytes_per_second": round(sent / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def log_summary(self) -> Dict[str, float]:
+        metrics = self.metrics()
+        logger.info(
+            f"Uploaded {self.label}: {metrics['bytes'] / 1e6:.1f} MB in {metrics['seconds']:.1f}s "
+            f"({metrics['bytes_per_second'] / 1e6:.2f} MB/s)"
+        )
+        emit_event("media_upload", file=self.label, **metrics)
+        UPLOAD_BYTES.inc(metrics["bytes"])
+        UPLOAD_THROUGHPUT.observe(metrics["bytes_per_second"])
+        return metrics
+
+
+class FileSlice:
+    """
+    A byte range of a file, read lazily in chunks of at most ``chunk_size``.
+
+    ``len()`` gives the exact size so HTTP clients send a Content-Length
+    instead of chunked encoding. ``rewind()`` restarts the body so a failed
+    request can be retried.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int = 0,
+        length: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[UploadProgress] = None,
+    ):
+        self.path = Path(path)
+        self.offset = offset
+        self.length = self.path.stat().st_size - offset if length is None else length
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.position = 0
+        self._file = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next chunk; never more than chunk_size bytes at once."""
+        remaining = self.length - self.position
+        if remaining <= 0:
+            self.close()
+            return b""
+        if size is None or size < 0 or size > self.chunk_size:
+            size = self.chunk_size
+        if self._file is None:
+            self._file = open(self.path, "rb")
+            self._file.seek(self.offset + self.position)
+        data = self._file.read(min(size, remaining))
+        self.position += len(data)
+        if self.progress is not None:
+            self.progress.advance(len(data))
+        if not data:
+            self.close()
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            data = self.read()
+            if not data:
+                return
+            yield data
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            data = await asyncio.to_thread(self.read)
+            if not data:
+                return
+            yield data
+
+    def rewind(self) -> None:
+        """Start over from the beginning of the slice (before a retry)."""
+        if self.progress is not None and self.position:
+            self.progress.advance(-self.position)
+        self.position = 0
+        self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
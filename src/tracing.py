@@ -0,0 +1,443 @@
+"""
+CarbonTrack AI Agent - Run Tracing
+
+``TracingCallbackHandler`` is a LangChain callback handler that records a
+span for every chain, LLM call, tool call and agent iteration of a run, with
+start/end times, token counts and the media metrics tools report through
+``emit_event`` (bytes uploaded, frames encoded). Finished traces are written
+to a local file as JSON lines, either one span per line or as OpenTelemetry
+OTLP/JSON export requests, so they can be loaded into any OTLP backend.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import settings, OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+TRACES_DIR = OUTPUT_DIR / "traces"
+
+# OTLP span kinds and status codes
+_OTLP_KIND_INTERNAL = 1
+_OTLP_KIND_CLIENT = 3
+_OTLP_STATUS_OK = 1
+_OTLP_STATUS_ERROR = 2
+
+
+def emit_event(name: str, **data: Any) -> None:
+    """
+    Attach metrics to the span of the tool or chain currently running.
+
+    A no-op outside a traced run, so tools can call it unconditionally.
+
+    Args:
+        name: Event name (e.g. ``media_upload``)
+        **data: JSON-serializable event attributes
+    """
+    from langchain_core.callbacks.manager import dispatch_custom_event
+
+    try:
+        dispatch_custom_event(name, data)
+    except RuntimeError:
+        # Not inside a run (no parent run id), nobody is listening
+        pass
+
+
+@dataclass
+class Span:
+    """One timed operation of a run."""
+    name: str
+    kind: str  # run, chain, llm, tool or agent_iteration
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    status: str = "ok"
+    error: str = ""
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["duration_ms"] = self.duration_ms
+        return data
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records a span tree for one or more agent runs."""
+
+    # Callbacks run on the thread doing the work, so timestamps are exact
+    run_inline = True
+
+    def __init__(self, service_name: str = "carbontrack"):
+        self.service_name = service_name
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._open: Dict[UUID, Span] = {}
+        self._root: Optional[Span] = None
+        # Agent executor run id -> open iteration span, iteration count, last iteration end
+        self._iterations: Dict[UUID, Span] = {}
+        self._iteration_counts: Dict[UUID, int] = {}
+        self._iteration_marks: Dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+    # -- span bookkeeping ---------------------------------------------------
+
+    def _parent_id(self, parent_run_id: Optional[UUID]) -> Optional[str]:
+        if parent_run_id is not None:
+            parent = self._iterations.get(parent_run_id) or self._open.get(parent_run_id)
+            if parent is not None:
+                return parent.span_id
+        return self._root.span_id if self._root else None
+
+    def _start(
+        self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str, **attributes: Any
+    ) -> Span:
+        with self._lock:
+            span = Span(
+                name=name,
+                kind=kind,
+                trace_id=self.trace_id,
+                span_id=_new_span_id(),
+                parent_id=self._parent_id(parent_run_id),
+                start_ns=time.time_ns(),
+                attributes={key: value for key, value in attributes.items() if value is not None},
+            )
+            self._open[run_id] = span
+            self.spans.append(span)
+        return span
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> Optional[Span]:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return None
+            span.end_ns = time.time_ns()
+            span.attributes.update({key: value for key, value in attributes.items() if value is not None})
+            if error is not None:
+                span.status = "error"
+                span.error = f"{type(error).__name__}: {error}"
+        return span
+
+    @staticmethod
+    def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], default: str) -> str:
+        if kwargs.get("name"):
+            return kwargs["name"]
+        if serialized:
+            if serialized.get("name"):
+                return serialized["name"]
+            if serialized.get("id"):
+                return serialized["id"][-1]
+        return default
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """
+        Record a root span around a run; spans without a parent attach to it.
+
+        Args:
+            name: Root span name
+            **attributes: Attributes of the root span
+
+        Yields:
+            The root span
+        """
+        root = Span(
+            name=name,
+            kind="run",
+            trace_id=self.trace_id,
+            span_id=_new_span_id(),
+            parent_id=None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes),
+        )
+        with self._lock:
+            self._root = root
+            self.spans.append(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.status = "error"
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            with self._lock:
+                self._root = None
+
+    # -- chains ---------------------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chain"), "chain")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close_iteration(run_id, final=True)
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close_iteration(run_id, final=True)
+        self._end(run_id, error=error)
+
+    # -- LLM calls ------------------------------------------------------------
+
+    def _start_llm(self, serialized, run_id, parent_run_id, kwargs, prompt_chars: int) -> None:
+        params = kwargs.get("invocation_params") or {}
+        self._start(
+            run_id,
+            parent_run_id,
+            self._name(serialized, kwargs, "llm"),
+            "llm",
+            **{
+                "llm.model": params.get("model") or params.get("model_name"),
+                "llm.prompt_chars": prompt_chars,
+            },
+        )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start_llm(serialized, run_id, parent_run_id, kwargs, sum(len(prompt) for prompt in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        self._start_llm(serialized, run_id, parent_run_id, kwargs, chars)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            span = self._open.get(run_id)
+            if span is None:
+                return
+            if "llm.first_token_ms" not in span.attributes:
+                span.attributes["llm.first_token_ms"] = (time.time_ns() - span.start_ns) / 1_000_000
+            span.attributes["llm.streamed_chunks"] = span.attributes.get("llm.streamed_chunks", 0) + 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = None
+        completion_chars = 0
+        for generations in response.generations:
+            for generation in generations:
+                completion_chars += len(generation.text or "")
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens = (prompt_tokens or 0) + usage.get("input_tokens", 0)
+                    completion_tokens = (completion_tokens or 0) + usage.get("output_tokens", 0)
+
+        # Providers that only report usage in llm_output (e.g. older OpenAI clients)
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        if prompt_tokens is None and token_usage:
+            prompt_tokens = token_usage.get("prompt_tokens")
+            completion_tokens = token_usage.get("completion_tokens")
+
+        self._end(
+            run_id,
+            **{
+                "llm.prompt_tokens": prompt_tokens,
+                "llm.completion_tokens": completion_tokens,
+                "llm.completion_chars": completion_chars,
+            },
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # -- tools ----------------------------------------------------------------
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(
+            run_id,
+            parent_run_id,
+            self._name(serialized, kwargs, "tool"),
+            "tool",
+            **{"tool.input_chars": len(str(input_str))},
+        )
+
+    def on_tool_end(self, output, *, run_id, parent_run_id=None, **kwargs):
+        text = str(getattr(output, "content", output))
+        span = self._end(run_id, **{"tool.output_chars": len(text)})
+        # Tools report failures as "Error..." strings rather than raising
+        if span is not None and text.startswith("Error"):
+            span.status = "error"
+            span.error = text
+        if parent_run_id is not None:
+            self._close_iteration(parent_run_id)
+
+    def on_tool_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self._end(run_id, error=error)
+        if parent_run_id is not None:
+            self._close_iteration(parent_run_id)
+
+    # -- agent iterations -----------------------------------------------------
+
+    def _open_iteration(self, run_id: UUID, parent_run_id: Optional[UUID], **attributes: Any) -> Span:
+        """Start an iteration span covering the planning since the previous iteration."""
+        with self._lock:
+            executor = self._open.get(run_id)
+            count = self._iteration_counts.get(run_id, 0) + 1
+            self._iteration_counts[run_id] = count
+            start_ns = self._iteration_marks.get(run_id) or (executor.start_ns if executor else time.time_ns())
+            span = Span(
+                name=f"agent.iteration {count}",
+                kind="agent_iteration",
+                trace_id=self.trace_id,
+                span_id=_new_span_id(),
+                parent_id=executor.span_id if executor else self._parent_id(parent_run_id),
+                start_ns=start_ns,
+                attributes={"agent.iteration": count, **attributes},
+            )
+            self._iterations[run_id] = span
+            self.spans.append(span)
+        return span
+
+    def _close_iteration(self, run_id: UUID, final: bool = False) -> None:
+        with self._lock:
+            span = self._iterations.pop(run_id, None)
+            if span is not None:
+                span.end_ns = time.time_ns()
+                self._iteration_marks[run_id] = span.end_ns
+            if final:
+                # The executor itself finished, forget its iteration state
+                self._iteration_counts.pop(run_id, None)
+                self._iteration_marks.pop(run_id, None)
+
+    def on_agent_action(self, action, *, run_id, parent_run_id=None, **kwargs):
+        self._open_iteration(run_id, parent_run_id, **{"agent.tool": action.tool})
+
+    def on_agent_finish(self, finish, *, run_id, parent_run_id=None, **kwargs):
+        self._open_iteration(run_id, parent_run_id, **{"agent.final": True})
+        self._close_iteration(run_id)
+
+    # -- tool metrics ---------------------------------------------------------
+
+    def on_custom_event(self, name, data, *, run_id, **kwargs):
+        with self._lock:
+            span = self._open.get(run_id)
+            if span is None:
+                return
+            attributes = dict(data) if isinstance(data, dict) else {"value": data}
+            span.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+            for key, value in attributes.items():
+                span.attributes[f"{name}.{key}"] = value
+
+    # -- export ---------------------------------------------------------------
+
+    def finished_spans(self) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.end_ns is not None]
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The finished spans as an OTLP/JSON ``ExportTraceServiceRequest``."""
+        spans = []
+        for span in self.finished_spans():
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": _OTLP_KIND_CLIENT if span.kind == "llm" else _OTLP_KIND_INTERNAL,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes({"carbontrack.span_kind": span.kind, **span.attributes}),
+                "events": [
+                    {
+                        "timeUnixNano": str(event["time_ns"]),
+                        "name": event["name"],
+                        "attributes": _otlp_attributes(event["attributes"]),
+                    }
+                    for event in span.events
+                ],
+                "status": (
+                    {"code": _OTLP_STATUS_ERROR, "message": span.error}
+                    if span.status == "error" else {"code": _OTLP_STATUS_OK}
+                ),
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "carbontrack.tracing"}, "spans": spans}],
+            }]
+        }
+
+    def export(self, path: Optional[Path] = None, format: Optional[str] = None) -> Path:
+        """
+        Append the finished spans to a trace file.
+
+        Args:
+            path: Output file (defaults to settings.trace_file, or a new
+                file per trace under output/traces/)
+            format: "jsonl" (one span per line) or "otlp" (one OTLP/JSON
+                request per line); defaults to settings.trace_format
+
+        Returns:
+            Path of the trace file
+        """
+        format = format or settings.trace_format
+        if path is None:
+            path = Path(settings.trace_file) if settings.trace_file else TRACES_DIR / f"{self.trace_id}.jsonl"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if format == "otlp":
+            lines = [json.dumps(self.to_otlp(), default=str)]
+        elif format == "jsonl":
+            lines = [json.dumps(span.to_dict(), default=str) for span in self.finished_spans()]
+        else:
+            raise ValueError(f"Unknown trace format: {format}")
+
+        with open(path, "a", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+        logger.info(f"Wrote trace {self.trace_id} to {path}")
+        return path
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Duration and key metrics of each LLM call, tool call and agent iteration."""
+        rows = []
+        for span in self.finished_spans():
+            if span.kind not in ("llm", "tool", "agent_iteration"):
+                continue
+            rows.append({
+                "name": span.name,
+                "kind": span.kind,
+                "duration_ms": span.duration_ms,
+                "status": span.status,
+                "attributes": span.attributes,
+            })
+        return rows
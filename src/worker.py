@@ -0,0 +1,257 @@
+"""
+CarbonTrack AI Agent - Job Queue Worker
+
+Runs promotion jobs from the durable job queue (see jobqueue.py) with a
+pool of concurrent workers. Each worker builds its agent once, claims a
+job, keeps its lease alive with heartbeats while the job runs, stores every
+stage result as it finishes and finally marks the job succeeded or failed.
+A retried job reuses the stages that succeeded in its earlier attempts.
+
+Usage:
+    python src/worker.py --concurrency 4
+    python src/worker.py --drain        # exit once the queue is empty
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import settings
+from jobqueue import Job, JobQueue, get_job_queue
+from metrics import JOBS_PROCESSED, QUEUE_DEPTH, serve_metrics, write_metrics
+from pipeline import is_tool_error
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Claims and runs queued jobs one at a time."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        agent_factory: Callable[[], Any],
+        worker_id: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            queue: Job queue to consume
+            agent_factory: Callable returning an object with a
+                ``run(input_data, on_stage, completed)`` method
+            worker_id: Unique name recorded on claimed jobs
+            poll_interval: Seconds to wait when the queue is empty,
+                defaults to settings.queue_poll_interval
+            stop_event: Set to make the worker exit after its current job
+        """
+        self.queue = queue
+        self.agent_factory = agent_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval if poll_interval is not None else settings.queue_poll_interval
+        self.stop_event = stop_event or threading.Event()
+        self._agent = None
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            self._agent = self.agent_factory()
+        return self._agent
+
+    def _heartbeat(self, job: Job, done: threading.Event) -> None:
+        interval = max(0.1, self.queue.visibility_timeout / 3)
+        while not done.wait(interval):
+            if not self.queue.heartbeat(job.id, self.worker_id):
+                logger.warning(f"Worker {self.worker_id} lost the lease on job {job.id}")
+                return
+
+    def process(self, job: Job) -> str:
+        """
+        Run one claimed job and record its outcome.
+
+        Returns:
+            The job's new status
+        """
+        logger.info(f"Worker {self.worker_id} running job {job.id} ({job.project_name}), attempt {job.attempts}")
+
+        # A previous attempt already published the post; running again would post twice
+        published = job.stages.get("post_to_linkedin")
+        if published is not None and not is_tool_error(published):
+            logger.info(f"Job {job.id} was already posted, completing from its stored stages")
+            self.queue.complete(job.id, self.worker_id, {"output": published, "stages": job.stages})
+            return "succeeded"
+
+        def record_stage(stage: str, result: Any) -> None:
+            self.queue.record_stage(job.id, stage, result)
+
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, done), name=f"heartbeat-{job.id}", daemon=True
+        )
+        heartbeat.start()
+        start = time.perf_counter()
+        try:
+            # Stages that succeeded in an earlier attempt are not run again
+            result = self.agent.run(job.input_data, on_stage=record_stage, completed=job.stages)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            return self.queue.fail(job.id, self.worker_id, str(e)) or "lost"
+        finally:
+            done.set()
+            heartbeat.join()
+
+        logger.info(f"Job {job.id} succeeded in {time.perf_counter() - start:.1f}s")
+        return "succeeded" if self.queue.complete(job.id, self.worker_id, result) else "lost"
+
+    def run_once(self) -> bool:
+        """Claim and run one job; False if the queue had nothing available."""
+        job = self.queue.claim(self.worker_id)
+        if job is None:
+            return False
+        JOBS_PROCESSED.inc(status=self.process(job))
+        return True
+
+    def run(self, drain: bool = False) -> None:
+        """
+        Process jobs until stopped.
+
+        Args:
+            drain: Exit once no job is queued or running instead of polling forever
+        """
+        logger.info(f"Worker {self.worker_id} started")
+        while not self.stop_event.is_set():
+            if self.run_once():
+                continue
+            if drain and self.queue.pending() == 0:
+                break
+            self.stop_event.wait(self.poll_interval)
+        logger.info(f"Worker {self.worker_id} stopped")
+
+
+def run_workers(
+    agent_factory: Callable[[], Any],
+    concurrency: Optional[int] = None,
+    queue: Optional[JobQueue] = None,
+    drain: bool = False,
+    stop_event: Optional[threading.Event] = None,
+    poll_interval: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Run a pool of workers against the queue.
+
+    Args:
+        agent_factory: Callable creating one agent per worker
+        concurrency: Number of workers, defaults to settings.queue_workers
+        queue: Job queue, defaults to the shared one in OUTPUT_DIR
+        drain: Return once the queue is empty
+        stop_event: Set to stop all workers after their current job
+        poll_interval: Seconds to wait when the queue is empty
+
+    Returns:
+        Number of jobs per status when the workers stopped
+    """
+    queue = queue or get_job_queue()
+    concurrency = max(1, concurrency or settings.queue_workers)
+    stop_event = stop_event or threading.Event()
+
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    workers = [
+        Worker(queue, agent_factory, f"{prefix}-{index}", poll_interval, stop_event)
+        for index in range(concurrency)
+    ]
+    threads = [
+        threading.Thread(target=worker.run, args=(drain,), name=f"worker-{index}")
+        for index, worker in enumerate(workers)
+    ]
+    logger.info(f"Starting {concurrency} workers on {queue.path}")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return queue.counts()
+
+
+def main(argv=None) -> int:
+    """Entry point for the worker process."""
+    parser = argparse.ArgumentParser(description="CarbonTrack Promoter - job queue worker")
+    parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=None,
+        help=f"Number of concurrent workers (default: {settings.queue_workers})"
+    )
+    parser.add_argument(
+        "--queue",
+        type=str,
+        help="Path of the SQLite job queue (default: output/jobs.sqlite3)"
+    )
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Exit once the queue is empty instead of waiting for new jobs"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "pipeline", "agent"],
+        default=None,
+        help=f"Execution mode: direct pipeline or LLM agent (default: {settings.execution_mode})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the generated post cache"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help=f"Serve Prometheus metrics on this port at /metrics (default: {settings.metrics_port or 'off'})"
+    )
+    args = parser.parse_args(argv)
+
+    from main import build_agent, setup_logging
+    setup_logging()
+
+    queue = JobQueue(args.queue) if args.queue else get_job_queue()
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Stopping workers after their current jobs...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    metrics_port = settings.metrics_port if args.metrics_port is None else args.metrics_port
+    if metrics_port:
+        # Queue depth is read from the database on every scrape
+        QUEUE_DEPTH.set_function(lambda: {(status,): count for status, count in queue.counts().items()})
+        serve_metrics(metrics_port, settings.metrics_host)
+
+    counts = run_workers(
+        lambda: build_agent(use_cache=not args.no_cache, mode=args.mode),
+        concurrency=args.concurrency,
+        queue=queue,
+        drain=args.drain,
+        stop_event=stop_event,
+    )
+    logger.info("Job queue: " + ", ".join(f"{status} {count}" for status, count in counts.items()))
+    if settings.metrics_file:
+        logger.info(f"Metrics written to {write_metrics(settings.metrics_file)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
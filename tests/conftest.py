@@ -0,0 +1,41 @@
+"""
+Shared pytest fixtures
+"""
+import pytest
+
+import cache
+import dedup
+from benchmarks.linkedin_stub import LinkedInStub
+from cache import PostCache
+from config import settings
+from tools.linkedin_client import reset_linkedin_clients
+
+
+@pytest.fixture(autouse=True)
+def isolated_post_cache(tmp_path, monkeypatch):
+    """Keep tests from reading or writing the real post cache in output/."""
+    post_cache = PostCache(tmp_path / "post_cache.sqlite3")
+    monkeypatch.setattr(cache, "_post_cache", post_cache)
+    return post_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_post_index(tmp_path, monkeypatch):
+    """Keep tests from reading or writing the real published post index in output/."""
+    post_index = dedup.PostIndex(tmp_path / "published_posts.sqlite3")
+    monkeypatch.setattr(dedup, "_post_index", post_index)
+    return post_index
+
+
+@pytest.fixture
+def linkedin_stub(monkeypatch):
+    """A local LinkedIn API stub with posting enabled and fast retries."""
+    with LinkedInStub(part_size=1024) as stub:
+        monkeypatch.setattr(settings, "auto_post", True)
+        monkeypatch.setattr(settings, "linkedin_access_token", "token")
+        monkeypatch.setattr(settings, "linkedin_user_id", "user1")
+        monkeypatch.setattr(settings, "linkedin_api_base_url", stub.base_url)
+        monkeypatch.setattr(settings, "linkedin_backoff_base", 0.001)
+        reset_linkedin_clients()
+        yield stub
+        reset_linkedin_clients()
@@ -0,0 +1,91 @@
+"""
+Tests for batch campaign mode
+"""
+import json
+import threading
+
+import pytest
+
+from batch import load_batch_inputs, run_batch, summarize_results
+
+
+class FakeAgent:
+    """Agent stand-in that fails for projects named 'broken'."""
+
+    def run(self, input_data):
+        if input_data["project_name"] == "broken":
+            raise RuntimeError("boom")
+        return {"output": f"promoted {input_data['project_name']}"}
+
+
+def test_load_batch_inputs_from_jsonl(tmp_path):
+    """Each non-empty JSONL line becomes a job."""
+    path = tmp_path / "projects.jsonl"
+    path.write_text(
+        json.dumps({"project_name": "A"}) + "\n\n" + json.dumps({"project_name": "B"}) + "\n"
+    )
+    jobs = load_batch_inputs(str(path))
+    assert [job.input_data["project_name"] for job in jobs] == ["A", "B"]
+    assert jobs[1].job_id == "projects:3"
+
+
+def test_load_batch_inputs_from_directory(tmp_path):
+    """Directories are read in sorted order, JSON lists are expanded."""
+    (tmp_path / "b.json").write_text(json.dumps([{"project_name": "B1"}, {"project_name": "B2"}]))
+    (tmp_path / "a.json").write_text(json.dumps({"project_name": "A"}))
+    (tmp_path / "notes.txt").write_text("ignored")
+    jobs = load_batch_inputs(str(tmp_path))
+    assert [job.input_data["project_name"] for job in jobs] == ["A", "B1", "B2"]
+
+
+def test_load_batch_inputs_rejects_invalid_json(tmp_path):
+    """Malformed lines are reported with their location."""
+    path = tmp_path / "projects.jsonl"
+    path.write_text('{"project_name": "A"}\nnot json\n')
+    with pytest.raises(ValueError, match="projects.jsonl:2"):
+        load_batch_inputs(str(path))
+
+
+def test_run_batch_collects_results_and_summary(tmp_path):
+    """Results keep input order and failures are recorded, not raised."""
+    path = tmp_path / "projects.jsonl"
+    path.write_text("\n".join(
+        json.dumps({"project_name": name}) for name in ["A", "broken", "C"]
+    ))
+    jobs = load_batch_inputs(str(path))
+    seen = []
+    factory_calls = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            factory_calls.append(1)
+        return FakeAgent()
+
+    results, summary = run_batch(jobs, factory, max_workers=2, on_result=seen.append)
+
+    assert [r.project_name for r in results] == ["A", "broken", "C"]
+    assert [r.status for r in results] == ["succeeded", "failed", "succeeded"]
+    assert results[0].output == "promoted A"
+    assert results[1].error == "boom"
+    assert len(seen) == 3
+    assert len(factory_calls) <= 2
+    assert summary.total == 3
+    assert summary.succeeded == 2
+    assert summary.failed == 1
+    assert summary.workers == 2
+
+
+def test_summarize_results_percentiles():
+    """Latency percentiles use nearest rank."""
+    from batch import BatchJobResult
+
+    results = [
+        BatchJobResult(str(i), "src", "p", "succeeded", "", float(i))
+        for i in range(1, 21)
+    ]
+    summary = summarize_results(results, workers=4, wall_seconds=10.0)
+    assert summary.latency_p50 == 10.0
+    assert summary.latency_p95 == 19.0
+    assert summary.latency_max == 20.0
+    assert summary.throughput_per_minute == 120.0
@@ -0,0 +1,53 @@
+"""
+Tests for the offline benchmark runner
+"""
+import json
+
+from benchmarks.fakes import FakeLLM
+from benchmarks.run_benchmarks import compare_results, main
+from llm import get_llm
+
+
+def test_fake_llm_is_deterministic():
+    llm = FakeLLM(words=5)
+    assert llm.invoke("prompt").content == llm.invoke("prompt").content
+    assert llm.invoke("prompt").content != llm.invoke("other").content
+    assert "".join(chunk.content for chunk in llm.stream("prompt")) == llm.invoke("prompt").content
+
+
+def test_runner_writes_results(tmp_path):
+    output = tmp_path / "results.json"
+
+    exit_code = main([
+        "--cases", "generate_post", "generate_post_stream", "upload",
+        "-n", "2", "--upload-mb", "0.5", "--output", str(output),
+    ])
+
+    assert exit_code == 0
+    report = json.loads(output.read_text())
+    assert report["meta"]["config"]["iterations"] == 2
+    upload = report["results"]["upload"]
+    assert upload["iterations"] == 2 and upload["throughput_unit"] == "MB/s"
+    assert upload["throughput"] > 0 and upload["peak_rss_mb"] > 0
+    assert report["results"]["generate_post_stream"]["ttft_p50"] >= 0
+    # The fake model is unregistered again afterwards
+    assert not isinstance(get_llm(), FakeLLM)
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {
+        "upload": {"latency_p50": 1.0, "latency_p95": 2.0, "throughput": 100.0, "peak_rss_mb": 50},
+        "create_video": {"skipped": "no browser"},
+    }}
+    current = {"results": {
+        "upload": {"latency_p50": 1.05, "latency_p95": 3.0, "throughput": 80.0, "peak_rss_mb": 50},
+        "create_video": {"latency_p50": 4.0},
+    }}
+
+    rows = {row["metric"]: row for row in compare_results(baseline, current, threshold=0.1)}
+
+    assert not rows["latency_p50"]["regression"]
+    assert rows["latency_p95"]["regression"]
+    assert rows["throughput"]["regression"] and rows["throughput"]["change"] == -0.2
+    assert not rows["peak_rss_mb"]["regression"]
+    assert all(row["case"] == "upload" for row in rows.values())
@@ -0,0 +1,135 @@
+"""
+Tests for the Chromium browser pool
+"""
+import asyncio
+
+from tools.browser_pool import BrowserPool
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+
+class FakeBrowserPool(BrowserPool):
+    """Pool that launches fake browsers instead of Chromium."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.launched = []
+
+    async def _start_playwright(self):
+        return FakePlaywright()
+
+    async def _launch_browser(self):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+def lease(pool):
+    async def use():
+        async with pool.new_context(viewport={"width": 10, "height": 10}) as context:
+            return context
+    return pool.run(use)
+
+
+def test_contexts_reuse_the_same_browser():
+    """Consecutive recordings share one browser but get fresh contexts."""
+    pool = FakeBrowserPool(size=1, max_recordings=0)
+    try:
+        first, second = lease(pool), lease(pool)
+        assert first is not second
+        assert first.closed and second.closed
+        assert len(pool.launched) == 1
+    finally:
+        pool.shutdown()
+
+
+def test_browser_recycled_after_max_recordings():
+    """A browser is relaunched after serving max_recordings contexts."""
+    pool = FakeBrowserPool(size=1, max_recordings=2)
+    try:
+        for _ in range(5):
+            lease(pool)
+        assert len(pool.launched) == 3
+        assert pool.launched[0].closed
+    finally:
+        pool.shutdown()
+
+
+def test_disconnected_browser_is_replaced():
+    """Health check relaunches a browser that has disconnected."""
+    pool = FakeBrowserPool(size=1, max_recordings=0)
+    try:
+        lease(pool)
+        pool.launched[0].connected = False
+        lease(pool)
+        assert len(pool.launched) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_pool_size_bounds_concurrency():
+    """No more than `size` contexts are leased at once."""
+    pool = FakeBrowserPool(size=2, max_recordings=0)
+    active = []
+    peak = []
+
+    async def record():
+        async with pool.new_context():
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    async def main():
+        await asyncio.gather(*(pool.arun(record) for _ in range(6)))
+
+    try:
+        asyncio.run(main())
+        assert max(peak) == 2
+        assert len(pool.launched) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_shutdown_closes_browsers():
+    """Shutdown closes every launched browser and stops Playwright."""
+    pool = FakeBrowserPool(size=2, max_recordings=0)
+    lease(pool)
+    playwright = pool._playwright
+    pool.shutdown()
+    assert all(browser.closed for browser in pool.launched)
+    assert playwright.stopped
+    # The pool can be started again after a shutdown
+    lease(pool)
+    pool.shutdown()
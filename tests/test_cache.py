@@ -0,0 +1,91 @@
+"""
+Tests for the generated post cache
+"""
+from unittest.mock import Mock, patch
+
+from cache import PostCache
+from config import settings
+
+
+def test_key_depends_on_prompt_and_model():
+    """Keys change with any of prompt, provider, model, temperature or length limits."""
+    key = PostCache.make_key("prompt", "ollama", "llama2", 0.7)
+    assert key == PostCache.make_key("prompt", "ollama", "llama2", 0.7)
+    assert key != PostCache.make_key("prompt!", "ollama", "llama2", 0.7)
+    assert key != PostCache.make_key("prompt", "grok", "llama2", 0.7)
+    assert key != PostCache.make_key("prompt", "ollama", "mistral", 0.7)
+    assert key != PostCache.make_key("prompt", "ollama", "llama2", 0.2)
+    assert key != PostCache.make_key("prompt", "ollama", "llama2", 0.7, max_tokens=100)
+    assert key != PostCache.make_key("prompt", "ollama", "llama2", 0.7, max_length=500)
+
+
+def test_get_and_put(tmp_path):
+    """Stored posts survive reopening the database."""
+    cache = PostCache(tmp_path / "cache.sqlite3")
+    assert cache.get("k") is None
+    cache.put("k", "hello")
+    assert PostCache(tmp_path / "cache.sqlite3").get("k") == "hello"
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    """Entries older than the TTL are treated as misses."""
+    cache = PostCache(tmp_path / "cache.sqlite3", ttl_seconds=60)
+    with patch("cache.time.time", return_value=1000.0):
+        cache.put("k", "hello")
+    with patch("cache.time.time", return_value=1030.0):
+        assert cache.get("k") == "hello"
+    with patch("cache.time.time", return_value=1100.0):
+        assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entry is evicted past the size bound."""
+    cache = PostCache(tmp_path / "cache.sqlite3", ttl_seconds=0, max_entries=2)
+    with patch("cache.time.time", return_value=1.0):
+        cache.put("a", "A")
+    with patch("cache.time.time", return_value=2.0):
+        cache.put("b", "B")
+    with patch("cache.time.time", return_value=3.0):
+        assert cache.get("a") == "A"
+    with patch("cache.time.time", return_value=4.0):
+        cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+@patch("tools.generate_post.get_llm")
+def test_generate_post_uses_cache(mock_get_llm):
+    """Identical prompts only reach the LLM once unless refreshing."""
+    from tools.generate_post import GeneratePostTool
+
+    mock_get_llm.return_value.invoke.return_value = Mock(content="Cached post")
+    kwargs = dict(project_name="P", description="D", website_url="https://example.com")
+
+    assert GeneratePostTool()._run(**kwargs) == "Cached post"
+    assert GeneratePostTool()._run(**kwargs) == "Cached post"
+    assert mock_get_llm.return_value.invoke.call_count == 1
+
+    GeneratePostTool(refresh_cache=True)._run(**kwargs)
+    assert mock_get_llm.return_value.invoke.call_count == 2
+
+    GeneratePostTool(use_cache=False)._run(**kwargs)
+    assert mock_get_llm.return_value.invoke.call_count == 3
+
+
+@patch("tools.generate_post.get_llm")
+def test_length_limits_are_part_of_the_cache_key(mock_get_llm, monkeypatch):
+    """A post generated under other length limits is not reused."""
+    from tools.generate_post import GeneratePostTool
+
+    mock_get_llm.return_value.invoke.return_value = Mock(content="Cached post")
+    kwargs = dict(project_name="P", description="D", website_url="https://example.com")
+
+    GeneratePostTool()._run(**kwargs)
+    monkeypatch.setattr(settings, "llm_max_tokens", 50)
+    GeneratePostTool()._run(**kwargs)
+    monkeypatch.setattr(settings, "max_post_length", 1000)
+    GeneratePostTool()._run(**kwargs)
+    GeneratePostTool()._run(**kwargs)
+    assert mock_get_llm.return_value.invoke.call_count == 3
@@ -0,0 +1,87 @@
+"""
+Tests for near-duplicate detection of published posts
+"""
+import time
+
+import numpy as np
+
+from config import settings
+from dedup import PostIndex, minhash, shingles
+from metrics import DUPLICATE_POSTS
+from tools.post_to_linkedin import PostToLinkedInTool
+
+POST = (
+    "Meet CarbonTrack, the open-source app that measures your carbon footprint and "
+    "suggests small daily changes with the biggest impact. Join the community challenges "
+    "and see how much you can save this month. #Sustainability #OpenSource"
+)
+
+
+def jaccard(a: str, b: str) -> float:
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_minhash_estimates_jaccard_similarity():
+    edited = POST.replace("this month", "this week").replace("Meet", "Say hello to")
+    other = "Our new video editor renders 4K timelines in real time, even on a laptop. Try the beta today."
+
+    estimate = (minhash(POST) == minhash(edited)).mean()
+
+    assert minhash(POST).dtype == np.uint32
+    assert (minhash(POST) == minhash(POST.upper())).all()
+    assert abs(estimate - jaccard(POST, edited)) < 0.15
+    assert (minhash(POST) == minhash(other)).mean() < 0.1
+
+
+def test_index_persists_and_updates_incrementally(tmp_path):
+    path = tmp_path / "index.sqlite3"
+    index = PostIndex(path)
+    other_process = PostIndex(path)
+    assert index.find_duplicate(POST, threshold=0.8) is None
+
+    other_process.add(POST, "urn:li:share:1")
+    match = index.find_duplicate(POST.replace("this month", "this week"), threshold=0.8)
+
+    assert match.post_id == "urn:li:share:1"
+    assert 0.8 <= match.similarity < 1
+    assert "near-duplicate" in match.describe()
+    assert len(PostIndex(path)) == 1
+    assert PostIndex(path).find_duplicate("Something else entirely, about video editing.", threshold=0.5) is None
+
+
+def test_check_is_fast_over_thousands_of_posts(tmp_path):
+    index = PostIndex(tmp_path / "index.sqlite3")
+    rng = np.random.default_rng(0)
+    vocabulary = POST.split() + [f"word{i}" for i in range(500)]
+    with index._connect() as conn:
+        conn.executemany(
+            "INSERT INTO published_posts (post_id, post_text, published_at, signature) VALUES (?, ?, ?, ?)",
+            [
+                (str(i), "", 0.0, minhash(" ".join(rng.choice(vocabulary, 60))).tobytes())
+                for i in range(5000)
+            ],
+        )
+    index.find_duplicate(POST)
+
+    start = time.perf_counter()
+    assert index.find_duplicate(POST) is None
+    assert time.perf_counter() - start < 0.05
+
+
+def test_published_posts_are_not_published_again(linkedin_stub, isolated_post_index):
+    duplicates = DUPLICATE_POSTS.value()
+    tool = PostToLinkedInTool()
+
+    assert tool._run(post_text=POST).startswith("✅")
+    assert len(isolated_post_index) == 1
+
+    result = tool._run(post_text=POST.replace("this month", "this week"))
+    assert result.startswith("Error: Post is a near-duplicate")
+    assert DUPLICATE_POSTS.value() == duplicates + 1
+
+    settings.dedup_enabled = False
+    try:
+        assert tool._run(post_text=POST).startswith("✅")
+    finally:
+        settings.dedup_enabled = True
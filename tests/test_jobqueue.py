@@ -0,0 +1,162 @@
+"""
+Tests for the durable job queue and its workers
+"""
+import threading
+import time
+
+import pytest
+
+from agent import CarbonTrackAgent
+from jobqueue import JobQueue
+from tests.test_pipeline import INPUT, make_tools
+from worker import Worker, run_workers
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "jobs.sqlite3", visibility_timeout=60, max_attempts=2, retry_delay=0)
+
+
+def test_enqueue_claim_complete(queue):
+    job_id = queue.enqueue(INPUT)
+    assert queue.enqueue(INPUT, job_id=job_id) == job_id  # same id is not queued twice
+
+    job = queue.claim("w1")
+    assert job.id == job_id and job.status == "running" and job.attempts == 1
+    assert job.input_data == INPUT
+    assert queue.claim("w2") is None
+
+    assert queue.complete(job_id, "w1", {"output": "done"})
+    job = queue.get(job_id)
+    assert job.status == "succeeded" and job.result == {"output": "done"}
+    assert queue.counts() == {"queued": 0, "running": 0, "succeeded": 1, "failed": 0}
+
+
+def test_expired_lease_is_reclaimed(queue):
+    queue.visibility_timeout = 0
+    job_id = queue.enqueue(INPUT)
+    queue.claim("dead-worker")
+
+    job = queue.claim("w2")
+    assert job.id == job_id and job.attempts == 2 and job.worker_id == "w2"
+    # The first worker can no longer report a result
+    assert not queue.complete(job_id, "dead-worker", {})
+    assert not queue.heartbeat(job_id, "dead-worker")
+
+    # Its lease expires too, and no attempts are left
+    assert queue.claim("w3") is None
+    assert queue.get(job_id).status == "failed"
+
+
+def test_failed_job_is_retried_until_max_attempts(queue):
+    job_id = queue.enqueue(INPUT)
+    queue.claim("w1")
+    assert queue.fail(job_id, "w1", "boom") == "queued"
+    queue.claim("w1")
+    assert queue.fail(job_id, "w1", "boom again") == "failed"
+    job = queue.get(job_id)
+    assert job.status == "failed" and job.error == "boom again"
+    assert queue.claim("w1") is None
+
+
+def test_retry_waits_for_backoff(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", retry_delay=60)
+    job_id = queue.enqueue(INPUT)
+    queue.claim("w1")
+    queue.fail(job_id, "w1", "boom")
+    assert queue.claim("w1") is None
+    assert queue.pending() == 1
+
+
+def test_concurrent_claims_never_share_a_job(queue):
+    for _ in range(20):
+        queue.enqueue(INPUT)
+    claimed, lock = [], threading.Lock()
+
+    def claim_all(worker_id):
+        while (job := queue.claim(worker_id)) is not None:
+            with lock:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=claim_all, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == 20 and len(set(claimed)) == 20
+
+
+def test_workers_drain_queue_and_record_stages(queue):
+    job_ids = [queue.enqueue({**INPUT, "project_name": f"Project {i}"}) for i in range(3)]
+
+    counts = run_workers(
+        lambda: CarbonTrackAgent(make_tools(), mode="pipeline"),
+        concurrency=2,
+        queue=queue,
+        drain=True,
+        poll_interval=0.01,
+    )
+
+    assert counts["succeeded"] == 3
+    job = queue.get(job_ids[0])
+    assert job.result["post_text"] == "Great post"
+    assert job.stages == {
+        "generate_post": "Great post",
+        "create_video": "output/demo.mp4",
+        "post_to_linkedin": "Posted",
+    }
+
+
+def test_failed_publish_is_retried_then_fails(queue):
+    queue.enqueue(INPUT)
+    tools = make_tools(linkedin="Error: Failed to post: 500")
+    run_workers(lambda: CarbonTrackAgent(tools, mode="pipeline"), queue=queue, drain=True, poll_interval=0.01)
+
+    [job] = queue.list_jobs()
+    assert job.status == "failed" and job.attempts == 2
+    assert job.error.startswith("Error: Failed to post")
+    assert len(tools[2].calls) == 2
+
+
+def test_published_job_is_not_posted_again(queue):
+    """A job whose worker died after publishing completes without re-running the tools."""
+    job_id = queue.enqueue(INPUT)
+    queue.record_stage(job_id, "post_to_linkedin", "Posted")
+    tools = make_tools()
+    worker = Worker(queue, lambda: CarbonTrackAgent(tools, mode="pipeline"), "w1")
+
+    assert worker.run_once()
+
+    assert queue.get(job_id).status == "succeeded"
+    assert all(tool.calls == [] for tool in tools)
+
+
+def test_retried_job_reuses_completed_stages(queue):
+    """A retry does not generate the post again after an earlier attempt did."""
+    job_id = queue.enqueue(INPUT)
+    queue.record_stage(job_id, "generate_post", "Stored post")
+    queue.record_stage(job_id, "post_to_linkedin", "Error: Failed to post: 500")
+    tools = make_tools()
+
+    assert Worker(queue, lambda: CarbonTrackAgent(tools, mode="pipeline"), "w1").run_once()
+
+    assert tools[0].calls == []
+    assert tools[2].calls[0]["post_text"] == "Stored post"
+    assert queue.get(job_id).status == "succeeded"
+
+
+def test_heartbeat_keeps_long_job_leased(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", visibility_timeout=1)
+    queue.enqueue(INPUT)
+    claimed_meanwhile = []
+
+    class SlowAgent:
+        def run(self, input_data, on_stage=None, completed=None):
+            time.sleep(1.5)
+            claimed_meanwhile.append(queue.claim("other"))
+            return {"output": "done"}
+
+    Worker(queue, SlowAgent, "w1").run_once()
+
+    assert claimed_meanwhile == [None]
+    assert queue.counts()["succeeded"] == 1
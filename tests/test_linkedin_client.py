@@ -0,0 +1,115 @@
+"""
+Tests for the shared LinkedIn API client
+"""
+import asyncio
+import socket
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from config import settings
+from tools.linkedin_client import get_linkedin_client, parse_retry_after
+from tools.post_to_linkedin import PostToLinkedInTool
+
+
+def test_throttled_post_is_retried_after_retry_after(linkedin_stub):
+    linkedin_stub.inject("/v2/ugcPosts", status=429, headers={"Retry-After": "0"})
+
+    result = PostToLinkedInTool()._run(post_text="Hello")
+
+    assert "Post ID: urn:li:share:1" in result
+    assert len(linkedin_stub.calls("POST", "/v2/ugcPosts")) == 2
+    assert len(linkedin_stub.posts) == 1
+    stats = get_linkedin_client().stats
+    assert stats["throttled"] == 1 and stats["retries"] == 1 and stats["failures"] == 0
+    assert linkedin_stub.last_headers["Authorization"] == "Bearer token"
+    assert linkedin_stub.last_headers["X-Restli-Protocol-Version"] == "2.0.0"
+
+
+def test_post_is_not_retried_after_server_error(linkedin_stub):
+    """A POST that failed server-side may have gone through, so it is not repeated."""
+    linkedin_stub.inject("/v2/ugcPosts", status=500)
+
+    result = PostToLinkedInTool()._run(post_text="Hello")
+
+    assert result.startswith("Error: Failed to post: 500")
+    assert len(linkedin_stub.calls("POST", "/v2/ugcPosts")) == 1
+    assert get_linkedin_client().stats["failures"] == 1
+
+
+def test_idempotent_requests_retry_server_errors(linkedin_stub, tmp_path):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"png-bytes")
+    linkedin_stub.inject("/image/", status=503, count=2)
+
+    result = PostToLinkedInTool()._run(post_text="Hello", image_path=str(image))
+
+    assert "Post with image published" in result
+    assert linkedin_stub.images["urn:li:digitalmediaAsset:I1"] == b"png-bytes"
+    assert get_linkedin_client().stats["retries"] == 2
+
+
+def test_long_retry_after_fails_instead_of_waiting(linkedin_stub, monkeypatch):
+    monkeypatch.setattr(settings, "linkedin_backoff_max", 5.0)
+    linkedin_stub.inject("/v2/ugcPosts", status=429, headers={"Retry-After": "3600"})
+
+    start = time.monotonic()
+    result = PostToLinkedInTool()._run(post_text="Hello")
+
+    assert result.startswith("Error: Failed to post: 429")
+    assert time.monotonic() - start < 2
+
+
+def test_hung_request_times_out(linkedin_stub, monkeypatch):
+    monkeypatch.setattr(settings, "linkedin_read_timeout", 0.2)
+    linkedin_stub.inject("/v2/ugcPosts", status=201, delay=1.0)
+
+    start = time.monotonic()
+    result = PostToLinkedInTool()._run(post_text="Hello")
+
+    assert result.startswith("Error posting to LinkedIn")
+    assert time.monotonic() - start < 1.0
+
+
+def test_refused_post_is_retried(linkedin_stub, monkeypatch):
+    """A refused connection never reached LinkedIn, so even a POST is safe to repeat."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    client = get_linkedin_client()
+    send = client.session.request
+    urls = iter([f"http://127.0.0.1:{closed_port}/v2/ugcPosts"])
+
+    def refuse_once(method, url, **kwargs):
+        return send(method, next(urls, url), **kwargs)
+
+    monkeypatch.setattr(client.session, "request", refuse_once)
+    result = PostToLinkedInTool()._run(post_text="Hello")
+
+    assert "Post ID: urn:li:share:1" in result
+    assert len(linkedin_stub.calls("POST", "/v2/ugcPosts")) == 1
+    assert client.stats["retries"] == 1 and client.stats["failures"] == 0
+
+
+def test_async_post_is_retried_when_throttled(linkedin_stub):
+    linkedin_stub.inject("/v2/ugcPosts", status=429, count=2)
+
+    result = asyncio.run(PostToLinkedInTool()._arun(post_text="Hello"))
+
+    assert "Post ID: urn:li:share:1" in result
+    assert get_linkedin_client().stats["throttled"] == 2
+
+
+def test_clients_are_shared_per_configuration(linkedin_stub, monkeypatch):
+    client = get_linkedin_client()
+    assert get_linkedin_client() is client
+    monkeypatch.setattr(settings, "linkedin_access_token", "other")
+    assert get_linkedin_client() is not client
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(later) <= 30
@@ -0,0 +1,89 @@
+"""
+Tests for LinkedIn video uploads against a local stub server
+"""
+import json
+
+import pytest
+
+import tools.linkedin_video as linkedin_video
+from config import settings
+from tools.linkedin_client import get_linkedin_client
+from tools.linkedin_video import VideoUploader, upload_state_path
+from tools.post_to_linkedin import PostToLinkedInTool
+
+
+@pytest.fixture
+def stub(linkedin_stub, monkeypatch):
+    monkeypatch.setattr(linkedin_video, "INITIAL_POLL_INTERVAL", 0.01)
+    return linkedin_stub
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "demo.mp4"
+    path.write_bytes(bytes(range(256)) * 20)  # 5120 bytes, 5 parts
+    return path
+
+
+def test_video_post_uploads_all_parts_and_publishes(stub, video):
+    result = PostToLinkedInTool()._run(post_text="Watch this", video_path=str(video))
+
+    assert "Post ID: urn:li:share:1" in result
+    assert stub.videos["urn:li:video:V1"]["data"] == video.read_bytes()
+    assert len(stub.calls("PUT", "/upload/")) == 5
+    assert len(stub.calls("GET", "/rest/videos/")) == 2  # PROCESSING, then AVAILABLE
+    post = stub.posts[0]
+    assert post["commentary"] == "Watch this"
+    assert post["content"]["media"]["id"] == "urn:li:video:V1"
+    assert post["author"] == "urn:li:person:user1"
+    assert not upload_state_path(video).exists()
+
+
+def test_failed_upload_resumes_from_acknowledged_parts(stub, video):
+    """A second attempt re-sends only the parts that were not acknowledged."""
+    stub.fail_parts[3] = settings.linkedin_max_retries + 1
+    tool = PostToLinkedInTool()
+
+    first = tool._run(post_text="Watch this", video_path=str(video))
+    assert first.startswith("Error")
+    state = json.loads(upload_state_path(video).read_text())
+    assert "3" not in state["etags"] and not state["finalized"]
+
+    second = tool._run(post_text="Watch this", video_path=str(video))
+    assert "Post ID" in second
+    assert len(stub.calls("POST", "initializeUpload")) == 1
+    assert len(stub.calls("PUT", "/upload/V1/3")) == settings.linkedin_max_retries + 2
+    for index in (0, 1, 2, 4):
+        assert len(stub.calls("PUT", f"/upload/V1/{index}$")) == 1
+    assert stub.videos["urn:li:video:V1"]["data"] == video.read_bytes()
+
+
+def test_transient_part_failures_are_retried(stub, video):
+    stub.fail_parts[2] = 2
+    assert "Post ID" in PostToLinkedInTool()._run(post_text="x", video_path=str(video))
+    assert len(stub.calls("PUT", "/upload/V1/2")) == 3
+    assert get_linkedin_client().stats["retries"] == 2
+
+
+def test_changed_file_starts_a_new_upload(stub, video):
+    stub.fail_parts[0] = settings.linkedin_max_retries + 1
+    PostToLinkedInTool()._run(post_text="x", video_path=str(video))
+
+    video.write_bytes(b"new content")
+    assert "Post ID" in PostToLinkedInTool()._run(post_text="x", video_path=str(video))
+    assert len(stub.calls("POST", "initializeUpload")) == 2
+    assert stub.videos["urn:li:video:V2"]["data"] == b"new content"
+
+
+def test_processing_timeout(stub, video):
+    stub.processing_polls = 1000
+    with pytest.raises(RuntimeError, match="Timed out"):
+        VideoUploader(poll_timeout=0.1).upload(video)
+    # The upload itself is kept, only processing is still pending
+    assert json.loads(upload_state_path(video).read_text())["finalized"]
+
+
+def test_missing_video_file(stub, tmp_path):
+    result = PostToLinkedInTool()._run(post_text="x", video_path=str(tmp_path / "missing.mp4"))
+    assert result.startswith("Error: Video file not found")
+    assert stub.requests == []
@@ -0,0 +1,53 @@
+"""
+Tests for the shared LLM client registry
+"""
+import pytest
+
+from config import settings
+from llm import get_llm, register_llm, reset_llm_registry
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    reset_llm_registry()
+    yield
+    reset_llm_registry()
+
+
+def test_clients_are_shared_per_key(monkeypatch):
+    """The same provider/model/temperature returns the same client."""
+    monkeypatch.setattr(settings, "llm_provider", "ollama")
+    first = get_llm()
+    assert get_llm() is first
+    assert get_llm(temperature=0.1) is not first
+    assert get_llm(model="mistral") is not first
+
+
+def test_ollama_client_uses_pool_limits(monkeypatch):
+    """Ollama clients are created with the configured connection limit."""
+    monkeypatch.setattr(settings, "llm_max_connections", 3)
+    llm = get_llm(provider="ollama")
+    assert llm.client_kwargs["limits"].max_connections == 3
+
+
+def test_unsupported_provider():
+    """Unknown providers are rejected."""
+    with pytest.raises(ValueError):
+        get_llm(provider="unknown")
+
+
+def test_max_tokens_gets_its_own_client(monkeypatch):
+    """Token-limited clients are shared per limit and pass it to the model."""
+    monkeypatch.setattr(settings, "llm_provider", "ollama")
+    limited = get_llm(max_tokens=500)
+    assert get_llm(max_tokens=500) is limited
+    assert get_llm() is not limited
+    assert limited.num_predict == 500
+
+
+def test_registered_client_serves_every_limit():
+    """A stand-in model is used whatever generation limit a tool asks for."""
+    fake = object()
+    register_llm(fake)
+    assert get_llm() is fake
+    assert get_llm(max_tokens=100) is fake
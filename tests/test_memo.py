@@ -0,0 +1,120 @@
+"""
+Tests for per-run memoization of the agent's tool calls
+"""
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+from agent import CarbonTrackAgent
+from memo import MemoizedTool, ToolMemo
+from tests.test_pipeline import RecordingTool, make_tools
+from tools.create_video import CreateVideoTool
+
+
+def action(name: str, action_input) -> str:
+    """A structured chat agent step calling a tool."""
+    return "Action:\n```\n" + json.dumps({"action": name, "action_input": action_input}) + "\n```"
+
+
+def test_identical_calls_run_once():
+    tool = RecordingTool(name="create_video", result="output/demo.mp4", calls=[])
+    memo = ToolMemo()
+    memoized = MemoizedTool.wrap(tool, memo)
+
+    assert memoized.invoke({"website_url": "https://example.com"}) == "output/demo.mp4"
+    assert memoized.invoke({"website_url": " https://example.com "}) == "output/demo.mp4"
+    memoized.invoke({"website_url": "https://other.example.com"})
+
+    assert len(tool.calls) == 2
+    assert memo.stats() == {"hits": 1, "misses": 2, "by_tool": {"create_video": {"hits": 1, "misses": 2}}}
+
+
+def test_schema_defaults_are_part_of_the_key():
+    memo = ToolMemo()
+    memoized = MemoizedTool.wrap(CreateVideoTool(), memo)
+    with patch.object(CreateVideoTool, "_run", return_value="output/demo.mp4") as run:
+        memoized.invoke({"website_url": "https://example.com"})
+        memoized.invoke({"website_url": "https://example.com", "duration": 30, "output_filename": "demo"})
+    assert run.call_count == 1
+
+
+def test_failures_are_not_memoized():
+    tool = RecordingTool(name="generate_post", result="Error generating post: offline", calls=[])
+    memoized = MemoizedTool.wrap(tool, ToolMemo())
+
+    memoized.invoke({"project_name": "P"})
+    memoized.invoke({"project_name": "P"})
+    assert len(tool.calls) == 2
+
+    def crash():
+        raise RuntimeError("browser crashed")
+
+    memo = ToolMemo()
+    with pytest.raises(RuntimeError):
+        memo.call("create_video", {}, crash)
+    assert memo.call("create_video", {}, lambda: "output/demo.mp4") == "output/demo.mp4"
+
+
+def test_concurrent_identical_calls_wait_for_the_first():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def record():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "output/demo.mp4"
+
+    memo = ToolMemo()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(memo.call("create_video", {"url": "x"}, record)))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["output/demo.mp4"] * 3
+
+    async def arecord():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "post"
+
+    async def run_async():
+        return await asyncio.gather(*(memo.acall("generate_post", {"p": 1}, arecord) for _ in range(3)))
+
+    assert asyncio.run(run_async()) == ["post"] * 3
+    assert len(calls) == 2
+
+
+@patch("agent.get_llm")
+def test_agent_retry_reuses_tool_result(mock_get_llm):
+    video_args = {"website_url": "https://example.com"}
+    mock_get_llm.return_value = FakeListChatModel(responses=[
+        action("create_video", video_args),
+        "Let me record the video again.",
+        action("create_video", video_args),
+        action("Final Answer", "Done"),
+    ] * 2)
+    tools = make_tools()
+    agent = CarbonTrackAgent(tools, mode="agent")
+
+    first = agent.run({"request": "Record a demo of https://example.com"})
+    second = agent.run({"request": "Record a demo of https://example.com"})
+
+    assert first["output"] == "Done"
+    assert first["tool_calls"]["by_tool"] == {"create_video": {"hits": 1, "misses": 1}}
+    # The memo only lasts for one run
+    assert second["tool_calls"]["misses"] == 1
+    assert len(tools[1].calls) == 2
@@ -0,0 +1,94 @@
+"""
+Tests for the Prometheus metrics registry
+"""
+import urllib.request
+
+import pytest
+
+from metrics import (
+    LINKEDIN_RESPONSES,
+    POSTS_GENERATED,
+    STAGE_DURATION,
+    UPLOAD_BYTES,
+    MetricsRegistry,
+)
+from pipeline import PromotionPipeline
+from tests.test_pipeline import INPUT, make_tools
+from tools.post_to_linkedin import PostToLinkedInTool
+
+
+def test_render_text_format():
+    registry = MetricsRegistry()
+    posts = registry.counter("posts_total", "Posts generated", ["source"])
+    latency = registry.histogram("latency_seconds", "LLM latency", buckets=(1, 5))
+    depth = registry.gauge("queue_jobs", "Jobs by status", ["status"])
+
+    posts.inc(source="llm")
+    posts.inc(2, source="cache")
+    latency.observe(0.5)
+    latency.observe(3)
+    depth.set_function(lambda: {("queued",): 4})
+
+    lines = registry.render().splitlines()
+    assert "# TYPE posts_total counter" in lines
+    assert 'posts_total{source="cache"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 1' in lines
+    assert 'latency_seconds_bucket{le="5"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "latency_seconds_sum 3.5" in lines
+    assert "latency_seconds_count 2" in lines
+    assert 'queue_jobs{status="queued"} 4' in lines
+
+
+def test_registration_and_labels_are_checked():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ["status"])
+    assert registry.counter("requests_total", "Requests", ["status"]) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Requests", ["status"])
+    with pytest.raises(ValueError):
+        counter.inc(method="GET")
+    with pytest.raises(ValueError):
+        counter.inc(-1, status="2xx")
+
+
+def test_serve_and_write(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("runs_total", "Runs").inc()
+
+    server = registry.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "runs_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    path = registry.write(tmp_path / "metrics.prom")
+    assert "runs_total 1" in path.read_text()
+
+
+def test_tools_record_metrics(linkedin_stub, tmp_path):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"png-bytes")
+    responses = LINKEDIN_RESPONSES.value(status="2xx")
+    uploaded = UPLOAD_BYTES.value()
+
+    PostToLinkedInTool()._run(post_text="Hello", image_path=str(image))
+
+    # Register, upload and publish
+    assert LINKEDIN_RESPONSES.value(status="2xx") == responses + 3
+    assert UPLOAD_BYTES.value() == uploaded + len(b"png-bytes")
+
+
+def test_pipeline_records_stage_durations():
+    before = STAGE_DURATION.snapshot(stage="post_to_linkedin")["count"]
+    posts = POSTS_GENERATED.value(source="llm")
+
+    PromotionPipeline(make_tools()).run(INPUT)
+
+    assert STAGE_DURATION.snapshot(stage="post_to_linkedin")["count"] == before + 1
+    # The stand-in tools do not call the LLM
+    assert POSTS_GENERATED.value(source="llm") == posts
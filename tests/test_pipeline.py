@@ -0,0 +1,107 @@
+"""
+Tests for the direct promotion pipeline
+"""
+import asyncio
+import threading
+from typing import List
+
+import pytest
+from langchain_core.tools import BaseTool
+
+from agent import CarbonTrackAgent
+from pipeline import PromotionPipeline, slugify
+
+
+class RecordingTool(BaseTool):
+    """Tool stand-in that records its calls and returns a fixed result."""
+    name: str = "tool"
+    description: str = "test tool"
+    result: str = "ok"
+    calls: List[dict] = []
+    barrier: object = None
+
+    def _run(self, **kwargs) -> str:
+        self.calls.append(kwargs)
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        return self.result
+
+
+def make_tools(post="Great post", video="output/demo.mp4", linkedin="Posted", barrier=None):
+    return [
+        RecordingTool(name="generate_post", result=post, calls=[], barrier=barrier),
+        RecordingTool(name="create_video", result=video, calls=[], barrier=barrier),
+        RecordingTool(name="post_to_linkedin", result=linkedin, calls=[]),
+    ]
+
+
+INPUT = {
+    "project_name": "Carbon Track",
+    "website_url": "https://example.com",
+    "description": "Tracks carbon",
+    "key_features": ["Tracking", "Insights"],
+    "tone": "casual",
+}
+
+
+def test_pipeline_runs_post_and_video_concurrently():
+    """generate_post and create_video overlap; publishing gets both results."""
+    barrier = threading.Barrier(2)
+    tools = make_tools(barrier=barrier)
+    result = PromotionPipeline(tools).run(INPUT)
+
+    post_tool, video_tool, linkedin_tool = tools
+    assert post_tool.calls[0]["key_features"] == "Tracking, Insights"
+    assert post_tool.calls[0]["tone"] == "casual"
+    assert video_tool.calls[0]["output_filename"] == "carbon-track"
+    assert linkedin_tool.calls == [{"post_text": "Great post", "video_path": "output/demo.mp4"}]
+    assert result["mode"] == "pipeline"
+    assert result["post_text"] == "Great post"
+    assert set(result["timings"]) >= {"generate_post", "create_video", "post_to_linkedin", "total"}
+
+
+def test_pipeline_arun_matches_run():
+    """The async pipeline produces the same result shape."""
+    tools = make_tools()
+    result = asyncio.run(PromotionPipeline(tools).arun(INPUT))
+    assert result["post_text"] == "Great post"
+    assert result["video_path"] == "output/demo.mp4"
+    assert tools[2].calls == [{"post_text": "Great post", "video_path": "output/demo.mp4"}]
+
+
+def test_pipeline_continues_without_video():
+    """A failed recording still publishes the text post."""
+    tools = make_tools(video="Error creating video: no browser")
+    result = PromotionPipeline(tools).run(INPUT)
+    assert tools[2].calls[0]["video_path"] == ""
+    assert result["video_error"].startswith("Error")
+
+
+def test_pipeline_raises_on_post_error():
+    """Post generation failures abort before publishing."""
+    tools = make_tools(post="Error generating post: offline")
+    with pytest.raises(RuntimeError, match="offline"):
+        PromotionPipeline(tools).run(INPUT)
+    assert tools[2].calls == []
+
+
+def test_agent_uses_pipeline_for_project_input():
+    """Auto mode runs structured input without building the LLM agent."""
+    agent = CarbonTrackAgent(make_tools(), mode="auto")
+    result = agent.run(INPUT)
+    assert result["mode"] == "pipeline"
+    assert agent._agent_executor is None
+
+
+def test_agent_routes_free_form_requests_to_agent():
+    """Free-form requests are never handled by the pipeline."""
+    agent = CarbonTrackAgent(make_tools(), mode="auto")
+    assert not agent._use_pipeline({"request": "Write a post about our new release"})
+    assert agent._format_input({"request": "  Write a post  "}) == "Write a post"
+    with pytest.raises(ValueError):
+        CarbonTrackAgent(make_tools(), mode="pipeline")._use_pipeline({"request": "hi"})
+
+
+def test_slugify():
+    assert slugify("Carbon Track 2.0!") == "carbon-track-2-0"
+    assert slugify("") == "demo"
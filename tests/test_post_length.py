@@ -0,0 +1,113 @@
+"""
+Tests for fitting generated posts to the length limit
+"""
+from unittest.mock import Mock, patch
+
+from langchain_core.messages import AIMessage
+
+from config import settings
+from metrics import LLM_WASTED_TOKENS, POST_LENGTH_FIXES
+from tools.generate_post import GeneratePostTool
+from tools.post_length import end_at_sentence, max_tokens_for_length, trim_to_sentence
+
+ARGS = dict(project_name="CarbonTrack", description="Carbon tracking", website_url="https://example.com")
+
+
+def test_trim_keeps_whole_sentences_and_hashtags():
+    post = "Meet CarbonTrack. It tracks your footprint! And it does a lot more besides.\n\n#Climate #OpenSource"
+    trimmed = trim_to_sentence(post, 70)
+    assert trimmed == "Meet CarbonTrack. It tracks your footprint!\n\n#Climate #OpenSource"
+    assert trim_to_sentence(post, len(post)) == post
+
+
+def test_trim_without_sentence_boundary_cuts_at_a_word():
+    trimmed = trim_to_sentence("carbon " * 40, 50)
+    assert len(trimmed) <= 50
+    assert trimmed.endswith("carbon…")
+
+
+def test_end_at_sentence_drops_unfinished_sentence():
+    assert end_at_sentence("One sentence here. Two sentences here! Three is") == "One sentence here. Two sentences here!"
+    assert end_at_sentence("Nothing finished in this") == "Nothing finished in this…"
+    assert end_at_sentence("Finished post.") == "Finished post."
+
+
+def test_end_at_sentence_keeps_a_short_finished_prefix():
+    text = "Meet CarbonTrack! It measures your footprint and suggests small daily changes that add up, like"
+    assert end_at_sentence(text) == "Meet CarbonTrack!"
+
+
+def test_token_budget_follows_max_post_length():
+    assert max_tokens_for_length(2000) == 572
+    assert max_tokens_for_length(3500) > max_tokens_for_length(2000)
+
+
+@patch("tools.generate_post.get_llm")
+def test_generation_is_token_limited(mock_get_llm, monkeypatch):
+    monkeypatch.setattr(settings, "max_post_length", 700)
+    mock_get_llm.return_value.invoke.return_value = AIMessage(content="Short post.")
+
+    assert GeneratePostTool(use_cache=False)._run(**ARGS) == "Short post."
+    mock_get_llm.assert_called_with(max_tokens=200)
+
+    monkeypatch.setattr(settings, "llm_max_tokens", 64)
+    GeneratePostTool(use_cache=False)._run(**ARGS)
+    mock_get_llm.assert_called_with(max_tokens=64)
+
+
+@patch("tools.generate_post.get_llm")
+def test_post_cut_by_token_limit_ends_on_a_sentence(mock_get_llm):
+    mock_get_llm.return_value.invoke.return_value = AIMessage(
+        content="Meet CarbonTrack, the open-source way to measure your footprint. Track and",
+        response_metadata={"done_reason": "length"},
+    )
+    fixes = POST_LENGTH_FIXES.value(action="token_limit")
+
+    assert GeneratePostTool(use_cache=False)._run(**ARGS) == "Meet CarbonTrack, the open-source way to measure your footprint."
+    assert POST_LENGTH_FIXES.value(action="token_limit") == fixes + 1
+
+
+@patch("tools.generate_post.get_llm")
+def test_far_too_long_post_is_shortened_once(mock_get_llm, monkeypatch):
+    monkeypatch.setattr(settings, "max_post_length", 100)
+    draft = "This sentence is long enough to matter. " * 5
+    mock_get_llm.return_value.invoke.side_effect = [
+        AIMessage(content=draft),
+        AIMessage(content="A shorter post. " * 8),
+    ]
+    wasted = LLM_WASTED_TOKENS.value(reason="shortened")
+
+    result = GeneratePostTool(use_cache=False)._run(**ARGS)
+
+    # One shorten call, then the remaining overshoot is trimmed
+    assert mock_get_llm.return_value.invoke.call_count == 2
+    assert draft in mock_get_llm.return_value.invoke.call_args_list[1][0][0]
+    assert result == ("A shorter post. " * 6).strip()
+    assert LLM_WASTED_TOKENS.value(reason="shortened") > wasted
+
+
+@patch("tools.generate_post.get_llm")
+def test_small_overshoot_is_trimmed_without_another_call(mock_get_llm, monkeypatch):
+    monkeypatch.setattr(settings, "max_post_length", 100)
+    mock_get_llm.return_value.invoke.return_value = Mock(content="Short sentence here. " * 5)
+
+    result = GeneratePostTool(use_cache=False)._run(**ARGS)
+
+    assert mock_get_llm.return_value.invoke.call_count == 1
+    assert result == ("Short sentence here. " * 4).strip()
+
+
+@patch("tools.generate_post.get_llm")
+def test_streamed_post_is_trimmed_not_shortened(mock_get_llm, monkeypatch):
+    """Text already streamed to the user is not replaced by a shortened rewrite."""
+    monkeypatch.setattr(settings, "max_post_length", 100)
+    draft = "This sentence is long enough to matter. " * 5
+    mock_get_llm.return_value.stream.return_value = iter([Mock(content=draft)])
+    tokens = []
+
+    result = GeneratePostTool(use_cache=False, on_token=tokens.append)._run(**ARGS)
+
+    mock_get_llm.return_value.invoke.assert_not_called()
+    assert mock_get_llm.return_value.stream.call_count == 1
+    assert tokens == [draft]
+    assert result == ("This sentence is long enough to matter. " * 2).strip()
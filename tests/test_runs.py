@@ -0,0 +1,77 @@
+"""
+Tests for run manifests and resuming failed runs
+"""
+import json
+
+import pytest
+
+from agent import CarbonTrackAgent
+from runs import RunManifest
+from tests.test_pipeline import INPUT, make_tools
+from tools.post_to_linkedin import PostToLinkedInTool
+
+
+def test_manifest_records_stages_and_artifacts(tmp_path):
+    manifest = RunManifest.create(INPUT, runs_dir=tmp_path)
+    manifest.record_stage("generate_post", "Great post")
+    manifest.record_stage("create_video", "Error creating video: no browser")
+    manifest.record_stage("post_to_linkedin", "✅ Post published successfully! Post ID: urn:li:share:7")
+    manifest.finish({"output": "done"})
+
+    data = json.loads((tmp_path / f"{manifest.run_id}.json").read_text())
+    assert data["status"] == "succeeded"
+    assert data["input_data"] == INPUT
+    assert data["artifacts"] == {"post_text": "Great post", "post_id": "urn:li:share:7"}
+    assert set(RunManifest.load(manifest.run_id, tmp_path).completed_stages()) == {
+        "generate_post", "post_to_linkedin",
+    }
+    with pytest.raises(ValueError, match="No manifest"):
+        RunManifest.load("missing", tmp_path)
+
+
+def test_resume_skips_completed_stages(tmp_path):
+    video = tmp_path / "demo.mp4"
+    video.write_bytes(b"video")
+    manifest = RunManifest.create(INPUT, runs_dir=tmp_path)
+    tools = make_tools(video=str(video), linkedin="Error: Failed to post: 500")
+
+    with pytest.raises(RuntimeError):
+        CarbonTrackAgent(tools, mode="pipeline").run(INPUT, on_stage=manifest.record_stage)
+    manifest.fail("Failed to post")
+
+    resumed = RunManifest.load(manifest.run_id, tmp_path)
+    resumed.resume()
+    tools = make_tools(linkedin="Posted")
+    result = CarbonTrackAgent(tools, mode="pipeline").run(
+        resumed.input_data, on_stage=resumed.record_stage, completed=resumed.completed_stages()
+    )
+
+    post_tool, video_tool, linkedin_tool = tools
+    assert post_tool.calls == [] and video_tool.calls == []
+    assert linkedin_tool.calls == [{"post_text": "Great post", "video_path": str(video)}]
+    assert result["timings"]["generate_post"] == 0.0
+    assert resumed.attempts == 2
+    assert resumed.stages["post_to_linkedin"]["succeeded"]
+
+
+def test_missing_video_is_recorded_again(tmp_path):
+    tools = make_tools()
+    CarbonTrackAgent(tools, mode="pipeline").run(
+        INPUT, completed={"generate_post": "Great post", "create_video": str(tmp_path / "gone.mp4")}
+    )
+    assert tools[0].calls == []
+    assert len(tools[1].calls) == 1
+
+
+def test_linkedin_artifacts_are_recorded(linkedin_stub, tmp_path):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"png-bytes")
+    manifest = RunManifest.create(INPUT, runs_dir=tmp_path)
+
+    PostToLinkedInTool().invoke(
+        {"post_text": "Hello", "image_path": str(image)},
+        config={"callbacks": [manifest.callback_handler()]},
+    )
+
+    assert manifest.artifacts["asset_urn"].startswith("urn:li:")
+    assert manifest.artifacts["post_id"]
@@ -0,0 +1,135 @@
+"""
+Tests for the DevTools screencast recorder
+"""
+import asyncio
+import base64
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import tools.create_video as create_video
+import tools.transcode as transcode
+from config import settings
+from tools.screencast import ScreencastRecorder
+from tools.transcode import FFmpegTranscoder
+
+
+def make_jpeg(shade: int) -> bytes:
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    ok, data = cv2.imencode(".jpg", np.full((48, 64, 3), shade, dtype=np.uint8))
+    assert ok
+    return data.tobytes()
+
+
+class FakeCDPSession:
+    """Emits a few screencast frames after startScreencast and records acks."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.handlers = {}
+        self.sent = []
+        self.acked = []
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def send(self, method, params=None):
+        self.sent.append((method, params))
+        if method == "Page.startScreencast":
+            asyncio.get_running_loop().create_task(self._emit())
+        elif method == "Page.screencastFrameAck":
+            self.acked.append(params["sessionId"])
+
+    async def _emit(self):
+        for number, frame in enumerate(self.frames):
+            await self.handlers["Page.screencastFrame"]({
+                "data": base64.b64encode(frame).decode(),
+                "sessionId": number,
+            })
+            await asyncio.sleep(0.05)
+
+
+class FakeContext:
+    def __init__(self, session):
+        self.session = session
+
+    async def new_cdp_session(self, page):
+        return self.session
+
+
+class CopyTranscoder(FFmpegTranscoder):
+    """Stands in for ffmpeg by copying stdin to the output file."""
+
+    def pipe_command(self, output_path, size=None):
+        script = "import sys; open(sys.argv[1], 'wb').write(sys.stdin.buffer.read())"
+        return [sys.executable, "-c", script, str(output_path)]
+
+
+async def record(recorder, session, seconds):
+    await recorder.start(FakeContext(session), page=None)
+    await asyncio.sleep(seconds)
+    return await recorder.stop()
+
+
+def test_frames_are_written_at_a_constant_rate(tmp_path):
+    """The latest frame is repeated so the output has fps * duration frames."""
+    frames = [b"frame-a", b"frame-b", b"frame-c"]
+    session = FakeCDPSession(frames)
+    recorder = ScreencastRecorder(
+        tmp_path / "out.bin", (64, 48), fps=20, quality=60, transcoder=CopyTranscoder(fps=20)
+    )
+
+    result = asyncio.run(record(recorder, session, 0.5))
+
+    assert session.sent[0] == ("Page.startScreencast", {
+        "format": "jpeg", "quality": 60, "maxWidth": 64, "maxHeight": 48, "everyNthFrame": 1,
+    })
+    assert session.acked == [0, 1, 2]
+    assert recorder.frames_received == 3
+    # Roughly 0.5s at 20 fps, each frame written whole
+    assert 8 <= recorder.frames_written <= 12
+    data = (tmp_path / "out.bin").read_bytes()
+    assert len(data) == recorder.frames_written * len(frames[0])
+    assert data.endswith(b"frame-c")
+    assert result.backend == "screencast"
+    assert result.media_seconds == recorder.frames_written / 20
+
+
+def test_stop_without_frames_fails(tmp_path):
+    recorder = ScreencastRecorder(tmp_path / "out.bin", (64, 48), fps=10, transcoder=CopyTranscoder(fps=10))
+    with pytest.raises(RuntimeError, match="No screencast frames"):
+        asyncio.run(record(recorder, FakeCDPSession([]), 0))
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_screencast_encodes_h264_with_ffmpeg(tmp_path):
+    """JPEG frames piped into ffmpeg become a playable H.264 file."""
+    output = tmp_path / "out.mp4"
+    recorder = ScreencastRecorder(output, (64, 48), fps=10)
+    asyncio.run(record(recorder, FakeCDPSession([make_jpeg(40), make_jpeg(200)]), 1.0))
+
+    probe = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-i", str(output)], stderr=subprocess.PIPE, text=True
+    )
+    assert "h264" in probe.stderr
+    assert "64x48" in probe.stderr
+
+
+def test_capture_mode_falls_back_to_record_video(monkeypatch):
+    """Screencast needs ffmpeg and an H.264 container."""
+    tool = create_video.CreateVideoTool()
+    monkeypatch.setattr(settings, "video_capture_mode", "screencast")
+    monkeypatch.setattr(settings, "video_format", "mp4")
+
+    monkeypatch.setattr(transcode.shutil, "which", lambda exe: "/usr/bin/ffmpeg")
+    assert tool._capture_mode() == "screencast"
+
+    monkeypatch.setattr(settings, "video_format", "webm")
+    assert tool._capture_mode() == "record_video"
+
+    monkeypatch.setattr(settings, "video_format", "mp4")
+    monkeypatch.setattr(transcode.shutil, "which", lambda exe: None)
+    assert tool._capture_mode() == "record_video"
@@ -0,0 +1,61 @@
+"""
+Tests for fast, side-effect free start-up
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from startup import ImportProfiler
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+
+def run_python(code: str, cwd: Path) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys; sys.path.insert(0, {str(SRC_DIR)!r})\n{code}"],
+        cwd=cwd, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_importing_cli_loads_no_heavy_dependencies(tmp_path):
+    workdir = tmp_path / "cwd"
+    workdir.mkdir()
+    output = run_python(
+        "import config, main\n"
+        "print(config._settings is None)\n"
+        "print(sorted(m for m in ('langchain', 'langchain_core', 'playwright', 'cv2', 'httpx') if m in sys.modules))",
+        cwd=workdir,
+    )
+    assert output.split("\n")[:2] == ["True", "[]"]
+    # No log file is created just by importing
+    assert list(workdir.iterdir()) == []
+
+
+def test_tools_are_imported_on_first_access(tmp_path):
+    output = run_python(
+        "import tools\n"
+        "print('tools.create_video' in sys.modules)\n"
+        "tools.GeneratePostTool\n"
+        "print('tools.generate_post' in sys.modules, 'tools.create_video' in sys.modules)",
+        cwd=tmp_path,
+    )
+    assert output.split("\n")[:2] == ["False", "True False"]
+
+
+def test_import_profiler_records_imports_and_checkpoints():
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        sys.modules.pop("colorsys", None)
+        import colorsys  # noqa: F401
+        profiler.checkpoint("imported")
+    finally:
+        profiler.uninstall()
+
+    assert "colorsys" in profiler.imports
+    total, own = profiler.imports["colorsys"]
+    assert total >= own >= 0
+    assert profiler.checkpoints[0][0] == "imported"
+    assert profiler.slowest(1)[0][0] in profiler.imports
@@ -0,0 +1,65 @@
+"""
+Tests for compiled prompt templates
+"""
+from unittest.mock import patch
+
+import pytest
+
+from config import POST_TEMPLATES, settings
+from templates import PostTemplate, compact, estimate_tokens, get_template
+
+
+def test_templates_are_compacted():
+    source = POST_TEMPLATES["professional"]
+    template = get_template("professional")
+
+    assert not template.text.startswith((" ", "\n"))
+    assert all(line == line.strip() for line in template.text.splitlines())
+    assert "\n\n\n" not in template.text
+    assert estimate_tokens(template.text) < estimate_tokens(source)
+    assert template.fields == {"project_name", "description", "features", "website_url", "max_length"}
+
+
+def test_compact_keeps_single_blank_lines():
+    assert compact("\n    Title\n\n\n      - one   item\n    - two  \n") == "Title\n\n- one item\n- two"
+
+
+def test_render_matches_format():
+    template = get_template("casual")
+    values = dict(project_name="CarbonTrack", description="Tracks {carbon}", features="- A",
+                  website_url="https://example.com", max_length=2000)
+
+    prompt = template.render(**values)
+
+    assert prompt.text == template.text.format(**values)
+    assert prompt.tokens == estimate_tokens(prompt.text) > template.static_tokens
+
+
+def test_unknown_placeholders_are_rejected():
+    with pytest.raises(ValueError, match="unknown placeholder"):
+        PostTemplate("custom", "Write about {project} now")
+
+
+def test_template_files_override_and_add_tones(tmp_path, monkeypatch):
+    (tmp_path / "professional.txt").write_text("  Announce {project_name}:\n    {website_url}\n")
+    (tmp_path / "launch.txt").write_text("Launch post for {project_name}, under {max_length} chars.")
+    monkeypatch.setattr(settings, "post_templates_dir", str(tmp_path))
+
+    assert get_template("professional").text == "Announce {project_name}:\n{website_url}"
+    assert get_template("launch").origin == str(tmp_path / "launch.txt")
+    assert get_template("casual").text == compact(POST_TEMPLATES["casual"])
+
+
+@patch("tools.generate_post.get_llm")
+def test_prompt_over_budget_is_not_sent(mock_get_llm, monkeypatch):
+    from tools.generate_post import GeneratePostTool
+
+    monkeypatch.setattr(settings, "prompt_token_budget", 50)
+    result = GeneratePostTool(use_cache=False)._run(
+        project_name="CarbonTrack",
+        description="Carbon tracking " * 20,
+        website_url="https://example.com",
+    )
+
+    assert result.startswith("Error generating post: Prompt is ~")
+    mock_get_llm.return_value.invoke.assert_not_called()
@@ -0,0 +1,117 @@
+"""
+Tests for run tracing
+"""
+import json
+from uuid import uuid4
+
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from agent import CarbonTrackAgent
+from config import settings
+from tests.test_pipeline import INPUT, make_tools
+from tools.post_to_linkedin import PostToLinkedInTool
+from tracing import TracingCallbackHandler, emit_event
+
+
+def read_spans(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_traced_pipeline_run_writes_tool_spans(tmp_path, monkeypatch):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(settings, "trace_enabled", True)
+    monkeypatch.setattr(settings, "trace_file", str(trace_file))
+
+    agent = CarbonTrackAgent(make_tools(), mode="pipeline")
+    result = agent.run(INPUT)
+
+    assert result["trace_file"] == str(trace_file)
+    spans = {span["name"]: span for span in read_spans(trace_file)}
+    root = spans["carbontrack.run"]
+    assert root["parent_id"] is None and root["attributes"]["project_name"] == "Carbon Track"
+    for name in ("generate_post", "create_video", "post_to_linkedin"):
+        assert spans[name]["kind"] == "tool"
+        assert spans[name]["parent_id"] == root["span_id"]
+        assert spans[name]["trace_id"] == root["trace_id"]
+        assert 0 <= spans[name]["duration_ms"] <= root["duration_ms"]
+    assert agent.last_trace.trace_id == root["trace_id"]
+
+
+def test_llm_span_records_token_usage():
+    handler = TracingCallbackHandler()
+    message = AIMessage(
+        content="A post",
+        usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15},
+    )
+    llm = GenericFakeChatModel(messages=iter([message]))
+
+    with handler.trace("run"):
+        llm.invoke("Write a post", config={"callbacks": [handler]})
+
+    llm_span = next(span for span in handler.spans if span.kind == "llm")
+    assert llm_span.attributes["llm.prompt_tokens"] == 12
+    assert llm_span.attributes["llm.completion_tokens"] == 3
+    assert llm_span.parent_id == handler.spans[0].span_id
+
+
+def test_agent_iterations_wrap_tool_calls():
+    handler = TracingCallbackHandler()
+    executor, tool = uuid4(), uuid4()
+    handler.on_chain_start({"name": "AgentExecutor"}, {}, run_id=executor)
+    handler.on_agent_action(AgentAction("create_video", {}, ""), run_id=executor)
+    handler.on_tool_start({"name": "create_video"}, "{}", run_id=tool, parent_run_id=executor)
+    handler.on_tool_end("Error creating video: no browser", run_id=tool, parent_run_id=executor)
+    handler.on_agent_finish(AgentFinish({"output": "done"}, ""), run_id=executor)
+    handler.on_chain_end({}, run_id=executor)
+
+    spans = {span.name: span for span in handler.finished_spans()}
+    first, final = spans["agent.iteration 1"], spans["agent.iteration 2"]
+    assert first.attributes["agent.tool"] == "create_video"
+    assert final.attributes["agent.final"] is True
+    assert spans["create_video"].parent_id == first.span_id
+    assert spans["create_video"].status == "error"
+    assert first.parent_id == final.parent_id == spans["AgentExecutor"].span_id
+    assert first.end_ns <= final.start_ns
+
+
+def test_tool_events_become_span_attributes(linkedin_stub, tmp_path):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"png-bytes")
+    handler = TracingCallbackHandler()
+
+    PostToLinkedInTool().invoke(
+        {"post_text": "Hello", "image_path": str(image)},
+        config={"callbacks": [handler]},
+    )
+
+    span = next(span for span in handler.spans if span.name == "post_to_linkedin")
+    assert span.attributes["media_upload.bytes"] == len(b"png-bytes")
+    assert span.events[0]["name"] == "media_upload"
+
+
+def test_emit_event_outside_a_run_is_a_noop():
+    emit_event("media_upload", bytes=1)
+
+
+def test_otlp_export(tmp_path):
+    handler = TracingCallbackHandler()
+    tool = uuid4()
+    with handler.trace("run"):
+        handler.on_tool_start({"name": "generate_post"}, "{}", run_id=tool)
+        handler.on_custom_event("video_encode", {"frames": 90, "speed": 2.5}, run_id=tool)
+        handler.on_tool_end("post", run_id=tool)
+
+    path = handler.export(tmp_path / "trace.json", format="otlp")
+
+    request = json.loads(path.read_text())
+    spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root, span = spans
+    assert span["parentSpanId"] == root["spanId"] and "parentSpanId" not in root
+    assert span["traceId"] == handler.trace_id and len(span["spanId"]) == 16
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+    attributes = {item["key"]: item["value"] for item in span["attributes"]}
+    assert attributes["video_encode.frames"] == {"intValue": "90"}
+    assert attributes["video_encode.speed"] == {"doubleValue": 2.5}
+    assert span["status"] == {"code": 1}
@@ -0,0 +1,78 @@
+"""
+Tests for video transcoder backends
+"""
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import tools.transcode as transcode
+from tools.transcode import FFmpegTranscoder, OpenCVTranscoder, TranscodeResult, get_transcoder
+
+
+def test_ffmpeg_command_uses_configured_encoder():
+    """Preset, CRF, threads and frame rate end up on the command line."""
+    transcoder = FFmpegTranscoder(executable="ffmpeg", preset="fast", crf=28, threads=4, fps=24)
+    cmd = transcoder.command(Path("in.webm"), Path("out.mp4"))
+    assert cmd[0] == "ffmpeg"
+    assert cmd[cmd.index("-i") + 1] == "in.webm"
+    assert cmd[cmd.index("-c:v") + 1] == "libx264"
+    assert cmd[cmd.index("-preset") + 1] == "fast"
+    assert cmd[cmd.index("-crf") + 1] == "28"
+    assert cmd[cmd.index("-threads") + 1] == "4"
+    assert cmd[cmd.index("-r") + 1] == "24"
+    assert cmd[-1] == "out.mp4"
+
+
+def test_parse_progress():
+    """The last reported output time is the encoded media duration."""
+    progress = "frame=10\nout_time_us=400000\nprogress=continue\nout_time_us=2500000\nprogress=end\n"
+    assert FFmpegTranscoder.parse_progress(progress) == 2.5
+    assert FFmpegTranscoder.parse_progress("out_time_us=N/A\n") == 0.0
+    assert FFmpegTranscoder.parse_frames(progress + "frame=62\n") == 62
+
+
+def test_speed():
+    result = TranscodeResult(Path("x.mp4"), "ffmpeg", media_seconds=30.0, elapsed_seconds=10.0)
+    assert result.speed == 3.0
+
+
+def test_get_transcoder_prefers_ffmpeg(monkeypatch):
+    """auto picks ffmpeg when present and falls back to OpenCV otherwise."""
+    monkeypatch.setattr(transcode.shutil, "which", lambda exe: "/usr/bin/ffmpeg")
+    assert isinstance(get_transcoder("auto"), FFmpegTranscoder)
+    assert isinstance(get_transcoder("opencv"), OpenCVTranscoder)
+
+    monkeypatch.setattr(transcode.shutil, "which", lambda exe: None)
+    monkeypatch.setattr(OpenCVTranscoder, "available", classmethod(lambda cls: True))
+    assert isinstance(get_transcoder("auto"), OpenCVTranscoder)
+    assert isinstance(get_transcoder("ffmpeg"), OpenCVTranscoder)
+
+    monkeypatch.setattr(OpenCVTranscoder, "available", classmethod(lambda cls: False))
+    assert get_transcoder("auto") is None
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_ffmpeg_transcode_roundtrip(tmp_path):
+    """A real webm is converted to H.264 mp4 and its duration reported."""
+    source = tmp_path / "in.webm"
+    subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25",
+         "-t", "2", "-c:v", "libvpx", str(source)],
+        check=True,
+    )
+    result = FFmpegTranscoder(executable="ffmpeg").transcode(source, tmp_path / "out.mp4")
+    assert (tmp_path / "out.mp4").stat().st_size > 0
+    assert result.media_seconds == pytest.approx(2.0, abs=0.2)
+    assert result.frames > 0
+
+
+def test_ffmpeg_pipe_command_reads_jpeg_frames():
+    """Streamed frames are read from stdin at the configured rate and scaled to a fixed size."""
+    cmd = FFmpegTranscoder(executable="ffmpeg", fps=15).pipe_command(Path("out.mp4"), (1281, 720))
+    assert cmd[cmd.index("-f") + 1] == "image2pipe"
+    assert cmd[cmd.index("-framerate") + 1] == "15"
+    assert cmd[cmd.index("-i") + 1] == "pipe:0"
+    assert cmd[cmd.index("-vf") + 1] == "scale=1280:720"
+    assert cmd[-1] == "out.mp4"
@@ -0,0 +1,81 @@
+"""
+Tests for streamed, constant-memory media uploads
+"""
+import asyncio
+
+import pytest
+
+import tools.linkedin_video as linkedin_video
+from tools.linkedin_video import VideoUploader
+from tools.post_to_linkedin import PostToLinkedInTool
+from tools.upload_stream import FileSlice, UploadProgress
+
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / "media.bin"
+    path.write_bytes(bytes(range(256)) * 40)  # 10240 bytes
+    return path
+
+
+def test_file_slice_reads_bounded_chunks(media):
+    body = FileSlice(media, offset=1000, length=5000, chunk_size=1024)
+    chunks = list(body)
+    assert len(body) == 5000
+    assert max(len(chunk) for chunk in chunks) == 1024
+    assert b"".join(chunks) == media.read_bytes()[1000:6000]
+    # read(-1) is bounded too, so no caller can pull the whole file at once
+    body.rewind()
+    assert len(body.read()) == 1024
+
+
+def test_rewind_takes_back_progress(media):
+    calls = []
+    progress = UploadProgress(10240, lambda sent, total: calls.append(sent))
+    body = FileSlice(media, chunk_size=4096, progress=progress)
+    body.read()
+    body.rewind()
+    assert progress.sent == 0
+    assert b"".join(body) == media.read_bytes()
+    assert progress.sent == 10240
+    assert calls[-1] == 10240
+    assert progress.metrics()["bytes"] == 10240
+
+
+def test_async_iteration(media):
+    async def collect():
+        return [chunk async for chunk in FileSlice(media, chunk_size=4096)]
+    assert b"".join(asyncio.run(collect())) == media.read_bytes()
+
+
+def test_image_upload_is_streamed_and_retried(linkedin_stub, media):
+    """A retried PUT re-sends the whole file and progress still ends at the total."""
+    linkedin_stub.inject("/image/", status=503)
+    progress = []
+    tool = PostToLinkedInTool(progress_callback=lambda sent, total: progress.append((sent, total)))
+
+    result = tool._run(post_text="Look", image_path=str(media))
+
+    assert "Post with image published" in result
+    assert linkedin_stub.images["urn:li:digitalmediaAsset:I1"] == media.read_bytes()
+    assert progress[-1] == (10240, 10240)
+
+
+def test_async_image_upload_sends_content_length(linkedin_stub, media):
+    result = asyncio.run(PostToLinkedInTool()._arun(post_text="Look", image_path=str(media)))
+    assert "Post with image published" in result
+    assert linkedin_stub.headers[("PUT", "/image/I1")]["Content-Length"] == "10240"
+    assert linkedin_stub.images["urn:li:digitalmediaAsset:I1"] == media.read_bytes()
+
+
+def test_video_upload_reports_progress_and_throughput(linkedin_stub, media, monkeypatch):
+    monkeypatch.setattr(linkedin_video, "INITIAL_POLL_INTERVAL", 0.01)
+    progress = []
+    uploader = VideoUploader(workers=3)
+
+    uploader.upload(media, progress_callback=lambda sent, total: progress.append(sent))
+
+    assert progress[-1] == 10240
+    assert uploader.last_upload_metrics["bytes"] == 10240
+    assert uploader.last_upload_metrics["bytes_per_second"] > 0
+    assert linkedin_stub.videos["urn:li:video:V1"]["data"] == media.read_bytes()
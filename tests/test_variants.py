@@ -0,0 +1,60 @@
+"""
+Tests for generating a post in several tones at once
+"""
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+from langchain_core.messages import AIMessage
+
+from tools.generate_post import GeneratePostTool
+
+ARGS = dict(project_name="CarbonTrack", description="Carbon tracking", website_url="https://example.com")
+TONES = ["professional", "casual", "enthusiastic", "technical"]
+
+
+@patch("tools.generate_post.get_llm")
+def test_variants_are_generated_concurrently(mock_get_llm):
+    # Every call waits for the other three, so this only passes if they run together
+    barrier = threading.Barrier(len(TONES), timeout=5)
+
+    def invoke(prompt):
+        barrier.wait()
+        return AIMessage(content=f"Post {len(prompt)}.")
+
+    mock_get_llm.return_value.invoke.side_effect = invoke
+
+    variants = GeneratePostTool(use_cache=False).generate_variants(**ARGS, tones=TONES, max_concurrency=4)
+
+    assert [variant.tone for variant in variants] == TONES
+    assert all(variant.text.startswith("Post ") and not variant.error for variant in variants)
+    assert len({variant.text for variant in variants}) == len(TONES)
+    assert all(variant.latency_seconds >= 0 for variant in variants)
+
+
+@patch("tools.generate_post.get_llm")
+def test_cached_and_failed_variants(mock_get_llm):
+    mock_get_llm.return_value.invoke.return_value = AIMessage(content="A casual post.")
+    GeneratePostTool()._run(**ARGS, tone="casual")
+    mock_get_llm.return_value.invoke.reset_mock()
+    mock_get_llm.return_value.invoke.side_effect = RuntimeError("model unavailable")
+
+    casual, technical, unknown = GeneratePostTool().generate_variants(
+        **ARGS, tones=["casual", "technical", "pirate"]
+    )
+
+    assert casual.cached and casual.text == "A casual post."
+    assert technical.error == "Error generating post: model unavailable"
+    assert unknown.error.startswith("Error generating post: unknown tone")
+    assert mock_get_llm.return_value.invoke.call_count == 1
+
+
+@patch("tools.generate_post.get_llm")
+def test_async_variants_default_to_every_tone(mock_get_llm):
+    mock_get_llm.return_value.ainvoke = AsyncMock(side_effect=lambda prompt: AIMessage(content="Async post."))
+
+    variants = asyncio.run(GeneratePostTool(use_cache=False).agenerate_variants(**ARGS))
+
+    assert [variant.tone for variant in variants] == TONES
+    assert all(variant.text == "Async post." for variant in variants)
+    mock_get_llm.return_value.invoke.assert_not_called()